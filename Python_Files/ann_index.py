@@ -0,0 +1,291 @@
+"""Inverted-file (IVF) approximate search over LocalIndex, with an optional faiss backend."""
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import json
+import math
+import os
+import numpy as np
+from Python_Files.local_index import (LocalIndex, DEFAULT_RERANK_FACTOR, PRECISIONS, RECORDS_FILE, empty_results,
+                                     match_dicts, normalize_rows)
+from Python_Files.retrieval_results import top_k_indices
+
+INDEX_TYPES = ("exact", "ivf", "faiss")
+
+# Lists probed per query unless the caller asks for another number
+DEFAULT_NPROBE = 16
+
+# n_lists defaults to this times the square root of the row count, the low end of faiss's guidance
+LISTS_PER_SQRT_ROW = 4
+
+# k-means trains on a sample of this many rows per list, for this many iterations
+KMEANS_SAMPLES_PER_LIST = 32
+KMEANS_ITERATIONS = 10
+
+# Rows scored against the centroids at a time when assigning lists
+ASSIGN_BLOCK_ROWS = 4096
+
+IVF_FILE = "ivf.npz"
+FAISS_FILE = "faiss.index"
+
+# faiss scalar quantizers matching the local index precisions
+_FAISS_SCALAR_TYPES = {"float16": "QT_fp16", "int8": "QT_8bit"}
+
+def default_n_lists(rows: int) -> int:
+    """Number of IVF lists for a corpus of rows vectors."""
+    return max(1, min(rows, int(round(LISTS_PER_SQRT_ROW * math.sqrt(rows)))))
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the closest centroid (highest cosine) for every unit row."""
+    assignment = np.empty(len(vectors), dtype=np.intp)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        assignment[start:start + ASSIGN_BLOCK_ROWS] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+def train_centroids(vectors: np.ndarray, n_lists: int, iterations: int = KMEANS_ITERATIONS,
+                    seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids (unit rows) trained on a sample of the unit vectors."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_lists * KMEANS_SAMPLES_PER_LIST)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)]
+    for _ in range(iterations):
+        assignment = assign_lists(sample, centroids)
+        counts = np.bincount(assignment, minlength=n_lists)
+        filled = counts > 0
+        # Sorted by list, each filled list is one run of rows; reduceat sums the runs
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        sums = np.add.reduceat(sample[np.argsort(assignment, kind="stable")], starts, axis=0)
+        centroids[filled] = normalize_rows(sums)
+        # A list that lost all its rows starts again from a random one
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(sample_size, len(empty), replace=False)]
+    return centroids
+
+class IVFIndex(LocalIndex):
+    """LocalIndex that scores only the rows of the lists closest to each query."""
+
+    def __init__(self, vectors: np.ndarray, records: List[Dict[str, Any]], centroids: np.ndarray,
+                 list_offsets: np.ndarray, precision: str = "float32", rerank_factor: int = DEFAULT_RERANK_FACTOR,
+                 codes: Optional[Dict[str, np.ndarray]] = None, nprobe: int = DEFAULT_NPROBE):
+        """vectors and records must be grouped by list: list i holds rows list_offsets[i]:list_offsets[i + 1].
+
+        Use build() to cluster raw embeddings; the other arguments are as for LocalIndex.
+        """
+        super().__init__(vectors, records, precision, rerank_factor, codes)
+        list_offsets = np.asarray(list_offsets, dtype=np.int64)
+        if len(list_offsets) != len(centroids) + 1 or list_offsets[-1] != len(vectors):
+            raise ValueError(f"{len(list_offsets)} list offsets ending at {list_offsets[-1]} "
+                             f"don't match {len(centroids)} centroids and {len(vectors)} vectors")
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.list_offsets = list_offsets
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(cls, embeddings, records: List[Dict[str, Any]], precision: str = "float32",
+              rerank_factor: int = DEFAULT_RERANK_FACTOR, n_lists: Optional[int] = None,
+              nprobe: int = DEFAULT_NPROBE, seed: int = 0) -> "IVFIndex":
+        """Cluster raw embeddings into n_lists lists (default_n_lists by default) and index them."""
+        vectors = normalize_rows(embeddings)
+        if not len(vectors):
+            return cls(vectors, records, np.zeros((0, vectors.shape[1]), dtype=np.float32), [0],
+                       precision, rerank_factor, nprobe=nprobe)
+        n_lists = min(n_lists or default_n_lists(len(vectors)), len(vectors))
+        centroids = train_centroids(vectors, n_lists, seed=seed)
+        assignment = assign_lists(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        return cls(vectors[order], [records[i] for i in order], centroids, list_offsets,
+                   precision, rerank_factor, nprobe=nprobe)
+
+    @classmethod
+    def load(cls, directory: str, precision: str = "float32", rerank_factor: int = DEFAULT_RERANK_FACTOR,
+             mmap: bool = True, nprobe: Optional[int] = None) -> "IVFIndex":
+        """Index saved by save(); nprobe defaults to the saved one."""
+        vectors, records, codes = cls._read_files(directory, precision, mmap)
+        with np.load(os.path.join(directory, IVF_FILE)) as saved:
+            centroids, list_offsets = saved["centroids"], saved["list_offsets"]
+            nprobe = nprobe or int(saved["nprobe"])
+        return cls(vectors, records, centroids, list_offsets, precision, rerank_factor, codes, nprobe)
+
+    def save(self, directory: str):
+        """Write the LocalIndex files (rows in list order) and the centroids to directory."""
+        super().save(directory)
+        np.savez(os.path.join(directory, IVF_FILE), centroids=self.centroids,
+                 list_offsets=self.list_offsets, nprobe=self.nprobe)
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def memory_bytes(self) -> int:
+        return super().memory_bytes + self.centroids.nbytes + self.list_offsets.nbytes
+
+    def probe(self, query: np.ndarray, nprobe: Optional[int] = None) -> np.ndarray:
+        """Lists whose centroids are closest to a unit query, in storage order."""
+        return np.sort(top_k_indices(self.centroids @ query, nprobe or self.nprobe))
+
+    def search(self, vector, top_k: int = 10, rerank: bool = True, allowed: Optional[np.ndarray] = None,
+               nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(row indices, scores) of the best top_k rows among the nprobe closest lists, best first.
+
+        allowed, a boolean per row, restricts the search to the rows where it is
+        True. It applies within the probed lists, so a narrow filter can return
+        fewer than top_k rows.
+        """
+        if not len(self) or top_k <= 0:
+            return empty_results()
+        query = self._unit_query(vector)
+        lists = self.probe(query, nprobe)
+        ranges = [(start, stop) for start, stop in zip(self.list_offsets[lists].tolist(),
+                                                       self.list_offsets[lists + 1].tolist()) if stop > start]
+        if not ranges:
+            return empty_results()
+        rows = np.concatenate([np.arange(start, stop) for start, stop in ranges])
+        scores = np.concatenate([self.approximate_scores(query, start, stop) for start, stop in ranges])
+        if allowed is not None:
+            keep = allowed[rows]
+            rows, scores = rows[keep], scores[keep]
+        return self._select(query, scores, top_k, rerank, rows)
+
+    def search_many(self, vectors, top_k: int = 10, rerank: bool = True, allowed: Optional[np.ndarray] = None,
+                    nprobe: Optional[int] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """search() for every query vector; each probes its own lists, so they are searched one by one."""
+        return [self.search(vector, top_k, rerank, allowed, nprobe) for vector in vectors]
+
+class FaissIndex:
+    """IVF search with faiss (IndexIVFFlat, or a scalar quantizer for float16 and int8).
+
+    Unlike LocalIndex, quantized precisions are not reranked at full precision.
+    """
+
+    def __init__(self, index, records: List[Dict[str, Any]], nprobe: int = DEFAULT_NPROBE):
+        self.index = index
+        self.records = records
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(cls, embeddings, records: List[Dict[str, Any]], precision: str = "float32",
+              n_lists: Optional[int] = None, nprobe: int = DEFAULT_NPROBE) -> "FaissIndex":
+        """Cluster raw embeddings into n_lists lists (default_n_lists by default) and index them."""
+        import faiss
+
+        vectors = normalize_rows(embeddings)
+        if not len(vectors):
+            raise ValueError("faiss needs at least one vector to train the index")
+        dim = vectors.shape[1]
+        n_lists = min(n_lists or default_n_lists(len(vectors)), len(vectors))
+        quantizer = faiss.IndexFlatIP(dim)
+        if precision == "float32":
+            index = faiss.IndexIVFFlat(quantizer, dim, n_lists, faiss.METRIC_INNER_PRODUCT)
+        elif precision in _FAISS_SCALAR_TYPES:
+            quantizer_type = getattr(faiss.ScalarQuantizer, _FAISS_SCALAR_TYPES[precision])
+            index = faiss.IndexIVFScalarQuantizer(quantizer, dim, n_lists, quantizer_type, faiss.METRIC_INNER_PRODUCT)
+        else:
+            raise ValueError(f"Unknown precision {precision!r}; expected float32 or one of {tuple(_FAISS_SCALAR_TYPES)}")
+        index.train(vectors)
+        index.add(vectors)
+        return cls(index, records, nprobe)
+
+    @classmethod
+    def load(cls, directory: str, nprobe: int = DEFAULT_NPROBE) -> "FaissIndex":
+        import faiss
+
+        with open(os.path.join(directory, RECORDS_FILE), 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        return cls(faiss.read_index(os.path.join(directory, FAISS_FILE)), records, nprobe)
+
+    def save(self, directory: str):
+        import faiss
+
+        os.makedirs(directory, exist_ok=True)
+        faiss.write_index(self.index, os.path.join(directory, FAISS_FILE))
+        with open(os.path.join(directory, RECORDS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.records, f, ensure_ascii=False)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def search(self, vector, top_k: int = 10, rerank: bool = True, allowed: Optional[np.ndarray] = None,
+               nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(row indices, scores) of the top_k rows among the nprobe closest lists, best first.
+
+        allowed, a boolean per row, restricts the search to the rows where it is
+        True. rerank is accepted for the same signature as the other indexes and
+        ignored: faiss scores are never reranked.
+        """
+        return self.search_many([vector], top_k, rerank, allowed, nprobe)[0]
+
+    def search_many(self, vectors, top_k: int = 10, rerank: bool = True, allowed: Optional[np.ndarray] = None,
+                    nprobe: Optional[int] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """search() for every query vector, in one faiss call."""
+        import faiss
+
+        if not len(vectors):
+            return []
+        queries = normalize_rows(vectors)
+        if not len(self) or top_k <= 0:
+            return [empty_results() for _ in queries]
+        # Per-call parameters, so concurrent queries can probe different numbers of lists
+        params = faiss.SearchParametersIVF(nprobe=nprobe or self.nprobe)
+        if allowed is not None:
+            params.sel = faiss.IDSelectorBatch(np.flatnonzero(allowed).astype(np.int64))
+        scores, rows = self.index.search(queries, top_k, params=params)
+        # Missing results (fewer than top_k rows in the probed lists) come back as row -1
+        return [(row[row >= 0].astype(np.intp), score[row >= 0]) for row, score in zip(rows, scores)]
+
+    def matches(self, vector, top_k: int = 10, include_metadata: bool = False,
+                allowed: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Pinecone-shaped match dicts (id, score, metadata) for a query vector."""
+        return self.matches_many([vector], top_k, include_metadata, allowed)[0]
+
+    def matches_many(self, vectors, top_k: int = 10, include_metadata: bool = False,
+                     allowed: Optional[np.ndarray] = None) -> List[List[Dict[str, Any]]]:
+        """matches() for every query vector, in one faiss call."""
+        return [match_dicts(self.records, rows, scores, include_metadata)
+                for rows, scores in self.search_many(vectors, top_k, allowed=allowed)]
+
+def build_index(embeddings, records: List[Dict[str, Any]], index_type: str = "exact", precision: str = "float32",
+                nprobe: int = DEFAULT_NPROBE, n_lists: Optional[int] = None):
+    """Exact LocalIndex, IVFIndex or FaissIndex of raw embeddings, by index_type (see INDEX_TYPES).
+
+    An empty corpus has nothing to cluster and always gets an exact index.
+    """
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}; expected one of {INDEX_TYPES}")
+    if index_type == "exact" or not len(records):
+        return LocalIndex.build(embeddings, records, precision)
+    if index_type == "ivf":
+        return IVFIndex.build(embeddings, records, precision, n_lists=n_lists, nprobe=nprobe)
+    return FaissIndex.build(embeddings, records, precision, n_lists=n_lists, nprobe=nprobe)
+
+def load_index(directory: str, precision: str = "float32", nprobe: Optional[int] = None, mmap: bool = True):
+    """Index saved in directory by LocalIndex, IVFIndex or FaissIndex, told apart by the files there.
+
+    nprobe defaults to the saved one for IVFIndex and to DEFAULT_NPROBE for FaissIndex.
+    """
+    if os.path.exists(os.path.join(directory, FAISS_FILE)):
+        return FaissIndex.load(directory, nprobe or DEFAULT_NPROBE)
+    if os.path.exists(os.path.join(directory, IVF_FILE)):
+        return IVFIndex.load(directory, precision, mmap=mmap, nprobe=nprobe)
+    return LocalIndex.load(directory, precision, mmap=mmap)
+
+if __name__ == "__main__":
+    # Build an index from generate_embeddings.py's output, for VectorDBQuerier's LOCAL_INDEX_DIR
+    parser = argparse.ArgumentParser(description="Save a local index of embeddings and their chunk metadata.")
+    parser.add_argument("embeddings", help="embeddings_<timestamp>.npy")
+    parser.add_argument("metadata", help="metadata_<timestamp>.json, one record per embedding")
+    parser.add_argument("directory", help="Where to save the index")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default="exact")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float32")
+    parser.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE)
+    parser.add_argument("--n-lists", type=int)
+    args = parser.parse_args()
+
+    with open(args.metadata, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    index = build_index(np.load(args.embeddings), records, args.index_type, args.precision, args.nprobe, args.n_lists)
+    index.save(args.directory)
+    print(f"Saved {type(index).__name__} of {len(index)} vectors to {args.directory}")
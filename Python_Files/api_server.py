@@ -1,8 +1,18 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
-from query_vectordb import VectorDBQuerier
-from typing import List, Optional
+from typing import List, Optional, Iterator
+import json
+import os
+import sys
+
+# Run from inside Python_Files; its modules import each other through the package root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Python_Files.query_vectordb import VectorDBQuerier
+from Python_Files.tracing import span, use_span, stage_percentiles
+from Python_Files.metrics import REGISTRY, CONTENT_TYPE
 
 app = FastAPI()
 
@@ -25,32 +35,85 @@ class ChatMessage(BaseModel):
 @app.post("/api/chat")
 async def chat(message: ChatMessage):
     try:
-        # Search vector database
-        results = querier.search(message.text, top_k=3)
+        with span("api.chat", stage="request"):
+            # Search vector database
+            results = querier.search(message.text, top_k=3)
         
-        if not results:
-            return {
-                "message": {
-                    "id": 0,
-                    "text": "I couldn't find any relevant information for your query.",
-                    "sender": "ai"
+            if not results:
+                return {
+                    "message": {
+                        "id": 0,
+                        "text": "I couldn't find any relevant information for your query.",
+                        "sender": "ai"
+                    }
                 }
-            }
         
-        # Process with LLM
-        response_data = querier.process_with_llm(message.text, results)
+            # Process with LLM
+            response_data = querier.process_with_llm(message.text, results)
         
-        return {
-            "message": {
-                "id": 0,  # Frontend will assign proper ID
-                "text": response_data["ai_response"],
-                "sender": "ai",
-                "sources": response_data["sources"]
+            return {
+                "message": {
+                    "id": 0,  # Frontend will assign proper ID
+                    "text": response_data["ai_response"],
+                    "sender": "ai",
+                    "sources": response_data["sources"]
+                }
             }
-        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Format a Server-Sent Events message."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.post("/api/chat/stream")
+def chat_stream(message: ChatMessage):
+    """Stream the answer as Server-Sent Events: one `token` event per chunk, then `done` with sources."""
+    def event_stream() -> Iterator[str]:
+        request_span = span("api.chat_stream", stage="request", activate=False)
+        request_span.__enter__()
+        try:
+            with use_span(request_span.span):
+                results = querier.search(message.text, top_k=3)
+            
+            if not results:
+                yield _sse_event({"text": "I couldn't find any relevant information for your query."}, "token")
+                yield _sse_event({"sources": []}, "done")
+                return
+            
+            # Each chunk may be pulled on a different worker thread, so the request
+            # span is made current only around each pull, never across a yield
+            tokens = querier.stream_with_llm(message.text, results)
+            while True:
+                with use_span(request_span.span):
+                    token = next(tokens, None)
+                if token is None:
+                    break
+                yield _sse_event({"text": token}, "token")
+            
+            yield _sse_event({"sources": querier.format_sources(results)}, "done")
+        except Exception as e:
+            yield _sse_event({"detail": str(e)}, "error")
+        finally:
+            request_span.__exit__(None, None, None)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+@app.get("/api/latency")
+async def get_latency():
+    """p50/p95/p99 wall time (ms) per request stage since the server started."""
+    return {"stages": stage_percentiles()}
+
 @app.get("/api/conversation-history")
 async def get_history():
     try:
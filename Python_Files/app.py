@@ -1,6 +1,11 @@
 import streamlit as st
-from query_vectordb import VectorDBQuerier
 import os
+import sys
+
+# Run from inside Python_Files; its modules import each other through the package root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Python_Files.query_vectordb import VectorDBQuerier
 
 # Initialize the VectorDBQuerier (do this once)
 @st.cache_resource
@@ -0,0 +1,64 @@
+from typing import List
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from langchain.memory import ConversationSummaryBufferMemory
+from langchain.schema import BaseMessage
+
+# A single worker serializes summarization across all memories, so a buffer is
+# never pruned by two threads at once.
+_summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-summarizer")
+_pending_prunes = set()
+_pending_lock = threading.Lock()
+
+class BackgroundSummaryMemory(ConversationSummaryBufferMemory):
+    """Rolling-window memory that summarizes older turns in a background worker.
+
+    Recent turns are kept verbatim. Only when the window grows past
+    ``max_token_limit`` tokens are the oldest turns folded into the running
+    summary, and that LLM call runs on a worker thread so ``save_context``
+    returns immediately. The summary is cached in ``moving_summary_buffer``
+    and reused on every load until the next overflow.
+    """
+
+    def prune(self) -> None:
+        """Schedule summarization of the turns beyond the token limit."""
+        if self.llm.get_num_tokens_from_messages(self.chat_memory.messages) <= self.max_token_limit:
+            return
+
+        key = id(self)
+        with _pending_lock:
+            if key in _pending_prunes:
+                return  # The scheduled run re-checks the window when it finishes
+            _pending_prunes.add(key)
+
+        _summary_executor.submit(self._summarize_overflow)
+
+    def _overflowing_messages(self, buffer: List[BaseMessage]) -> List[BaseMessage]:
+        """Oldest messages that must leave the window to get back under the limit."""
+        pruned = []
+        remaining = list(buffer)
+        while remaining and self.llm.get_num_tokens_from_messages(remaining) > self.max_token_limit:
+            pruned.append(remaining.pop(0))
+        return pruned
+
+    def _summarize_overflow(self) -> None:
+        """Fold overflowing turns into the summary (runs on the background worker)."""
+        summarized = False
+        try:
+            pruned = self._overflowing_messages(self.chat_memory.messages)
+            if pruned:
+                new_summary = self.predict_new_summary(pruned, self.moving_summary_buffer)
+                # New turns are only ever appended, so the first len(pruned) messages
+                # are still the ones that were summarized.
+                self.moving_summary_buffer = new_summary
+                del self.chat_memory.messages[:len(pruned)]
+                summarized = True
+        except Exception as e:
+            print(f"Error summarizing conversation memory: {str(e)}")
+        finally:
+            with _pending_lock:
+                _pending_prunes.discard(id(self))
+
+        # Turns saved while the summary was being generated may overflow again
+        if summarized:
+            self.prune()
@@ -0,0 +1,408 @@
+"""Rule-based extraction of hard eligibility criteria, with a confidence for falling back to the LLM."""
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+import os
+import re
+
+CONFIDENCE_THRESHOLD = float(os.getenv("CRITERIA_RULES_CONFIDENCE", "0.8"))
+
+# Field confidences
+EXPLICIT = 0.95      # Read from a pattern that states the limit
+WEAK_EXPLICIT = 0.75 # A pattern that usually, but not always, means a restriction
+NOT_MENTIONED = 0.9  # The topic never comes up, so there is no restriction
+CONFLICTING = 0.6    # Several different limits for the same field
+UNEXPLAINED = 0.4    # The topic comes up but no pattern matched
+
+STATES = (
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh",
+    "Goa", "Gujarat", "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka",
+    "Kerala", "Madhya Pradesh", "Maharashtra", "Manipur", "Meghalaya", "Mizoram",
+    "Nagaland", "Odisha", "Punjab", "Rajasthan", "Sikkim", "Tamil Nadu",
+    "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal",
+    "Andaman and Nicobar Islands", "Chandigarh", "Dadra and Nagar Haveli and Daman and Diu",
+    "Delhi", "Jammu and Kashmir", "Ladakh", "Lakshadweep", "Puducherry"
+)
+
+# Other spellings found in scheme texts, mapped to the names above
+STATE_ALIASES = {
+    "Orissa": "Odisha",
+    "Tamilnadu": "Tamil Nadu",
+    "Uttaranchal": "Uttarakhand",
+    "Pondicherry": "Puducherry",
+    "NCT of Delhi": "Delhi",
+    "J&K": "Jammu and Kashmir",
+    "Jammu & Kashmir": "Jammu and Kashmir",
+    "Telengana": "Telangana",
+    "Chattisgarh": "Chhattisgarh",
+}
+
+UNIT_MULTIPLIERS = {
+    "lakh": 100000, "lakhs": 100000, "lac": 100000, "lacs": 100000,
+    "crore": 10000000, "crores": 10000000, "cr": 10000000,
+    "thousand": 1000, "k": 1000,
+}
+
+_CURRENCY = r"(?:rs\.?|inr|₹|rupees?)"
+# An amount needs a currency marker or a unit, so counts and years aren't read as money
+_AMOUNT = (rf"(?:{_CURRENCY}\s*(?P<{{n}}num>\d[\d,]*(?:\.\d+)?)\s*(?P<{{n}}unit>lakhs?|lacs?|crores?|cr\b|thousand|k\b)?"
+           rf"|(?P<{{n}}num2>\d[\d,]*(?:\.\d+)?)\s*(?P<{{n}}unit2>lakhs?|lacs?|crores?|thousand)(?:\s*{_CURRENCY})?)")
+
+def _amount(name: str) -> str:
+    return _AMOUNT.replace("{n}", name)
+
+_UPPER = (r"(?:less\s+than|lower\s+than|below|under|up\s*to|upto|not\s+more\s+than|not\s+exceed(?:ing)?|"
+          r"(?:does|do|should|must|shall)\s+not\s+exceed|maximum\s+of|max\.?|within|not\s+above|ceiling\s+of|limit\s+of)")
+_LOWER = r"(?<!not\s)(?:more\s+than|above|over|exceed(?:s|ing)?|at\s+least|minimum\s+of)"
+# A negation just before a comparative flips its bound: "should not be more than Rs. 3 lakh" is a maximum
+_NEGATION_BEFORE = re.compile(r"\bnot\s+(?:(?:be|have)\s+)?$", re.IGNORECASE)
+
+# Candidate sentence ends; a dot only ends a sentence before whitespace, and not in "Rs." or "No."
+_SENTENCE_END = re.compile(r"[.\n;!?]")
+_NOT_SENTENCE_END = ("rs", "no")
+
+_INCOME_CUE = re.compile(
+    r"\b(?:annual|family|household|parental|parents'?|yearly|monthly|combined|total|gross)\s+income\b|"
+    r"\bincome\s+(?:limit|ceiling|criteria|criterion|certificate|of\s+(?:the\s+)?(?:family|applicant|parents|household))|"
+    r"\bincome\s+(?:should|must|is|does|shall)\b|\bcreamy\s+layer\b",
+    re.IGNORECASE
+)
+_INCOME_UPPER = re.compile(rf"\bincome\b[^.;]{{0,60}}?(?P<cmp>{_UPPER})\s*(?:of\s+)?{_amount('max')}", re.IGNORECASE)
+_INCOME_LOWER = re.compile(rf"\bincome\b[^.;]{{0,60}}?(?P<cmp>{_LOWER})\s*(?:of\s+)?{_amount('min')}", re.IGNORECASE)
+_INCOME_RANGE = re.compile(
+    rf"\bincome\b[^.;]{{0,60}}?(?:between|from)\s*{_amount('min')}\s*(?:and|to|-|–)\s*{_amount('max')}", re.IGNORECASE
+)
+_ANY_AMOUNT = re.compile(_amount("any"), re.IGNORECASE)
+_MONTHLY_INCOME = re.compile(r"\b(?:monthly\s+income|income\s+(?:per|a)\s+month|per\s+month|/\s*month)\b", re.IGNORECASE)
+
+_AGE_CUE = re.compile(r"\bage[ds]?\b|\byears?\s+old\b|\byears?\s+of\s+age\b|\bsenior\s+citizens?\b", re.IGNORECASE)
+_AGE_RANGE = re.compile(
+    r"(?:\bage[ds]?\b|\bbetween\b)[^.;]{0,40}?(?P<min>\d{1,3})\s*(?:years?\s*)?(?:to|-|–|and)\s*(?P<max>\d{1,3})\s*years?|"
+    r"(?P<min2>\d{1,3})\s*(?:to|-|–)\s*(?P<max2>\d{1,3})\s*years?\s+(?:of\s+age|old)",
+    re.IGNORECASE
+)
+_AGE_MIN = re.compile(
+    r"(?P<v>\d{1,3})\s*years?(?:\s+of\s+age)?\s+(?:and|or)\s+(?:above|more|older|over)|"
+    r"(?P<cmp>above|over|more\s+than|older\s+than|at\s+least|minimum(?:\s+age)?(?:\s+(?:of|is))?|not\s+less\s+than|"
+    r"completed|attain(?:ed|ing)?)\s+(?:the\s+age\s+of\s+)?(?P<v2>\d{1,3})\s*years?",
+    re.IGNORECASE
+)
+_AGE_MAX = re.compile(
+    r"(?P<cmp>below|under|less\s+than|younger\s+than|up\s*to|upto|not\s+more\s+than|maximum(?:\s+age)?(?:\s+(?:of|is))?|"
+    r"not\s+(?:exceed(?:ing)?|above))\s+(?:the\s+age\s+of\s+)?(?P<v>\d{1,3})\s*years?",
+    re.IGNORECASE
+)
+_SENIOR_CITIZEN = re.compile(r"\bsenior\s+citizens?\b", re.IGNORECASE)
+# "more than 5 years old" is as likely to be about vehicles or buildings; open-ended limits need a word for age
+_AGE_WORD = re.compile(r"\bage[ds]?\b", re.IGNORECASE)
+
+# Gender patterns are matched against the lowercased text
+_FEMALE_CUE = re.compile(
+    r"\b(?:women|woman|girls?|females?|widows?|mothers?|pregnant|lactating|daughters?|brides?|ladies|mahila)\b"
+)
+_FEMALE_ONLY = re.compile(
+    r"\b(?:only|exclusively|specifically|solely)\s+(?:for\s+|to\s+)?(?:the\s+)?(?:women|girls?|females?|widows?|daughters?)\b|"
+    r"\b(?:applicant|candidate|beneficiary|student)s?\s+(?:should|must|has\s+to|have\s+to)\s+be\s+(?:an?\s+)?(?:woman|women|female|girl|widow)s?\b|"
+    r"\b(?:women|girls?|female|widows?)\s+(?:applicants?|candidates?|beneficiaries|students?)\s+(?:are|is|will\s+be|shall\s+be)\s+eligible\b"
+)
+# Groups only women belong to; a restriction when the scheme is named for them, often a passing mention otherwise
+_FEMALE_GROUP = re.compile(r"\bgirl\s+child(?:ren)?\b|\bpregnant\s+(?:and\s+lactating\s+)?(?:women|woman|mothers?)\b|\bwidows?\s+pension\b")
+_FOR_FEMALE = re.compile(r"\bfor\s+(?:the\s+)?(?:women|girls?|widows?|daughters?)\b")
+_MALE_ONLY = re.compile(
+    r"\b(?:only|exclusively)\s+(?:for\s+)?(?:the\s+)?(?:men|boys|males?)\b|"
+    r"\b(?:applicant|candidate|beneficiary)s?\s+(?:should|must|has\s+to|have\s+to)\s+be\s+(?:a\s+)?(?:male|man|boy)s?\b"
+)
+
+# Abbreviations are matched case-sensitively, so "st" and "bc" in ordinary words don't count
+_CATEGORY_TERMS = {
+    "SC": r"\bSCs?\b|[Ss]cheduled\s+[Cc]astes?|\b[Dd]alits?\b",
+    "ST": r"\bSTs?\b|[Ss]cheduled\s+[Tt]ribes?",
+    "OBC": r"\bOBCs?\b|[Oo]ther\s+[Bb]ackward\s+[Cc]lass(?:es)?|\b[Bb]ackward\s+[Cc]lass(?:es)?",
+    "Minority": r"\b[Mm]inorit(?:y|ies)\b",
+}
+_CATEGORY = "|".join(f"(?:{pattern})" for pattern in _CATEGORY_TERMS.values())
+_CATEGORY_PATTERNS = {label: re.compile(pattern) for label, pattern in _CATEGORY_TERMS.items()}
+# Every category term starts with one of these literals; finding them first is much cheaper than
+# trying the full alternation at every position
+_CATEGORY_ANCHOR = re.compile(r"SC|ST|OBC|[Ss]cheduled|[Oo]ther|[Bb]ackward|[Dd]alit|[Mm]inorit")
+_CATEGORY_TERM = re.compile(_CATEGORY)
+_CATEGORY_LIST_TAIL = re.compile(rf"(?:\s*(?:/|,|&|and|or)\s*(?:the\s+)?(?:{_CATEGORY}))*")
+_CATEGORY_ONLY_BEFORE = re.compile(
+    r"(?:[Bb]elong(?:s|ing)?\s+to|[Oo]nly\s+(?:for|to)|[Ee]xclusively\s+for|[Mm]eant\s+(?:only\s+)?for|[Ss]hould\s+be\s+(?:from|of))"
+    r"\s+(?:the\s+)?(?:a\s+)?$"
+)
+_CATEGORY_GROUP_AFTER = re.compile(
+    r"\s+(?:category\s+|community\s+)?"
+    r"(?:students?|candidates?|applicants?|beneficiaries|families|persons|people|youths?|entrepreneurs?|farmers?|women|girls?)\b"
+)
+
+_STATE_NAMES = {name: name for name in STATES}
+_STATE_NAMES.update(STATE_ALIASES)
+_STATE_LOOKUP = {name.lower(): canonical for name, canonical in _STATE_NAMES.items()}
+# Longest first, so "Dadra and Nagar Haveli and Daman and Diu" wins over a shorter overlap
+_STATE = "|".join(re.escape(name) for name in sorted(_STATE_NAMES, key=len, reverse=True))
+_STATE_MENTION = re.compile(rf"\b(?P<state>{_STATE})\b")
+# Matched in the text just before and after each state mention
+_RESIDENCY_BEFORE = re.compile(
+    r"\b(?:(?:(?:permanent\s+)?residents?|domicile[ds]?|natives?|inhabitants?|citizens?)\s+of|"
+    r"belong(?:s|ing)?\s+to|living\s+in|residing\s+in|settled\s+in)\s+(?:the\s+)?(?:state\s+of\s+|UT\s+of\s+)?$",
+    re.IGNORECASE
+)
+_RESIDENCY_AFTER = re.compile(r"\s+(?:domicile|residents?)\b", re.IGNORECASE)
+_GOVERNMENT_BEFORE = re.compile(r"\b(?:government|govt\.?)\s+of\s+(?:the\s+)?$", re.IGNORECASE)
+_GOVERNMENT_AFTER = re.compile(r"\s+(?:state\s+)?(?:government|govt\b)", re.IGNORECASE)
+_NATIONWIDE = re.compile(
+    r"\b(?:all\s+(?:the\s+)?states|across\s+(?:the\s+)?(?:country|india|nation)|all\s+over\s+(?:the\s+)?(?:country|india)|"
+    r"nationwide|pan[-\s]india|throughout\s+(?:the\s+)?country)\b",
+    re.IGNORECASE
+)
+
+# Substrings that must occur (in the lowercased text) before the patterns for a field are tried;
+# most texts don't touch most fields, and a substring test is far cheaper than the patterns
+_INCOME_WORDS = ("income", "creamy")
+_AGE_WORDS = ("age", "year", "senior")
+_FEMALE_WORDS = ("wom", "girl", "female", "widow", "mother", "pregnan", "lactat", "daughter", "bride", "ladies", "mahila")
+_MALE_WORDS = ("men", "boy", "male")
+_NATIONWIDE_WORDS = ("states", "country", "india", "nation")
+# Suggest a category restriction without naming a category
+_CATEGORY_HINT_WORDS = ("tribal", "caste")
+
+def _mentions(lower: str, words) -> bool:
+    return any(word in lower for word in words)
+
+@dataclass
+class RuleExtraction:
+    """Criteria read by the rules, in SchemeHardCriteria's field names, and how far to trust them."""
+    criteria: Dict[str, Any]
+    field_confidence: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def confidence(self) -> float:
+        return min(self.field_confidence.values()) if self.field_confidence else 0.0
+
+    @property
+    def confident(self) -> bool:
+        return self.confidence >= CONFIDENCE_THRESHOLD
+
+def _sentences(text: str) -> List[str]:
+    sentences, start = [], 0
+    for match in _SENTENCE_END.finditer(text):
+        end = match.start()
+        if text[end] == "." and (
+            not text[end + 1:end + 2].isspace() or text[max(0, end - 2):end].lower() in _NOT_SENTENCE_END
+        ):
+            continue
+        if end > start:
+            sentences.append(text[start:end])
+        start = end + 1
+    sentences.append(text[start:])
+    return [sentence.strip() for sentence in sentences if sentence.strip()]
+
+def parse_amount(number: str, unit: Optional[str]) -> float:
+    """Rupees in e.g. ("2.5", "lakh") or ("1,20,000", None)."""
+    value = float(number.replace(",", ""))
+    if unit:
+        value *= UNIT_MULTIPLIERS.get(unit.lower().rstrip("."), 1)
+    return value
+
+def _match_amount(match: re.Match, name: str) -> float:
+    groups = match.groupdict()
+    if groups.get(f"{name}num"):
+        return parse_amount(groups[f"{name}num"], groups.get(f"{name}unit"))
+    return parse_amount(groups[f"{name}num2"], groups.get(f"{name}unit2"))
+
+def _negated(match: re.Match) -> bool:
+    """Whether the match's comparative is negated, e.g. "should not be less than", which flips its bound."""
+    start = match.start("cmp")
+    return start > 0 and _NEGATION_BEFORE.search(match.string, max(0, start - 16), start) is not None
+
+def _resolve(values: List[float], most_inclusive) -> Tuple[Optional[float], float]:
+    """One limit from every value read; several different ones keep the most inclusive, distrusted."""
+    if not values:
+        return None, EXPLICIT
+    distinct = set(values)
+    return most_inclusive(distinct), EXPLICIT if len(distinct) == 1 else CONFLICTING
+
+def extract_income(sentences: List[str]) -> Tuple[Tuple[Optional[float], Optional[float]], float]:
+    """Annual income range in rupees and its confidence."""
+    mins, maxes, cued, unexplained = [], [], False, False
+    for sentence in sentences:
+        if not _mentions(sentence.lower(), _INCOME_WORDS):
+            continue
+        cued = cued or bool(_INCOME_CUE.search(sentence))
+        # Monthly limits are compared against annual incomes
+        scale = 12 if _MONTHLY_INCOME.search(sentence) else 1
+        read = []
+        for match in _INCOME_RANGE.finditer(sentence):
+            read.append(("min", _match_amount(match, "min")))
+            read.append(("max", _match_amount(match, "max")))
+        read.extend(("min" if _negated(match) else "max", _match_amount(match, "max"))
+                    for match in _INCOME_UPPER.finditer(sentence))
+        read.extend(("max" if _negated(match) else "min", _match_amount(match, "min"))
+                    for match in _INCOME_LOWER.finditer(sentence))
+        if not read:
+            continue
+        # Another amount beside the limits usually means a second limit, e.g. "Rs. 1.5 lakh in rural
+        # areas and Rs. 2 lakh in urban areas"
+        values = {value for _, value in read}
+        unexplained = unexplained or any(_match_amount(match, "any") not in values for match in _ANY_AMOUNT.finditer(sentence))
+        for bound, value in read:
+            (mins if bound == "min" else maxes).append(value * scale)
+
+    if not mins and not maxes:
+        return (None, None), UNEXPLAINED if cued else NOT_MENTIONED
+    min_income, min_confidence = _resolve(mins, min)
+    max_income, max_confidence = _resolve(maxes, max)
+    if min_income is not None and max_income is not None and min_income >= max_income:
+        return (None, None), CONFLICTING
+    return (min_income, max_income), CONFLICTING if unexplained else min(min_confidence, max_confidence)
+
+def extract_age(sentences: List[str]) -> Tuple[Tuple[Optional[int], Optional[int]], float]:
+    """Age range in years and its confidence."""
+    mins, maxes, cued = [], [], False
+    for sentence in sentences:
+        if not _mentions(sentence.lower(), _AGE_WORDS) or not _AGE_CUE.search(sentence):
+            continue
+        cued = True
+        ranges = list(_AGE_RANGE.finditer(sentence))
+        for match in ranges:
+            low = int(match.group("min") or match.group("min2"))
+            high = int(match.group("max") or match.group("max2"))
+            if low < high <= 120:
+                mins.append(low)
+                maxes.append(high)
+        if ranges:
+            continue
+        sentence_mins = []
+        if _AGE_WORD.search(sentence):
+            for match in _AGE_MIN.finditer(sentence):
+                (maxes if _negated(match) else sentence_mins).append(int(match.group("v") or match.group("v2")))
+            for match in _AGE_MAX.finditer(sentence):
+                (sentence_mins if _negated(match) else maxes).append(int(match.group("v")))
+        if not sentence_mins and _SENIOR_CITIZEN.search(sentence):
+            sentence_mins = [60]
+        mins.extend(sentence_mins)
+
+    mins = [value for value in mins if value <= 120]
+    maxes = [value for value in maxes if value <= 120]
+    if not mins and not maxes:
+        return (None, None), UNEXPLAINED if cued else NOT_MENTIONED
+    min_age, min_confidence = _resolve(mins, min)
+    max_age, max_confidence = _resolve(maxes, max)
+    if min_age is not None and max_age is not None and min_age >= max_age:
+        return (None, None), CONFLICTING
+    return (min_age, max_age), min(min_confidence, max_confidence)
+
+def extract_genders(text: str, lower: str = None) -> Tuple[List[str], float]:
+    """Eligible genders and their confidence."""
+    lower = text.lower() if lower is None else lower
+    # Men come up in passing ("washer men", "bride and groom") far more often than as a restriction,
+    # so only an explicit male-only rule counts
+    male_only = _mentions(lower, _MALE_WORDS) and _MALE_ONLY.search(lower)
+    if not _mentions(lower, _FEMALE_WORDS):
+        return (["Male"], EXPLICIT) if male_only else (["All"], NOT_MENTIONED)
+    if male_only:
+        return ["All"], UNEXPLAINED
+    if _FEMALE_ONLY.search(lower):
+        return ["Female"], EXPLICIT
+    group = _FEMALE_GROUP.search(lower)
+    if group:
+        in_title = "\n" not in lower or group.start() < lower.find("\n")
+        return ["Female"], EXPLICIT if in_title else WEAK_EXPLICIT
+    if _FOR_FEMALE.search(lower):
+        # "for women" is as often one target group among several as a restriction
+        return ["Female"], WEAK_EXPLICIT
+    if _FEMALE_CUE.search(lower):
+        return ["All"], UNEXPLAINED
+    return ["All"], NOT_MENTIONED
+
+def _category_labels(text: str) -> List[str]:
+    return [label for label, pattern in _CATEGORY_PATTERNS.items() if pattern.search(text)]
+
+def _category_lists(text: str) -> List[Tuple[int, int]]:
+    """(start, end) of each run of category terms, e.g. "SC/ST" or "Scheduled Castes and Scheduled Tribes"."""
+    runs, pos = [], 0
+    while True:
+        anchor = _CATEGORY_ANCHOR.search(text, pos)
+        if anchor is None:
+            return runs
+        term = _CATEGORY_TERM.match(text, anchor.start())
+        if term is None:
+            pos = anchor.end()
+            continue
+        end = _CATEGORY_LIST_TAIL.match(text, term.end()).end()
+        runs.append((term.start(), end))
+        pos = end
+
+def extract_categories(text: str, lower: str = None) -> Tuple[List[str], float]:
+    """Eligible social categories and their confidence."""
+    lower = text.lower() if lower is None else lower
+    runs = _category_lists(text)
+    if not runs:
+        return ["All"], UNEXPLAINED if _mentions(lower, _CATEGORY_HINT_WORDS) else NOT_MENTIONED
+    only, groups = [], []
+    for start, end in runs:
+        if _CATEGORY_ONLY_BEFORE.search(text, max(0, start - 40), start):
+            only.extend(_category_labels(text[start:end]))
+        elif _CATEGORY_GROUP_AFTER.match(text, end):
+            groups.extend(_category_labels(text[start:end]))
+    if only:
+        return sorted(set(only)), EXPLICIT
+    if groups:
+        return sorted(set(groups)), WEAK_EXPLICIT
+    return ["All"], UNEXPLAINED
+
+def extract_states(text: str, lower: str = None) -> Tuple[List[str], float]:
+    """Eligible states and their confidence."""
+    lower = text.lower() if lower is None else lower
+    mentions = list(_STATE_MENTION.finditer(text))
+    if not mentions:
+        return ["All"], NOT_MENTIONED
+    mentioned, residency, governments = set(), set(), set()
+    for match in mentions:
+        state = _canonical_state(match.group("state"))
+        mentioned.add(state)
+        start, end = match.span()
+        if _RESIDENCY_BEFORE.search(text, max(0, start - 50), start) or _RESIDENCY_AFTER.match(text, end):
+            residency.add(state)
+        elif _GOVERNMENT_BEFORE.search(text, max(0, start - 25), start) or _GOVERNMENT_AFTER.match(text, end):
+            governments.add(state)
+    if residency:
+        return sorted(residency), EXPLICIT
+    if _mentions(lower, _NATIONWIDE_WORDS) and _NATIONWIDE.search(text):
+        return ["All"], NOT_MENTIONED
+    if len(mentioned) == 1:
+        # A state scheme names its state in the title or as the announcing government,
+        # usually without spelling out residency
+        if governments or mentions[0].start() < text.find("\n") or "\n" not in text:
+            return sorted(mentioned), EXPLICIT
+        return sorted(mentioned), WEAK_EXPLICIT
+    return ["All"], UNEXPLAINED
+
+def _canonical_state(name: str) -> str:
+    return _STATE_LOOKUP.get(name.lower(), name)
+
+def extract_criteria(text: str) -> RuleExtraction:
+    """Hard criteria of a scheme text, read by the rules, with per-field confidence."""
+    lower = text.lower()
+    sentences = _sentences(text) if _mentions(lower, _INCOME_WORDS + _AGE_WORDS) else []
+    income_range, income_confidence = extract_income(sentences)
+    age_range, age_confidence = extract_age(sentences)
+    genders, gender_confidence = extract_genders(text, lower)
+    categories, category_confidence = extract_categories(text, lower)
+    states, state_confidence = extract_states(text, lower)
+    return RuleExtraction(
+        criteria={
+            "income_range": income_range,
+            "age_range": age_range,
+            "eligible_genders": genders,
+            "eligible_states": states,
+            "eligible_categories": categories,
+        },
+        field_confidence={
+            "income_range": income_confidence,
+            "age_range": age_confidence,
+            "eligible_genders": gender_confidence,
+            "eligible_states": state_confidence,
+            "eligible_categories": category_confidence,
+        }
+    )
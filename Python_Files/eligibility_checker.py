@@ -1,12 +1,25 @@
 from typing import List, Dict, Tuple
-from scheme_agent import SchemeTools
-from langchain_openai import ChatOpenAI
+from pydantic import BaseModel, Field
 import os
 from dotenv import load_dotenv
 import re
 
+from Python_Files.scheme_agent import SchemeTools
+from Python_Files.service_clients import get_openai_client
+from Python_Files.structured_output import create_structured
+from Python_Files.model_router import ROUTER
+from Python_Files.llm_cache import cached_llm_call
+
 load_dotenv()
 
+class CriterionQuestion(BaseModel):
+    question: str = Field(description="Yes/no question")
+    criterion: str = Field(description="Exact criterion text it checks")
+    actionable: bool = Field(description="Can the user take steps to meet it")
+
+class CriterionQuestions(BaseModel):
+    questions: List[CriterionQuestion]
+
 class EligibilityQuestion:
     def __init__(self, question: str, criterion: str, is_actionable: bool = True):
         self.question = question
@@ -89,7 +102,7 @@ class EligibilityQuestion:
 class EligibilityChecker:
     def __init__(self):
         self.scheme_tools = SchemeTools()
-        self.llm = ChatOpenAI(temperature=0.3, model="gpt-4o-mini")
+        self.openai_client = get_openai_client()
 
     def get_scheme_criteria(self, scheme_name: str) -> str:
         """Get eligibility criteria with better error handling and fuzzy matching."""
@@ -146,45 +159,40 @@ class EligibilityChecker:
         4. Questions must be answerable with yes/no
         5. Mark a criterion as non-actionable if it's a fundamental requirement (like age, gender)
         
-        For each criterion, provide:
-        Question: [The yes/no question]
-        Criterion: [The exact criterion from the text this question is based on]
-        Actionable: [yes/no - can the user take steps to meet this criterion?]
-        ---
-
-        Example:
-        For criterion "Must be a farmer with less than 2 hectares of land":
-        Question: Do you own less than 2 hectares of agricultural land?
-        Criterion: Must be a farmer with less than 2 hectares of land
-        Actionable: no
-        ---
+        Report one question per criterion with report_questions.
+        For example, the criterion "Must be a farmer with less than 2 hectares of land" gives the question
+        "Do you own less than 2 hectares of agricultural land?", which is not actionable.
         """
         
-        response = self.llm.invoke(prompt).content
+        messages = [{"role": "user", "content": prompt}]
+        
+        def generate():
+            return create_structured(
+                ROUTER.client(self.openai_client, "question_generation"),
+                CriterionQuestions,
+                messages=messages,
+                name="report_questions",
+                description="Report the yes/no questions for the eligibility criteria",
+                temperature=0.3
+            ).model_dump()
+        
+        # Questions depend only on the scheme's criteria, so they are shared across users
+        response = CriterionQuestions.model_validate(cached_llm_call(
+            "eligibility_questions", ROUTER.model_for("question_generation"), 0.3, messages, generate
+        ))
         questions = []
         
-        for question_block in response.split('---'):
-            if not question_block.strip():
-                continue
-            
-            lines = question_block.strip().split('\n')
-            q_dict = {}
-            for line in lines:
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    q_dict[key.strip()] = value.strip()
-            
+        for item in response.questions:
             # Only add questions that are based on actual criteria
-            if 'Question' in q_dict and 'Criterion' in q_dict:
-                # Verify the criterion exists in original text (allowing for minor variations)
-                criterion_text = q_dict['Criterion'].lower()
-                if any(criterion_text in criteria.lower() or 
-                      any(word in criteria.lower() for word in criterion_text.split() if len(word) > 4)):
-                    questions.append(EligibilityQuestion(
-                        question=q_dict['Question'],
-                        criterion=q_dict['Criterion'],
-                        is_actionable=q_dict.get('Actionable', 'yes').lower() == 'yes'
-                    ))
+            # Verify the criterion exists in original text (allowing for minor variations)
+            criterion_text = item.criterion.lower()
+            if (criterion_text in criteria.lower() or
+                    any(word in criteria.lower() for word in criterion_text.split() if len(word) > 4)):
+                questions.append(EligibilityQuestion(
+                    question=item.question,
+                    criterion=item.criterion,
+                    is_actionable=item.actionable
+                ))
         
         if not questions:
             raise ValueError("Could not generate valid questions from the eligibility criteria")
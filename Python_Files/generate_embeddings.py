@@ -92,9 +92,9 @@ def main(input_dir, output_dir):
         # Save results with timestamp
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         
-        # Save embeddings
+        # Save embeddings; the API returns float32 precision, so float64 would only double the size
         embeddings_file = os.path.join(output_dir, f"embeddings_{timestamp}.npy")
-        np.save(embeddings_file, np.array(embeddings))
+        np.save(embeddings_file, np.array(embeddings, dtype=np.float32))
         
         # Save metadata
         metadata_file = os.path.join(output_dir, f"metadata_{timestamp}.json")
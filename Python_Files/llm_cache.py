@@ -0,0 +1,164 @@
+from typing import Any, Awaitable, Callable, List, Optional
+from collections import OrderedDict
+from contextvars import ContextVar
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from Python_Files.metrics import record_cache_lookup
+
+DEFAULT_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join("cache", "llm_results.sqlite3"))
+MEMORY_ENTRIES = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "2048"))
+DISK_ENTRIES = int(os.getenv("LLM_CACHE_DISK_ENTRIES", "100000"))
+
+# Share of the disk entries dropped when it overflows, so eviction isn't run on every insert
+EVICT_FRACTION = 0.1
+
+# Models that answered the routed calls made by the compute() currently running, if any
+_answering_models: ContextVar[Optional[List[str]]] = ContextVar("llm_cache_answering_models", default=None)
+
+def note_answering_model(model: str) -> None:
+    """Record the model that answered an LLM call; called by the model router."""
+    models = _answering_models.get()
+    if models is not None:
+        models.append(model)
+
+class LLMCache:
+    """Results of deterministic LLM calls keyed by (model, temperature, prompt hash).
+
+    Scheme-level work (criteria, scheme names, eligibility questions) depends
+    only on the scheme text, so one user's result can be served to the next.
+    Entries live in a SQLite file bounded to disk_entries, dropping the least
+    recently used; an LRU dict of memory_entries sits in front of it. Values
+    must be JSON-serializable.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH, memory_entries: int = MEMORY_ENTRIES,
+                 disk_entries: int = DISK_ENTRIES):
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        self._memory: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_results (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    last_used REAL NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS llm_results_last_used ON llm_results (last_used)")
+            self._conn.commit()
+            self._disk_count = self._conn.execute("SELECT COUNT(*) FROM llm_results").fetchone()[0]
+
+    @staticmethod
+    def key(model: str, temperature: float, prompt: Any) -> str:
+        """Stable hash of a call; prompt is anything JSON-serializable (messages, tools, ...)."""
+        canonical = json.dumps({"model": model, "temperature": temperature, "prompt": prompt},
+                               sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, value: Any):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            row = self._conn.execute("SELECT value FROM llm_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            # Hits served from memory don't touch the row; recency on disk is only used for eviction
+            self._conn.execute("UPDATE llm_results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            value = json.loads(row[0])
+            self._remember(key, value)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond the size bounds."""
+        encoded = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, value)
+            existed = self._conn.execute("SELECT 1 FROM llm_results WHERE key = ?", (key,)).fetchone() is not None
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_results (key, value, last_used) VALUES (?, ?, ?)",
+                (key, encoded, time.time())
+            )
+            if not existed:
+                self._disk_count += 1
+            if self._disk_count > self.disk_entries:
+                evict = self._disk_count - self.disk_entries + int(self.disk_entries * EVICT_FRACTION)
+                self._conn.execute(
+                    "DELETE FROM llm_results WHERE key IN "
+                    "(SELECT key FROM llm_results ORDER BY last_used LIMIT ?)",
+                    (evict,)
+                )
+                self._disk_count = self._conn.execute("SELECT COUNT(*) FROM llm_results").fetchone()[0]
+            self._conn.commit()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache() -> LLMCache:
+    """Process-wide LLM result cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+def cached_llm_call(name: str, model: str, temperature: float, prompt: Any, compute: Callable[[], Any]) -> Any:
+    """compute()'s result for this (model, temperature, prompt), from the cache when present.
+
+    compute should raise rather than return a fallback, so failures aren't cached.
+    A result that another model answered (the router fell back to another tier)
+    is returned but not cached, since the key names model. name labels the
+    lookup in the cache metrics.
+    """
+    cache = get_llm_cache()
+    key = LLMCache.key(model, temperature, prompt)
+    value = cache.get(key)
+    record_cache_lookup(name, int(value is not None), int(value is None))
+    if value is None:
+        models = []
+        token = _answering_models.set(models)
+        try:
+            value = compute()
+        finally:
+            _answering_models.reset(token)
+        if all(answered == model for answered in models):
+            cache.set(key, value)
+    return value
+
+async def cached_llm_call_async(name: str, model: str, temperature: float, prompt: Any,
+                                compute: Callable[[], Awaitable[Any]]) -> Any:
+    """cached_llm_call() for a coroutine function compute; the SQLite reads and writes run on a worker thread."""
+    cache = get_llm_cache()
+    key = LLMCache.key(model, temperature, prompt)
+    value = await asyncio.to_thread(cache.get, key)
+    record_cache_lookup(name, int(value is not None), int(value is None))
+    if value is None:
+        models = []
+        token = _answering_models.set(models)
+        try:
+            value = await compute()
+        finally:
+            _answering_models.reset(token)
+        if all(answered == model for answered in models):
+            await asyncio.to_thread(cache.set, key, value)
+    return value
@@ -0,0 +1,225 @@
+"""In-process vector index that scores on an int8 or float16 copy and reranks at float32."""
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import numpy as np
+from Python_Files.retrieval_results import top_k_indices
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Candidates rescored at full precision per requested result
+DEFAULT_RERANK_FACTOR = 4
+
+# Rows converted to float32 at a time when scoring quantized codes; small enough for the
+# temporary to stay in cache, which makes int8 scoring about as fast as float32
+SCORE_BLOCK_ROWS = 256
+
+# Queries scored together by search_many; the score matrix is rows x this many float32s
+SEARCH_BLOCK_QUERIES = 32
+
+VECTORS_FILE = "vectors.npy"
+RECORDS_FILE = "records.json"
+
+def normalize_rows(embeddings) -> np.ndarray:
+    """float32 copy of embeddings with every row scaled to unit length, for cosine search."""
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    if vectors.ndim != 2:
+        raise ValueError(f"Expected a 2-D array of embeddings, got shape {vectors.shape}")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """int8 codes with per-dimension scale and offset: vector ~= (code + 128) * scale + offset."""
+    offset = vectors.min(axis=0).astype(np.float32)
+    scale = ((vectors.max(axis=0) - offset) / 255).astype(np.float32)
+    scale[scale == 0] = 1.0
+    codes = np.empty(vectors.shape, dtype=np.int8)
+    for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + SCORE_BLOCK_ROWS], dtype=np.float32)
+        codes[start:start + SCORE_BLOCK_ROWS] = np.clip(np.rint((block - offset) / scale) - 128, -128, 127)
+    return codes, scale, offset
+
+def _codes_file(precision: str) -> str:
+    return f"codes_{precision}.npz"
+
+class LocalIndex:
+    """Cosine search over unit vectors, scored on a float32, float16 or int8 copy."""
+
+    def __init__(self, vectors: np.ndarray, records: List[Dict[str, Any]], precision: str = "float32",
+                 rerank_factor: int = DEFAULT_RERANK_FACTOR, codes: Optional[Dict[str, np.ndarray]] = None):
+        """vectors must already be unit float32 rows (see normalize_rows); they may be memory-mapped.
+
+        codes are previously computed quantized arrays for precision, as written by save().
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}; expected one of {PRECISIONS}")
+        if len(vectors) != len(records):
+            raise ValueError(f"{len(vectors)} vectors but {len(records)} records")
+        self.vectors = vectors
+        self.records = records
+        self.precision = precision
+        self.rerank_factor = rerank_factor
+        self.scale = self.offset = None
+
+        if precision == "float32":
+            self.codes = vectors
+        elif codes is not None:
+            self.codes = codes["codes"]
+            self.scale = codes.get("scale")
+            self.offset = codes.get("offset")
+        elif precision == "float16":
+            self.codes = np.asarray(vectors, dtype=np.float16)
+        else:
+            self.codes, self.scale, self.offset = quantize_int8(vectors)
+
+    @classmethod
+    def build(cls, embeddings, records: List[Dict[str, Any]], precision: str = "float32",
+              rerank_factor: int = DEFAULT_RERANK_FACTOR) -> "LocalIndex":
+        """Index of raw embeddings (any float dtype), normalized here."""
+        return cls(normalize_rows(embeddings), records, precision, rerank_factor)
+
+    @classmethod
+    def load(cls, directory: str, precision: str = "float32", rerank_factor: int = DEFAULT_RERANK_FACTOR,
+             mmap: bool = True) -> "LocalIndex":
+        """Index saved by save(); with mmap the float32 vectors stay on disk."""
+        vectors, records, codes = cls._read_files(directory, precision, mmap)
+        return cls(vectors, records, precision, rerank_factor, codes)
+
+    @staticmethod
+    def _read_files(directory: str, precision: str, mmap: bool):
+        """(vectors, records, codes or None) as written by save()."""
+        vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode='r' if mmap else None)
+        with open(os.path.join(directory, RECORDS_FILE), 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        codes = None
+        codes_path = os.path.join(directory, _codes_file(precision))
+        if precision != "float32" and os.path.exists(codes_path):
+            with np.load(codes_path) as saved:
+                codes = {name: saved[name] for name in saved.files}
+        return vectors, records, codes
+
+    def save(self, directory: str):
+        """Write the float32 vectors, the records and this precision's codes to directory."""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, VECTORS_FILE), np.asarray(self.vectors, dtype=np.float32))
+        with open(os.path.join(directory, RECORDS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(self.records, f, ensure_ascii=False)
+        if self.precision == "float16":
+            np.savez(os.path.join(directory, _codes_file(self.precision)), codes=self.codes)
+        elif self.precision == "int8":
+            np.savez(os.path.join(directory, _codes_file(self.precision)),
+                     codes=self.codes, scale=self.scale, offset=self.offset)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held in memory for scoring: the codes, plus the float32 vectors unless memory-mapped."""
+        total = self.codes.nbytes + sum(a.nbytes for a in (self.scale, self.offset) if a is not None)
+        if self.codes is not self.vectors and not isinstance(self.vectors, np.memmap):
+            total += self.vectors.nbytes
+        return total
+
+    def _unit_query(self, vector) -> np.ndarray:
+        query = np.asarray(vector, dtype=np.float32)
+        return query / (np.linalg.norm(query) or 1.0)
+
+    def approximate_scores(self, query: np.ndarray, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Cosine scores of rows start:stop (all rows by default) on the stored precision.
+
+        query is a unit vector, or a (dim, m) matrix of m unit queries for a (rows, m) result.
+        """
+        stop = len(self.codes) if stop is None else stop
+        if self.precision == "float32":
+            return np.asarray(self.codes[start:stop] @ query)
+        if self.precision == "int8":
+            # (code + 128) * scale + offset, dotted with the query
+            weights = query * (self.scale if query.ndim == 1 else self.scale[:, None])
+            bias = (128 * self.scale + self.offset) @ query
+        else:
+            weights, bias = query, 0.0
+        scores = np.empty((max(stop - start, 0),) + query.shape[1:], dtype=np.float32)
+        for block_start in range(start, stop, SCORE_BLOCK_ROWS):
+            block_stop = min(block_start + SCORE_BLOCK_ROWS, stop)
+            block = self.codes[block_start:block_stop].astype(np.float32)
+            scores[block_start - start:block_stop - start] = block @ weights
+        return scores + bias
+
+    def search(self, vector, top_k: int = 10, rerank: bool = True,
+               allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(row indices, scores) of the top_k rows, best first.
+
+        Quantized indexes rescore their best top_k * rerank_factor candidates at
+        full precision unless rerank is False. allowed, a boolean per row,
+        restricts the search to the rows where it is True.
+        """
+        if not len(self) or top_k <= 0:
+            return empty_results()
+        query = self._unit_query(vector)
+        rows = None if allowed is None else np.flatnonzero(allowed)
+        scores = self.approximate_scores(query)
+        return self._select(query, scores if rows is None else scores[rows], top_k, rerank, rows)
+
+    def search_many(self, vectors, top_k: int = 10, rerank: bool = True,
+                    allowed: Optional[np.ndarray] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """search() for every query vector, scoring each block of queries in one matrix product."""
+        if not len(vectors):
+            return []
+        queries = normalize_rows(vectors)
+        if not len(self) or top_k <= 0:
+            return [empty_results() for _ in queries]
+        rows = None if allowed is None else np.flatnonzero(allowed)
+        results = []
+        for start in range(0, len(queries), SEARCH_BLOCK_QUERIES):
+            block = queries[start:start + SEARCH_BLOCK_QUERIES]
+            scores = self.approximate_scores(block.T)
+            if rows is not None:
+                scores = scores[rows]
+            results.extend(self._select(query, scores[:, j], top_k, rerank, rows) for j, query in enumerate(block))
+        return results
+
+    def _select(self, query: np.ndarray, scores: np.ndarray, top_k: int, rerank: bool,
+                rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Best top_k of the scored rows (every row when rows is None), reranked when quantized.
+
+        rows must be ascending, so reranking reads the float32 vectors in order.
+        """
+        if self.precision == "float32" or not rerank:
+            top = top_k_indices(scores, top_k)
+            return (top if rows is None else rows[top]), scores[top]
+        candidates = np.sort(top_k_indices(scores, top_k * self.rerank_factor))
+        if rows is not None:
+            candidates = rows[candidates]
+        exact = np.asarray(self.vectors[candidates], dtype=np.float32) @ query
+        best = top_k_indices(exact, top_k)
+        return candidates[best], exact[best]
+
+    def matches(self, vector, top_k: int = 10, include_metadata: bool = False,
+                allowed: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """Pinecone-shaped match dicts (id, score, metadata) for a query vector."""
+        top, scores = self.search(vector, top_k, allowed=allowed)
+        return match_dicts(self.records, top, scores, include_metadata)
+
+    def matches_many(self, vectors, top_k: int = 10, include_metadata: bool = False,
+                     allowed: Optional[np.ndarray] = None) -> List[List[Dict[str, Any]]]:
+        """matches() for every query vector, searched together with search_many."""
+        return [match_dicts(self.records, top, scores, include_metadata)
+                for top, scores in self.search_many(vectors, top_k, allowed=allowed)]
+
+def empty_results() -> Tuple[np.ndarray, np.ndarray]:
+    """(row indices, scores) of a search that found nothing."""
+    return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+def match_dicts(records: List[Dict[str, Any]], rows: np.ndarray, scores: np.ndarray,
+                include_metadata: bool = False) -> List[Dict[str, Any]]:
+    """Pinecone-shaped match dicts (id, score, metadata) for search results over records."""
+    return [
+        {
+            "id": records[i]["chunk_id"],
+            "score": float(score),
+            "metadata": dict(records[i]) if include_metadata else None
+        }
+        for i, score in zip(rows.tolist(), scores.tolist())
+    ]
@@ -0,0 +1,230 @@
+"""In-process counters, gauges and histograms in the Prometheus text exposition format."""
+from typing import Dict, List, Sequence, Tuple
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import bisect
+import threading
+from Python_Files.tracing import Span, add_span_listener
+
+# Seconds; LLM calls routinely take several seconds, so the range extends past the usual 10s
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: Dict[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in (extra or {}).items())
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Sample lines of this metric, without the HELP and TYPE header."""
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Named metrics of one process; registering an existing name returns the existing metric."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, documentation: str, labelnames: Sequence[str] = (), **kwargs) -> _Metric:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.counter("rightscheme_requests_total", "Requests handled, by entry point.", ["name"])
+REQUEST_ERRORS = REGISTRY.counter("rightscheme_request_errors_total", "Requests that raised, by entry point.", ["name"])
+REQUEST_LATENCY = REGISTRY.histogram("rightscheme_request_duration_seconds", "End-to-end request latency, by entry point.", ["name"])
+IN_FLIGHT = REGISTRY.gauge("rightscheme_requests_in_flight", "Requests currently being handled, by entry point.", ["name"])
+
+STAGE_LATENCY = REGISTRY.histogram("rightscheme_stage_duration_seconds", "Latency of each traced stage.", ["stage"])
+EXTERNAL_LATENCY = REGISTRY.histogram(
+    "rightscheme_external_call_duration_seconds", "Latency of calls to external services.", ["provider", "operation"]
+)
+EXTERNAL_ERRORS = REGISTRY.counter(
+    "rightscheme_external_call_errors_total", "Failed calls to external services.", ["provider", "operation"]
+)
+ERRORS = REGISTRY.counter("rightscheme_errors_total", "Errors logged by the application, by component.", ["component"])
+
+CACHE_LOOKUPS = REGISTRY.counter("rightscheme_cache_lookups_total", "Cache lookups by cache and result (hit or miss).", ["cache", "result"])
+
+def record_cache_lookup(cache: str, hits: int, misses: int):
+    """Count a (possibly batched) cache lookup."""
+    if hits:
+        CACHE_LOOKUPS.inc(hits, cache=cache, result="hit")
+    if misses:
+        CACHE_LOOKUPS.inc(misses, cache=cache, result="miss")
+
+CRITERIA_EXTRACTIONS = REGISTRY.counter(
+    "rightscheme_criteria_extractions_total", "Hard-criteria extractions by source (rules or llm).", ["source"]
+)
+
+LLM_CALLS = REGISTRY.counter("rightscheme_llm_calls_total", "LLM calls by task, model tier and outcome.", ["task", "tier", "outcome"])
+LLM_LATENCY = REGISTRY.histogram("rightscheme_llm_call_duration_seconds", "LLM call latency by model tier and model.", ["tier", "model"])
+LLM_TOKENS = REGISTRY.counter("rightscheme_llm_tokens_total", "LLM tokens by model tier and kind (prompt or completion).", ["tier", "kind"])
+LLM_COST = REGISTRY.counter("rightscheme_llm_cost_usd_total", "Estimated LLM spend in USD by task and model tier.", ["task", "tier"])
+LLM_FALLBACKS = REGISTRY.counter(
+    "rightscheme_llm_fallbacks_total", "Calls moved to a fallback model tier, by reason (load or timeout).", ["task", "from_tier", "to_tier", "reason"]
+)
+
+def record_llm_call(task: str, tier: str, model: str, seconds: float, outcome: str = "ok",
+                    prompt_tokens: int = 0, completion_tokens: int = 0, cost_usd: float = 0.0):
+    """Count one routed LLM call with its latency, token usage and estimated cost."""
+    LLM_CALLS.inc(task=task, tier=tier, outcome=outcome)
+    LLM_LATENCY.observe(seconds, tier=tier, model=model)
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, tier=tier, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, tier=tier, kind="completion")
+    if cost_usd:
+        LLM_COST.inc(cost_usd, task=task, tier=tier)
+
+def _on_span_start(span_obj: Span):
+    if span_obj.stage == "request":
+        IN_FLIGHT.inc(name=span_obj.name)
+
+def _on_span_finish(span_obj: Span):
+    seconds = span_obj.duration_ms / 1000
+    failed = "error" in span_obj.attributes
+    STAGE_LATENCY.observe(seconds, stage=span_obj.stage)
+
+    if span_obj.stage == "request":
+        IN_FLIGHT.dec(name=span_obj.name)
+        REQUESTS.inc(name=span_obj.name)
+        REQUEST_LATENCY.observe(seconds, name=span_obj.name)
+        if failed:
+            REQUEST_ERRORS.inc(name=span_obj.name)
+
+    provider = span_obj.attributes.get("provider")
+    if provider:
+        operation = span_obj.attributes.get("operation", span_obj.stage)
+        EXTERNAL_LATENCY.observe(seconds, provider=provider, operation=operation)
+        if failed:
+            EXTERNAL_ERRORS.inc(provider=provider, operation=operation)
+
+add_span_listener(on_start=_on_span_start, on_finish=_on_span_finish)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would otherwise be printed to the app's console
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port: int, host: str = "0.0.0.0"):
+    """Serve /metrics on a background thread; later calls return the running server."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        return _server
@@ -0,0 +1,240 @@
+"""Routes each LLM call to a model tier by task, with load and timeout fallbacks and per-tier cost metrics."""
+from typing import Any, Dict, List, Optional, Tuple
+from types import SimpleNamespace
+import copy
+import json
+import os
+import threading
+import time
+from langchain.callbacks.base import BaseCallbackHandler
+from Python_Files.metrics import LLM_FALLBACKS, record_llm_call
+from Python_Files.tracing import current_span
+from Python_Files.service_clients import get_chat_model
+from Python_Files.llm_cache import note_answering_model
+
+# Prices are USD per million tokens, for the cost estimate only
+DEFAULT_TIERS = {
+    "fast": {
+        "model": "gpt-4o-mini",
+        "timeout": 30.0,
+        "max_in_flight": 64,
+        "fallback": None,
+        "input_cost_per_1m": 0.15,
+        "output_cost_per_1m": 0.60,
+    },
+    "strong": {
+        "model": "gpt-4o",
+        "timeout": 45.0,
+        "max_in_flight": 16,
+        "fallback": "fast",
+        "input_cost_per_1m": 2.50,
+        "output_cost_per_1m": 10.00,
+    },
+}
+
+DEFAULT_TASKS = {
+    # Short extraction and classification prompts
+    "name_extraction": "fast",
+    "criteria_extraction": "fast",
+    "question_generation": "fast",
+    "eligibility_agent": "fast",
+    "memory_summarization": "fast",
+    # User-facing answers
+    "recommendation_analysis": "fast",
+    "chat_agent": "fast",
+    "rag_answer": "fast",
+    # Ranks and explains the final recommendations
+    "final_analysis": "strong",
+}
+
+DEFAULT_TIER = "fast"
+
+def _is_timeout(error: BaseException) -> bool:
+    # openai.APITimeoutError and httpx's timeouts don't share a base with the builtin
+    return isinstance(error, TimeoutError) or "Timeout" in type(error).__name__
+
+def _usage(response) -> Tuple[int, int]:
+    usage = getattr(response, "usage", None)
+    return (getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0)
+
+def load_config(path: str = None) -> Dict[str, Any]:
+    """Default tiers and tasks, overridden by the JSON file at path (default: MODEL_ROUTING_CONFIG)."""
+    config = {"tiers": copy.deepcopy(DEFAULT_TIERS), "tasks": dict(DEFAULT_TASKS), "default_tier": DEFAULT_TIER}
+    path = path or os.getenv("MODEL_ROUTING_CONFIG")
+    if not path:
+        return config
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Error loading model routing config {path}: {str(e)}")
+        return config
+    for name, tier in overrides.get("tiers", {}).items():
+        config["tiers"].setdefault(name, {}).update(tier)
+    config["tasks"].update(overrides.get("tasks", {}))
+    config["default_tier"] = overrides.get("default_tier", config["default_tier"])
+    return config
+
+class ModelRouter:
+    """Picks a model tier per task and records what each tier costs."""
+
+    def __init__(self, config: Dict[str, Any] = None):
+        config = config or load_config()
+        self.tiers: Dict[str, Dict[str, Any]] = config["tiers"]
+        self.tasks: Dict[str, str] = config["tasks"]
+        self.default_tier: str = config["default_tier"]
+        self._in_flight = {name: 0 for name in self.tiers}
+        self._lock = threading.Lock()
+
+    def tier_for(self, task: str) -> str:
+        """Configured tier of a task, ignoring load."""
+        tier = self.tasks.get(task, self.default_tier)
+        return tier if tier in self.tiers else self.default_tier
+
+    def model_for(self, task: str) -> str:
+        return self.tiers[self.tier_for(task)]["model"]
+
+    def select_tier(self, task: str) -> str:
+        """Tier for a call made now: the task's tier, or its fallbacks while it is at max_in_flight."""
+        tier = self.tier_for(task)
+        seen = {tier}
+        with self._lock:
+            while self._in_flight[tier] >= self.tiers[tier].get("max_in_flight", float("inf")):
+                fallback = self.tiers[tier].get("fallback")
+                if not fallback or fallback in seen or fallback not in self.tiers:
+                    break
+                LLM_FALLBACKS.inc(task=task, from_tier=tier, to_tier=fallback, reason="load")
+                tier = fallback
+                seen.add(fallback)
+        return tier
+
+    def _enter(self, tier: str):
+        with self._lock:
+            self._in_flight[tier] += 1
+
+    def _exit(self, tier: str):
+        with self._lock:
+            self._in_flight[tier] -= 1
+
+    def _timeout_fallback(self, task: str, tier: str, tried: List[str]) -> Optional[str]:
+        fallback = self.tiers[tier].get("fallback")
+        if not fallback or fallback in tried or fallback not in self.tiers:
+            return None
+        LLM_FALLBACKS.inc(task=task, from_tier=tier, to_tier=fallback, reason="timeout")
+        return fallback
+
+    def record(self, task: str, tier: str, seconds: float, outcome: str = "ok",
+               prompt_tokens: int = 0, completion_tokens: int = 0):
+        """Record one call's metrics and tag the current span with where it went."""
+        config = self.tiers[tier]
+        cost = (prompt_tokens * config.get("input_cost_per_1m", 0)
+                + completion_tokens * config.get("output_cost_per_1m", 0)) / 1_000_000
+        record_llm_call(task, tier, config["model"], seconds, outcome, prompt_tokens, completion_tokens, cost)
+        span_obj = current_span()
+        if span_obj is not None:
+            span_obj.set(task=task, tier=tier, model=config["model"])
+
+    def _after_error(self, task: str, tier: str, tried: List[str], seconds: float, error: Exception) -> Optional[str]:
+        """Record a failed call; returns the tier to retry on, or None if the error should propagate."""
+        timed_out = _is_timeout(error)
+        self.record(task, tier, seconds, "timeout" if timed_out else "error")
+        fallback = self._timeout_fallback(task, tier, tried) if timed_out else None
+        if fallback is not None:
+            tried.append(fallback)
+        return fallback
+
+    def _after_response(self, task: str, tier: str, seconds: float, response):
+        self.record(task, tier, seconds, "ok", *_usage(response))
+        note_answering_model(self.tiers[tier]["model"])
+        return response
+
+    def complete(self, client, task: str, **kwargs):
+        """client.chat.completions.create on the task's tier; a timed-out call is retried on the fallback tier."""
+        tier = self.select_tier(task)
+        tried = [tier]
+        while True:
+            config = self.tiers[tier]
+            self._enter(tier)
+            start = time.perf_counter()
+            try:
+                response = client.chat.completions.create(model=config["model"], timeout=config["timeout"], **kwargs)
+            except Exception as e:
+                fallback = self._after_error(task, tier, tried, time.perf_counter() - start, e)
+                if fallback is None:
+                    raise
+            else:
+                return self._after_response(task, tier, time.perf_counter() - start, response)
+            finally:
+                self._exit(tier)
+            tier = fallback
+
+    async def complete_async(self, client, task: str, **kwargs):
+        """complete() for an AsyncOpenAI-style client."""
+        tier = self.select_tier(task)
+        tried = [tier]
+        while True:
+            config = self.tiers[tier]
+            self._enter(tier)
+            start = time.perf_counter()
+            try:
+                response = await client.chat.completions.create(model=config["model"], timeout=config["timeout"], **kwargs)
+            except Exception as e:
+                fallback = self._after_error(task, tier, tried, time.perf_counter() - start, e)
+                if fallback is None:
+                    raise
+            else:
+                return self._after_response(task, tier, time.perf_counter() - start, response)
+            finally:
+                self._exit(tier)
+            tier = fallback
+
+    def client(self, client, task: str):
+        """client with chat.completions.create routed for task, for helpers that take a client."""
+        return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(
+            create=lambda **kwargs: self.complete(client, task, **kwargs)
+        )))
+
+    def chat_model(self, task: str, **kwargs):
+        """LangChain chat model on the task's tier (chosen now) that records its usage."""
+        tier = self.select_tier(task)
+        config = self.tiers[tier]
+        kwargs.setdefault("request_timeout", config["timeout"])
+        callbacks = list(kwargs.pop("callbacks", None) or [])
+        callbacks.append(RouterCallbackHandler(self, task, tier))
+        return get_chat_model(model=config["model"], callbacks=callbacks, **kwargs)
+
+class RouterCallbackHandler(BaseCallbackHandler):
+    """Records latency and token usage of a LangChain model's calls against its tier."""
+
+    def __init__(self, router: ModelRouter, task: str, tier: str):
+        self.router = router
+        self.task = task
+        self.tier = tier
+        self._starts = {}
+
+    def _start(self, run_id):
+        self.router._enter(self.tier)
+        self._starts[run_id] = time.perf_counter()
+
+    def _end(self, run_id, outcome: str, prompt_tokens: int = 0, completion_tokens: int = 0):
+        start = self._starts.pop(run_id, None)
+        if start is None:
+            return
+        self.router._exit(self.tier)
+        self.router.record(self.task, self.tier, time.perf_counter() - start, outcome, prompt_tokens, completion_tokens)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id, **kwargs: Any) -> None:
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs: Any) -> None:
+        # Streamed responses usually carry no usage
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        self._end(run_id, "ok", usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+
+    def on_llm_error(self, error: BaseException, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, "timeout" if _is_timeout(error) else "error")
+
+ROUTER = ModelRouter()
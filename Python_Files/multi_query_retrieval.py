@@ -0,0 +1,78 @@
+"""Vector search for several weighted queries at once.
+
+The matchers search with their own profile query plus the queries of
+``SchemeQueryBuilder``. Searched one at a time, each query would cost an
+embedding request and a vector query round trip. Here every query text is
+embedded in one request and searched with one ``query_many`` call. The
+per-query results are then merged by weighted reciprocal-rank fusion, each
+query weighted by its priority (``PRIORITY_WEIGHTS``):
+
+    queries = [WeightedQuery(profile_query, QueryPriority.HIGH)]
+    queries += SchemeQueryBuilder().build_weighted_queries(builder_profile(user_profile), needs)
+    results = retrieve(index, openai_client, queries, top_k=20)
+
+A chunk several queries agree on ranks above one that a single query ranks
+equally high. Chunks only one query finds still make the list.
+"""
+from typing import List, Sequence
+import asyncio
+import numpy as np
+from Python_Files.tracing import span
+from Python_Files.service_clients import query_many
+from Python_Files.query_builder import PRIORITY_WEIGHTS, WeightedQuery
+from Python_Files.retrieval_results import ResultBatch, reciprocal_rank_fusion
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+def unique_queries(queries: Sequence[WeightedQuery]) -> List[WeightedQuery]:
+    """The first query of each text, ignoring case and whitespace; blank queries are dropped."""
+    seen = set()
+    unique = []
+    for query in queries:
+        key = " ".join(query.text.lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(query)
+    return unique
+
+def _embedding_rows(response) -> np.ndarray:
+    # Rows come back tagged with their input position
+    data = sorted(response.data, key=lambda item: item.index)
+    return np.array([item.embedding for item in data], dtype='float32')
+
+def embed_queries(client, queries: Sequence[WeightedQuery]) -> np.ndarray:
+    """One embedding row per query, from a single embeddings request."""
+    with span("embed_queries", stage="embedding", provider="openai", operation="embeddings", queries=len(queries)):
+        response = client.embeddings.create(input=[query.text for query in queries], model=EMBEDDING_MODEL)
+    return _embedding_rows(response)
+
+async def embed_queries_async(client, queries: Sequence[WeightedQuery]) -> np.ndarray:
+    """embed_queries with an AsyncOpenAI-shaped client."""
+    with span("embed_queries", stage="embedding", provider="openai", operation="embeddings", queries=len(queries)):
+        response = await client.embeddings.create(input=[query.text for query in queries], model=EMBEDDING_MODEL)
+    return _embedding_rows(response)
+
+def search_fused(index, embeddings: np.ndarray, queries: Sequence[WeightedQuery], top_k: int) -> ResultBatch:
+    """top_k results of each query, searched in one batch and fused into at most top_k results."""
+    with span("pinecone.query", stage="vector_query", provider="pinecone", operation="query", queries=len(queries)):
+        responses = query_many(index, embeddings, top_k=top_k, include_metadata=True)
+    return reciprocal_rank_fusion(
+        [ResultBatch.from_matches(response.matches) for response in responses],
+        [PRIORITY_WEIGHTS[query.priority] for query in queries],
+        limit=top_k
+    )
+
+def retrieve(index, client, queries: Sequence[WeightedQuery], top_k: int) -> ResultBatch:
+    """Fused results of the queries: one embeddings request and one batched search."""
+    queries = unique_queries(queries)
+    if not queries:
+        return ResultBatch.empty()
+    return search_fused(index, embed_queries(client, queries), queries, top_k)
+
+async def retrieve_async(index, client, queries: Sequence[WeightedQuery], top_k: int) -> ResultBatch:
+    """retrieve() with an async OpenAI client; the search runs on a worker thread."""
+    queries = unique_queries(queries)
+    if not queries:
+        return ResultBatch.empty()
+    embeddings = await embed_queries_async(client, queries)
+    return await asyncio.to_thread(search_fused, index, embeddings, queries, top_k)
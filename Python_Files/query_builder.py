@@ -8,12 +8,35 @@ class QueryPriority(Enum):
     MEDIUM = "medium"
     LOW = "low"
 
+# Weight of each priority's results when search results are fused
+PRIORITY_WEIGHTS = {
+    QueryPriority.HIGH: 1.0,
+    QueryPriority.MEDIUM: 0.5,
+    QueryPriority.LOW: 0.25
+}
+
 @dataclass
 class QueryComponent:
     text: str
     priority: QueryPriority
     context_type: str  # demographic, occupation, financial, needs, etc.
 
+@dataclass
+class WeightedQuery:
+    text: str
+    priority: QueryPriority
+
+def builder_profile(user_profile: Any) -> Dict[str, Any]:
+    """The profile dict the builder reads, from a matcher's UserProfile (age, gender, category, occupation)."""
+    return {
+        "basic_info": {
+            "age": user_profile.age,
+            "gender": user_profile.gender,
+            "category": user_profile.category
+        },
+        "occupation_details": {"type": user_profile.occupation}
+    }
+
 class SchemeQueryBuilder:
     def __init__(self):
         self.occupation_keywords = {
@@ -85,6 +108,12 @@ class SchemeQueryBuilder:
                            user_profile: Dict[str, Any], 
                            open_search_text: str = None) -> List[str]:
         """Build optimized search queries for vector database."""
+        return [query.text for query in self.build_weighted_queries(user_profile, open_search_text)]
+    
+    def build_weighted_queries(self, 
+                             user_profile: Dict[str, Any], 
+                             open_search_text: str = None) -> List[WeightedQuery]:
+        """The search queries with their priorities, most important first; blank queries are dropped."""
         components = self.extract_key_components(user_profile)
         queries = []
         
@@ -93,16 +122,16 @@ class SchemeQueryBuilder:
             c.text for c in components 
             if c.priority == QueryPriority.HIGH
         ])
-        queries.append(high_priority)
+        queries.append(WeightedQuery(high_priority, QueryPriority.HIGH))
         
         # Add open search text if provided
         if open_search_text:
             # Clean and normalize open search text
             cleaned_text = self.clean_search_text(open_search_text)
-            queries.append(f"{high_priority} {cleaned_text}")
+            queries.append(WeightedQuery(f"{high_priority} {cleaned_text}", QueryPriority.HIGH))
             
             # Create focused query from open search
-            queries.append(f"schemes for {cleaned_text}")
+            queries.append(WeightedQuery(f"schemes for {cleaned_text}", QueryPriority.MEDIUM))
         
         # Add context-specific variations
         occupation_components = [
@@ -111,9 +140,17 @@ class SchemeQueryBuilder:
         ]
         if occupation_components:
             occ_query = " ".join([c.text for c in occupation_components])
-            queries.append(f"government schemes for {occ_query}")
+            queries.append(WeightedQuery(f"government schemes for {occ_query}", QueryPriority.MEDIUM))
         
-        return self.deduplicate_queries(queries)
+        # Deduplicate as deduplicate_queries does, keeping each query's priority
+        weighted = []
+        seen_patterns = set()
+        for query in queries:
+            text = " ".join(query.text.split())
+            if text and text.lower() not in seen_patterns:
+                seen_patterns.add(text.lower())
+                weighted.append(WeightedQuery(text, query.priority))
+        return weighted
     
     def clean_search_text(self, text: str) -> str:
         """Clean and normalize search text."""
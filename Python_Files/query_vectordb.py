@@ -1,39 +1,38 @@
 import numpy as np
 import json
 import os
-from openai import OpenAI
-from pinecone import Pinecone
+from typing import Iterator
 from dotenv import load_dotenv
 from datetime import datetime
 from langchain.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
 from langchain.chains import LLMChain
-from langchain.memory import ConversationSummaryMemory
 from langchain.schema import SystemMessage
 
+from Python_Files.conversation_memory import BackgroundSummaryMemory
+from Python_Files.tracing import span, traced, record_error
+from Python_Files.service_clients import LOCAL_INDEX_DIR, get_local_index, get_openai_client, get_pinecone_index
+from Python_Files.model_router import ROUTER
+
 # Load environment variables and initialize clients
 load_dotenv()
-client = OpenAI()
+client = get_openai_client()
 
 class VectorDBQuerier:
     def __init__(self):
-        """Initialize the querier with Pinecone."""
+        """Initialize the querier with Pinecone, or the local index in LOCAL_INDEX_DIR if set."""
         try:
-            # Initialize Pinecone
-            pc = Pinecone(api_key=os.getenv('PINECONE_API_KEY'))
-            self.index = pc.Index(os.getenv('PINECONE_INDEX_NAME'))
+            # Initialize the vector index
+            self.index = get_local_index() if LOCAL_INDEX_DIR else get_pinecone_index()
             
             # Initialize LangChain components
-            self.llm = ChatOpenAI(
-                temperature=0.7,
-                model_name="gpt-3.5-turbo"
-            )
+            self.llm = ROUTER.chat_model("rag_answer", temperature=0.7)
             
-            # Initialize memory
-            self.memory = ConversationSummaryMemory(
-                llm=self.llm,
+            # Initialize memory (older turns are summarized in the background)
+            self.memory = BackgroundSummaryMemory(
+                llm=ROUTER.chat_model("memory_summarization", temperature=0),
                 memory_key="chat_history",
-                return_messages=True
+                return_messages=True,
+                max_token_limit=2000
             )
             
             # Create prompt template
@@ -73,6 +72,7 @@ Answer: Let me help you with information about Indian Government Schemes."""
             print(f"Error initializing VectorDBQuerier: {str(e)}")
             raise
     
+    @traced("embedding", provider="openai", operation="embeddings")
     def generate_embedding(self, text):
         """Generate embedding for query text."""
         try:
@@ -83,6 +83,7 @@ Answer: Let me help you with information about Indian Government Schemes."""
             return np.array(response.data[0].embedding, dtype='float32')
         except Exception as e:
             print(f"Error generating embedding: {str(e)}")
+            record_error(e)
             return None
     
     def search(self, query_text, top_k=5):
@@ -94,11 +95,12 @@ Answer: Let me help you with information about Indian Government Schemes."""
                 return []
             
             # Search Pinecone
-            results = self.index.query(
-                vector=query_embedding.tolist(),
-                top_k=top_k,
-                include_metadata=True
-            )
+            with span("pinecone.query", stage="vector_query", provider="pinecone", operation="query"):
+                results = self.index.query(
+                    vector=query_embedding.tolist(),
+                    top_k=top_k,
+                    include_metadata=True
+                )
             
             # Format results
             formatted_results = []
@@ -118,17 +120,32 @@ Answer: Let me help you with information about Indian Government Schemes."""
             print(f"Error during search: {str(e)}")
             return []
     
+    def _format_context(self, search_results: list) -> str:
+        """Format search results into the context block of the prompt."""
+        context_parts = []
+        for result in search_results:
+            context_parts.append(
+                f"Document (from {result['source_file']}):\n{result['text']}\n"
+                f"Relevance Score: {result['score']:.4f}\n"
+            )
+        return "\n\n".join(context_parts)
+    
+    def format_sources(self, search_results: list) -> list:
+        """Format search results as the sources returned alongside a response."""
+        return [
+            {
+                "file": r['source_file'],
+                "relevance": r['score'],
+                "text": r['text'][:200] + "..."
+            }
+            for r in search_results
+        ]
+    
     def process_with_llm(self, query: str, search_results: list) -> dict:
         """Process search results with LangChain LLM to generate a response."""
         try:
             # Format context from search results
-            context_parts = []
-            for result in search_results:
-                context_parts.append(
-                    f"Document (from {result['source_file']}):\n{result['text']}\n"
-                    f"Relevance Score: {result['score']:.4f}\n"
-                )
-            context = "\n\n".join(context_parts)
+            context = self._format_context(search_results)
             
             # Get chat history
             memory_vars = self.memory.load_memory_variables({})
@@ -136,11 +153,12 @@ Answer: Let me help you with information about Indian Government Schemes."""
             
             try:
                 # Generate response using LangChain
-                response = self.chain({
-                    "chat_history": str(chat_history),
-                    "context": context,
-                    "question": query
-                })["text"]
+                with span("chain", stage="llm", provider="openai", operation="chat"):
+                    response = self.chain({
+                        "chat_history": str(chat_history),
+                        "context": context,
+                        "question": query
+                    })["text"]
                 
                 # Save interaction to memory
                 self.memory.save_context(
@@ -150,14 +168,7 @@ Answer: Let me help you with information about Indian Government Schemes."""
                 
                 return {
                     "ai_response": response,
-                    "sources": [
-                        {
-                            "file": r['source_file'],
-                            "relevance": r['score'],
-                            "text": r['text'][:200] + "..."
-                        }
-                        for r in search_results
-                    ],
+                    "sources": self.format_sources(search_results),
                     "chat_history": str(chat_history)
                 }
                 
@@ -173,6 +184,39 @@ Answer: Let me help you with information about Indian Government Schemes."""
                 "chat_history": ""
             }
     
+    def stream_with_llm(self, query: str, search_results: list) -> Iterator[str]:
+        """Stream the LLM response for a query token by token.
+        
+        The interaction is saved to memory once the full response has been generated.
+        """
+        try:
+            memory_vars = self.memory.load_memory_variables({})
+            chat_history = memory_vars.get("chat_history", "No previous conversation.")
+            
+            prompt_text = self.prompt.format(
+                chat_history=str(chat_history),
+                context=self._format_context(search_results),
+                question=query
+            )
+            
+            response_parts = []
+            # Not made current: the caller resumes this generator between chunks
+            with span("llm.stream", stage="llm", activate=False, provider="openai", operation="chat"):
+                for chunk in self.llm.stream(prompt_text):
+                    if chunk.content:
+                        response_parts.append(chunk.content)
+                        yield chunk.content
+            
+            # Save interaction to memory
+            self.memory.save_context(
+                {"input": query},
+                {"output": "".join(response_parts)}
+            )
+            
+        except Exception as e:
+            print(f"Error streaming with LLM: {str(e)}")
+            yield "I encountered an error while processing your query."
+    
     def get_conversation_summary(self) -> str:
         """Get a summary of the conversation history."""
         try:
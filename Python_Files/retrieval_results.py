@@ -0,0 +1,212 @@
+"""Column-wise vector search results, turned into models or dicts only at the API boundary."""
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+import re
+import numpy as np
+
+T = TypeVar("T")
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Rank offset of reciprocal-rank fusion; 60 is the value from the original RRF paper
+RRF_K = 60
+
+# Raw characters read to build a fingerprint; texts whose normalized prefix is shorter use the whole text
+_FINGERPRINT_WINDOW = 400
+
+def text_fingerprint(text: str, length: int = 100) -> str:
+    """First length characters of the lowercased, whitespace-collapsed text.
+
+    Normalizes only a prefix of the text when that is enough; the result is the
+    same as normalizing the whole text.
+    """
+    window = max(_FINGERPRINT_WINDOW, 2 * length)
+    if len(text) > window:
+        # A normalized prefix is a prefix of the normalized text; the last character
+        # can differ (a cut whitespace run or casing context), so one more is needed
+        normalized = _WHITESPACE.sub(' ', text[:window].lower())
+        if len(normalized) > length:
+            return normalized[:length]
+    return _WHITESPACE.sub(' ', text.lower())[:length]
+
+def top_k_indices(scores, k: Optional[int] = None) -> np.ndarray:
+    """Positions of the k highest scores, highest first; all positions when k is None.
+
+    Equal scores keep their order, so this matches a stable descending sort cut
+    to k, but only the k selected scores are sorted: argpartition finds the k-th
+    highest score in linear time.
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    if k is None or k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+    above = np.flatnonzero(scores > threshold)
+    # Ties at the threshold fill the remaining places in their original order
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    chosen = np.sort(np.concatenate([above, ties]))
+    return chosen[np.argsort(-scores[chosen], kind="stable")]
+
+def rank(items: Sequence[T], scores: Sequence[float], k: Optional[int] = None) -> List[T]:
+    """items by descending score (equal scores keep their order), the first k when given."""
+    if not len(items):
+        return []
+    return [items[i] for i in top_k_indices(scores, k)]
+
+class RetrievedChunk:
+    """One search result; the text is read from the match's metadata when asked for."""
+
+    __slots__ = ("chunk_id", "score", "_metadata")
+
+    def __init__(self, chunk_id: str, score: float, metadata: Optional[Dict[str, Any]]):
+        self.chunk_id = chunk_id
+        self.score = score
+        self._metadata = metadata or {}
+
+    @property
+    def scheme_name(self) -> str:
+        return self._metadata.get("scheme_name", "Unknown Scheme")
+
+    @property
+    def source_file(self) -> str:
+        return self._metadata.get("source_file", "")
+
+    @property
+    def text(self) -> str:
+        return self._metadata.get("text", "")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Any other metadata field."""
+        return self._metadata.get(key, default)
+
+    def __repr__(self) -> str:
+        return f"RetrievedChunk(chunk_id={self.chunk_id!r}, score={self.score:.4f})"
+
+class ResultBatch:
+    """Search results as columns: chunk ids, scores and metadata references."""
+
+    __slots__ = ("chunk_ids", "scores", "_metadata")
+
+    def __init__(self, chunk_ids: np.ndarray, scores: np.ndarray, metadata: Sequence[Optional[Dict[str, Any]]]):
+        self.chunk_ids = chunk_ids
+        self.scores = scores
+        self._metadata = metadata
+
+    @classmethod
+    def empty(cls) -> "ResultBatch":
+        return cls(np.empty(0, dtype=object), np.empty(0, dtype=np.float64), [])
+
+    @classmethod
+    def from_matches(cls, matches: Iterable) -> "ResultBatch":
+        """Batch of Pinecone-style matches (objects with id, score and metadata)."""
+        matches = list(matches)
+        if not matches:
+            return cls.empty()
+        chunk_ids = np.empty(len(matches), dtype=object)
+        chunk_ids[:] = [match.id for match in matches]
+        scores = np.fromiter((match.score for match in matches), dtype=np.float64, count=len(matches))
+        return cls(chunk_ids, scores, [match.metadata for match in matches])
+
+    @classmethod
+    def concat(cls, batches: Sequence["ResultBatch"]) -> "ResultBatch":
+        """One batch holding the results of batches in order."""
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        metadata = []
+        for batch in batches:
+            metadata.extend(batch._metadata)
+        return cls(
+            np.concatenate([batch.chunk_ids for batch in batches]),
+            np.concatenate([batch.scores for batch in batches]),
+            metadata
+        )
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __iter__(self) -> Iterator[RetrievedChunk]:
+        for i in range(len(self.scores)):
+            yield self[i]
+
+    def __getitem__(self, i: int) -> RetrievedChunk:
+        return RetrievedChunk(self.chunk_ids[i], float(self.scores[i]), self._metadata[i])
+
+    def texts(self) -> List[str]:
+        return [(metadata or {}).get("text", "") for metadata in self._metadata]
+
+    def take(self, indices) -> "ResultBatch":
+        """Results at the given positions, in that order."""
+        indices = np.asarray(indices, dtype=np.intp)
+        return ResultBatch(self.chunk_ids[indices], self.scores[indices], [self._metadata[i] for i in indices])
+
+    def filter(self, keep: Callable[[str], bool]) -> "ResultBatch":
+        """Results whose text keep(text) accepts."""
+        return self.take([i for i, text in enumerate(self.texts()) if keep(text)])
+
+    def above(self, min_score: float) -> "ResultBatch":
+        """Results scoring at least min_score."""
+        return self.take(np.flatnonzero(self.scores >= min_score))
+
+    def deduplicate(self, key: Callable[[str], Hashable] = text_fingerprint) -> "ResultBatch":
+        """First result for each key of the text."""
+        seen = set()
+        keep = []
+        for i, text in enumerate(self.texts()):
+            fingerprint = key(text)
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                keep.append(i)
+        return self.take(keep)
+
+    def sorted(self) -> "ResultBatch":
+        """Results by descending score; equal scores keep their order."""
+        return self.take(top_k_indices(self.scores))
+
+    def top_k(self, k: int) -> "ResultBatch":
+        """The k highest-scoring results, highest first, without sorting the rest."""
+        return self.take(top_k_indices(self.scores, k))
+
+    def top(self, k: int) -> "ResultBatch":
+        """The first k results in their current order."""
+        return self.take(np.arange(min(k, len(self))))
+
+def reciprocal_rank_fusion(batches: Sequence[ResultBatch], weights: Optional[Sequence[float]] = None,
+                           k: int = RRF_K, limit: Optional[int] = None) -> ResultBatch:
+    """One batch ranking the results of several queries by weighted reciprocal-rank fusion.
+
+    A result's fused score is the sum, over the batches that contain it, of
+    weight / (k + rank), with rank counted from 1 by descending score. Results
+    come out by fused score (the first limit of them when given); equal fused
+    scores keep first-seen order. Each result keeps its highest similarity
+    score, so relevance thresholds still apply, and the metadata of its first
+    appearance.
+    """
+    weights = [1.0] * len(batches) if weights is None else weights
+    fused: Dict[Any, float] = {}
+    best: Dict[Any, float] = {}
+    first: Dict[Any, Tuple[ResultBatch, int]] = {}
+    for batch, weight in zip(batches, weights):
+        for position, i in enumerate(top_k_indices(batch.scores).tolist(), start=1):
+            chunk_id = batch.chunk_ids[i]
+            score = float(batch.scores[i])
+            if chunk_id in fused:
+                fused[chunk_id] += weight / (k + position)
+                best[chunk_id] = max(best[chunk_id], score)
+            else:
+                fused[chunk_id] = weight / (k + position)
+                best[chunk_id] = score
+                first[chunk_id] = (batch, i)
+    if not fused:
+        return ResultBatch.empty()
+    ids = list(fused)
+    order = top_k_indices([fused[chunk_id] for chunk_id in ids], limit).tolist()
+    chunk_ids = np.empty(len(order), dtype=object)
+    chunk_ids[:] = [ids[i] for i in order]
+    return ResultBatch(
+        chunk_ids,
+        np.array([best[ids[i]] for i in order], dtype=np.float64),
+        [first[ids[i]][0]._metadata[first[ids[i]][1]] for i in order]
+    )
@@ -1,24 +1,28 @@
-from typing import List, Dict, Any, Set
+from typing import List, Dict, Any, Set, Iterator
 from langchain.agents import Tool, AgentExecutor, create_openai_functions_agent
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.memory import ConversationSummaryMemory
 from langchain.tools import tool
+from langchain.callbacks.base import BaseCallbackHandler
 from pydantic import BaseModel, Field
 import numpy as np
-from openai import OpenAI
-from pinecone import Pinecone
 import json
 import os
 from dotenv import load_dotenv
 import streamlit as st
-import re
+import queue
+import threading
 from itertools import chain
 from langdetect import detect
+from Python_Files.conversation_memory import BackgroundSummaryMemory
+from Python_Files.tracing import span, traced, use_span, record_error
+from Python_Files.service_clients import get_openai_client, get_pinecone_index, query_many
+from Python_Files.model_router import ROUTER
+from Python_Files.retrieval_results import ResultBatch
+from streamlit.runtime.scriptrunner import add_script_run_ctx
 
 # Load environment variables
 load_dotenv()
-client = OpenAI(
+client = get_openai_client(
     api_key=os.getenv('OPENAI_API_KEY'),
     base_url="https://api.openai.com/v1"
 )
@@ -29,6 +33,24 @@ if "scheme_agent" not in st.session_state:
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
 
+# Terms marking a central scheme, available in every state
+CENTRAL_SCHEME_TERMS = (
+    "central scheme", 
+    "centrally sponsored", 
+    "nationwide",
+    "all states",
+    "pan india",
+    "government of india"
+)
+
+INDIAN_STATES = {"andhra pradesh", "arunachal pradesh", "assam", "bihar", 
+                 "chhattisgarh", "goa", "gujarat", "haryana", "himachal pradesh", 
+                 "jharkhand", "karnataka", "kerala", "madhya pradesh", 
+                 "maharashtra", "manipur", "meghalaya", "mizoram", "nagaland", 
+                 "odisha", "punjab", "rajasthan", "sikkim", "tamil nadu", 
+                 "telangana", "tripura", "uttar pradesh", "uttarakhand", 
+                 "west bengal"}
+
 class SchemeInfo(BaseModel):
     """Schema for scheme information"""
     scheme_name: str = Field(description="Name of the government scheme")
@@ -40,10 +62,9 @@ class SchemeTools:
     def __init__(self):
         """Initialize with Pinecone."""
         try:
-            pc = Pinecone(api_key=os.getenv('PINECONE_API_KEY'))
-            self.index = pc.Index(os.getenv('PINECONE_INDEX_NAME'))
+            self.index = get_pinecone_index()
             self.current_scheme = None
-            self.last_search_results = []
+            self.last_search_results = ResultBatch.empty()
             # Define minimum relevance score threshold
             self.MIN_RELEVANCE_SCORE = 0.7
             # Add state context
@@ -56,23 +77,16 @@ class SchemeTools:
         """Set the user's state for context-aware searching."""
         self.user_state = state
 
-    def is_scheme_applicable(self, scheme_info: SchemeInfo) -> bool:
-        """Check if a scheme is applicable based on state context."""
+    def is_text_applicable(self, details: str) -> bool:
+        """Check if a scheme text is applicable based on state context."""
         if not self.user_state:
             return True
             
-        scheme_details = scheme_info.details.lower()
+        scheme_details = details.lower()
         state_name = self.user_state.lower()
         
         # Always include central schemes
-        if any(term in scheme_details for term in [
-            "central scheme", 
-            "centrally sponsored", 
-            "nationwide",
-            "all states",
-            "pan india",
-            "government of india"
-        ]):
+        if any(term in scheme_details for term in CENTRAL_SCHEME_TERMS):
             return True
             
         # Include state-specific schemes
@@ -80,20 +94,13 @@ class SchemeTools:
             return True
             
         # Exclude schemes explicitly mentioning other states
-        indian_states = {"andhra pradesh", "arunachal pradesh", "assam", "bihar", 
-                        "chhattisgarh", "goa", "gujarat", "haryana", "himachal pradesh", 
-                        "jharkhand", "karnataka", "kerala", "madhya pradesh", 
-                        "maharashtra", "manipur", "meghalaya", "mizoram", "nagaland", 
-                        "odisha", "punjab", "rajasthan", "sikkim", "tamil nadu", 
-                        "telangana", "tripura", "uttar pradesh", "uttarakhand", 
-                        "west bengal"}
-        
-        for state in indian_states:
+        for state in INDIAN_STATES:
             if state != state_name and state in scheme_details:
                 return False
                 
         return True
 
+    @traced("embedding", provider="openai", operation="embeddings")
     def generate_embedding(self, text: str) -> np.ndarray:
         """Generate embedding for query text."""
         try:
@@ -104,6 +111,23 @@ class SchemeTools:
             return np.array(response.data[0].embedding, dtype='float32')
         except Exception as e:
             print(f"Error generating embedding: {str(e)}")
+            record_error(e)
+            return None
+
+    @traced("embedding", provider="openai", operation="embeddings")
+    def generate_embeddings(self, texts: List[str]) -> np.ndarray:
+        """Embed several query texts in one request; one row per text."""
+        try:
+            response = client.embeddings.create(
+                input=texts,
+                model="text-embedding-ada-002"
+            )
+            # Rows come back tagged with their input position
+            data = sorted(response.data, key=lambda item: item.index)
+            return np.array([item.embedding for item in data], dtype='float32')
+        except Exception as e:
+            print(f"Error generating embeddings: {str(e)}")
+            record_error(e)
             return None
 
     def generate_query_variations(self, query: str) -> List[str]:
@@ -136,22 +160,6 @@ class SchemeTools:
         # Remove duplicates while preserving order
         return list(dict.fromkeys(variations))
 
-    def deduplicate_results(self, results: List[SchemeInfo]) -> List[SchemeInfo]:
-        """Remove duplicate or very similar results."""
-        unique_results = []
-        seen_content = set()
-        
-        for result in results:
-            # Create a simplified content fingerprint
-            content_simple = re.sub(r'\s+', ' ', result.details.lower())
-            content_simple = content_simple[:100]  # Compare first 100 chars
-            
-            if content_simple not in seen_content:
-                seen_content.add(content_simple)
-                unique_results.append(result)
-        
-        return unique_results
-
     def search_scheme(self, query: str) -> List[SchemeInfo]:
         """Enhanced search with state-aware filtering."""
         try:
@@ -160,39 +168,42 @@ class SchemeTools:
                 self.set_user_state(st.session_state.user_state)
 
             query_variations = self.generate_query_variations(query)
-            all_results = []
+            # All variations are embedded in one request and searched in one batch
+            query_embeddings = self.generate_embeddings(query_variations)
+            if query_embeddings is None:
+                return []
             
-            for variation in query_variations:
-                query_embedding = self.generate_embedding(variation)
-                if query_embedding is None:
-                    continue
-                
-                results = self.index.query(
-                    vector=query_embedding.tolist(),
+            with span("pinecone.query", stage="vector_query", provider="pinecone", operation="query",
+                      queries=len(query_variations)):
+                responses = query_many(
+                    self.index,
+                    query_embeddings,
                     top_k=15,  # Increased to account for filtering
                     include_metadata=True
                 )
-                
-                for match in results.matches:
-                    if match.score >= self.MIN_RELEVANCE_SCORE:
-                        scheme_info = SchemeInfo(
-                            scheme_name=match.metadata.get("scheme_name", "Unknown Scheme"),
-                            details=match.metadata.get("text", ""),
-                            source_file=match.metadata.get("source_file", ""),
-                            relevance_score=float(match.score)
-                        )
-                        # Only add applicable schemes
-                        if self.is_scheme_applicable(scheme_info):
-                            all_results.append(scheme_info)
             
-            # Deduplicate and sort results
-            unique_results = self.deduplicate_results(all_results)
-            unique_results.sort(key=lambda x: x.relevance_score, reverse=True)
+            # Only keep relevant schemes applicable in the user's state
+            batches = [
+                ResultBatch.from_matches(results.matches)
+                .above(self.MIN_RELEVANCE_SCORE)
+                .filter(self.is_text_applicable)
+                for results in responses
+            ]
             
+            # Deduplicate, then select the top results without sorting the rest
+            unique_results = ResultBatch.concat(batches).deduplicate()
             self.last_search_results = unique_results
             
-            # Return top results
-            return unique_results[:5]
+            # Models are only built for the results returned
+            return [
+                SchemeInfo(
+                    scheme_name=chunk.scheme_name,
+                    details=chunk.text,
+                    source_file=chunk.source_file,
+                    relevance_score=chunk.score
+                )
+                for chunk in unique_results.top_k(5)
+            ]
             
         except Exception as e:
             print(f"Error during search: {str(e)}")
@@ -230,7 +241,7 @@ class SchemeTools:
         )
         return response
 
-class SelectiveConversationMemory(ConversationSummaryMemory):
+class SelectiveConversationMemory(BackgroundSummaryMemory):
     """A memory class that selectively retains important parts of conversations."""
     
     def _get_important_parts(self, text: str) -> bool:
@@ -292,12 +303,12 @@ def create_scheme_agent():
         )
     ]
 
-    # Initialize LLM
-    llm = ChatOpenAI(temperature=0.7, model="gpt-4o-mini")
+    # Initialize LLM (streaming so final-answer tokens reach callbacks as they arrive)
+    llm = ROUTER.chat_model("chat_agent", temperature=0.7, streaming=True)
 
     # Initialize SelectiveConversationMemory
     memory = SelectiveConversationMemory(
-        llm=llm,
+        llm=ROUTER.chat_model("memory_summarization", temperature=0),
         memory_key="chat_history",
         return_messages=True,
         max_token_limit=2000
@@ -409,16 +420,60 @@ def format_response(response: Dict[str, Any]) -> Dict[str, Any]:
         "conversation_summary": get_conversation_summary(st.session_state.scheme_agent)
     }
 
+def get_scheme_agent() -> AgentExecutor:
+    """Get the session's scheme agent, creating it on first use."""
+    if not st.session_state.find_schemes["scheme_agent"]:
+        st.session_state.find_schemes["scheme_agent"] = create_scheme_agent()
+    return st.session_state.find_schemes["scheme_agent"]
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Record a span for every LLM call and tool run the agent makes."""
+
+    def __init__(self):
+        self._spans = {}
+
+    def _start(self, run_id, name: str, stage: str, **attributes) -> None:
+        # Callbacks can't wrap the call in a with-block, so the span is entered here
+        # and closed in the matching end/error callback
+        run_span = span(name, stage=stage, activate=False, **attributes)
+        run_span.__enter__()
+        self._spans[run_id] = run_span
+
+    def _end(self, run_id, error: BaseException = None) -> None:
+        run_span = self._spans.pop(run_id, None)
+        if run_span:
+            run_span.__exit__(type(error) if error else None, error, None)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, "agent.llm", "llm", provider="openai", operation="chat")
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, "agent.llm", "llm", provider="openai", operation="chat")
+
+    def on_llm_end(self, response, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id, **kwargs: Any) -> None:
+        self._start(run_id, f"agent.tool.{(serialized or {}).get('name', 'unknown')}", "tool")
+
+    def on_tool_end(self, output: Any, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+@traced("agent")
 def process_query(query: str) -> Dict[str, Any]:
     """Process a query and return the formatted response."""
     try:
-        if not st.session_state.find_schemes["scheme_agent"]:
-            st.session_state.find_schemes["scheme_agent"] = create_scheme_agent()
-        
-        response = st.session_state.find_schemes["scheme_agent"].invoke({"input": query})
+        agent = get_scheme_agent()
+        response = agent.invoke({"input": query}, config={"callbacks": [TracingCallbackHandler()]})
         return {
             "response": response["output"],
-            "conversation_summary": get_conversation_summary(st.session_state.find_schemes["scheme_agent"])
+            "conversation_summary": get_conversation_summary(agent)
         }
     except Exception as e:
         return {
@@ -426,6 +481,96 @@ def process_query(query: str) -> Dict[str, Any]:
             "conversation_summary": ""
         }
 
+def _is_call_chunk(chunk: Any) -> bool:
+    """Whether a streamed generation chunk carries function or tool call data."""
+    message = getattr(chunk, "message", None)
+    if message is None:
+        return False
+    extra = getattr(message, "additional_kwargs", None) or {}
+    return bool(extra.get("function_call") or extra.get("tool_calls") or getattr(message, "tool_call_chunks", None))
+
+class FinalAnswerStreamHandler(BaseCallbackHandler):
+    """Forward the agent LLM's content tokens to a queue.
+
+    Once an LLM run starts streaming a function or tool call, none of its
+    tokens are forwarded, so only final-answer content reaches the user.
+    """
+
+    def __init__(self):
+        self.tokens = queue.Queue()
+        self._calling_runs = set()
+
+    def on_llm_new_token(self, token: str, *, chunk: Any = None, run_id=None, **kwargs: Any) -> None:
+        if _is_call_chunk(chunk):
+            self._calling_runs.add(run_id)
+        if token and run_id not in self._calling_runs:
+            self.tokens.put(token)
+
+    def on_llm_end(self, response, *, run_id=None, **kwargs: Any) -> None:
+        self._calling_runs.discard(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id=None, **kwargs: Any) -> None:
+        self._calling_runs.discard(run_id)
+
+_STREAM_DONE = object()
+
+def stream_query(query: str) -> Iterator[str]:
+    """Process a query and yield the agent's final-answer tokens as they are generated.
+
+    The agent runs on a worker thread (with the Streamlit script context attached so
+    tools can read session state) while this generator drains its token queue, so the
+    first tokens can be rendered with ``st.write_stream`` before the answer is complete.
+    """
+    try:
+        agent = get_scheme_agent()
+    except Exception as e:
+        yield f"I apologize, but I encountered an error: {str(e)}"
+        return
+
+    handler = FinalAnswerStreamHandler()
+    result = {}
+    
+    # The span isn't made current here: this generator is resumed by the caller between tokens
+    request_span = span("stream_query", stage="agent", activate=False)
+    request_span.__enter__()
+
+    def run_agent():
+        try:
+            with use_span(request_span.span):
+                result["response"] = agent.invoke(
+                    {"input": query},
+                    config={"callbacks": [handler, TracingCallbackHandler()]}
+                )
+        except Exception as e:
+            result["error"] = e
+        finally:
+            handler.tokens.put(_STREAM_DONE)
+
+    worker = threading.Thread(target=run_agent, daemon=True)
+    add_script_run_ctx(worker)
+    worker.start()
+
+    streamed_any = False
+    try:
+        while True:
+            token = handler.tokens.get()
+            if token is _STREAM_DONE:
+                break
+            if not streamed_any:
+                request_span.span.set(first_token_ms=round(request_span.span.elapsed_ms(), 3))
+            streamed_any = True
+            yield token
+        worker.join()
+    finally:
+        # Also closes the span if the caller stops consuming the stream early
+        request_span.__exit__(None, None, None)
+
+    if "error" in result:
+        yield f"I apologize, but I encountered an error: {str(result['error'])}"
+    elif not streamed_any:
+        # Nothing was streamed (e.g. the model did not stream content); emit the full answer
+        yield result["response"]["output"]
+
 async def get_scheme_response(schemes_data):
     # Remove existing response formatting
     response = ""
@@ -1,9 +1,10 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 import json
 import re
-from Python_Files.translation_utils import translate_text
+from Python_Files.translation_utils import translate_many
 
 @dataclass
 class SchemeInfo:
@@ -16,6 +17,213 @@ class SchemeInfo:
     success_factors: List[str]
     warnings: List[str]
 
+# Parsed texts kept by extract_scheme_info; each chunk is parsed once per process
+SCHEME_INFO_MEMO_SIZE = 4096
+
+_NUMBERED_ITEM = re.compile(r'\d+\.')
+_NUMBER = re.compile(r'\d+')
+
+@lru_cache(maxsize=SCHEME_INFO_MEMO_SIZE)
+def _parse_scheme_info(scheme_text: str) -> SchemeInfo:
+    """Parse a scheme text in one pass over its lines.
+
+    The first line is the scheme name and the first non-blank line after it the
+    description. Bulleted or numbered lines are benefits. Eligibility,
+    application and documents sections run from their heading line to the end
+    of the text and may overlap. Lines mentioning warnings or tips are
+    collected wherever they appear.
+    """
+    lines = scheme_text.split('\n')
+    scheme_name = lines[0].strip()
+    description = ""
+    benefits = []
+    eligibility_criteria = {}
+    current_criterion = ""
+    application_process = ""
+    required_documents = []
+    success_factors = []
+    warnings = []
+    in_eligibility_section = in_application_section = in_documents_section = False
+
+    # Cue words absent from the whole text need no per-line check; most texts have few or none
+    text_lower = scheme_text.lower()
+    eligibility_cue = 'eligibility' in text_lower or 'criteria' in text_lower
+    application_cue = 'how to apply' in text_lower or 'application process' in text_lower
+    documents_cue = 'required document' in text_lower or 'document required' in text_lower
+    warning_cue = 'important' in text_lower or 'warning' in text_lower or 'note:' in text_lower
+    tip_cue = 'tip' in text_lower or 'advice' in text_lower or 'recommend' in text_lower
+    any_cue = eligibility_cue or application_cue or documents_cue or warning_cue or tip_cue
+
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if index and not description:
+            description = stripped
+        if stripped[0] in '•-' or _NUMBERED_ITEM.match(stripped):
+            benefits.append(stripped.lstrip('•-123456789. '))
+        if not any_cue:
+            continue
+        lower = stripped.lower()
+
+        # Heading lines open their section and aren't part of it
+        if eligibility_cue and ('eligibility' in lower or 'criteria' in lower):
+            in_eligibility_section = True
+        elif in_eligibility_section:
+            if ':' in lower:
+                key, value = lower.split(':', 1)
+                eligibility_criteria[key.strip()] = value.strip()
+            else:
+                current_criterion += lower + " "
+
+        if application_cue and ('how to apply' in lower or 'application process' in lower):
+            in_application_section = True
+        elif in_application_section:
+            application_process += stripped + " "
+
+        if documents_cue and ('required document' in lower or 'document required' in lower):
+            in_documents_section = True
+        elif in_documents_section and line[0] in '•-':
+            required_documents.append(line.lstrip('•- '))
+
+        if warning_cue and ('important' in lower or 'warning' in lower or 'note:' in lower):
+            warnings.append(stripped)
+        elif tip_cue and ('tip' in lower or 'advice' in lower or 'recommend' in lower):
+            success_factors.append(stripped)
+
+    if current_criterion:
+        eligibility_criteria['general'] = current_criterion.strip()
+
+    return SchemeInfo(
+        scheme_name=scheme_name,
+        description=description,
+        benefits=benefits,
+        eligibility_criteria=eligibility_criteria,
+        application_process=application_process,
+        required_documents=required_documents,
+        success_factors=success_factors,
+        warnings=warnings
+    )
+
+def _copy_scheme_info(info: SchemeInfo) -> SchemeInfo:
+    return SchemeInfo(
+        scheme_name=info.scheme_name,
+        description=info.description,
+        benefits=list(info.benefits),
+        eligibility_criteria=dict(info.eligibility_criteria),
+        application_process=info.application_process,
+        required_documents=list(info.required_documents),
+        success_factors=list(info.success_factors),
+        warnings=list(info.warnings)
+    )
+
+
+RELATED_TERMS = {
+    'financial': ('money', 'loan', 'subsidy', 'grant', 'aid', 'assistance'),
+    'education': ('study', 'school', 'college', 'university', 'scholarship', 'learning'),
+    'healthcare': ('medical', 'health', 'hospital', 'treatment', 'medicine'),
+    'housing': ('home', 'house', 'accommodation', 'shelter', 'residence'),
+    'employment': ('job', 'work', 'career', 'business', 'self-employment', 'occupation'),
+    'agriculture': ('farming', 'crop', 'irrigation', 'farm', 'agricultural'),
+    'skill': ('training', 'development', 'workshop', 'vocational', 'apprenticeship')
+}
+_RELATED_CATEGORIES = list(RELATED_TERMS)
+# Related term -> position of the first category listing it
+_RELATED_TERM_INDEX = {}
+for _position, _terms in enumerate(RELATED_TERMS.values()):
+    for _term in _terms:
+        _RELATED_TERM_INDEX.setdefault(_term, _position)
+
+COMPLEXITY_INDICATORS = ('visit office', 'in person', 'multiple steps', 'verification')
+
+@lru_cache(maxsize=1024)
+def _related_terms(need: str) -> Tuple[str, ...]:
+    """Terms of the first category that lists need or whose name is part of it."""
+    position = _RELATED_TERM_INDEX.get(need, len(_RELATED_CATEGORIES))
+    for candidate, category in enumerate(_RELATED_CATEGORIES[:position]):
+        if category in need:
+            position = candidate
+            break
+    return RELATED_TERMS[_RELATED_CATEGORIES[position]] if position < len(_RELATED_CATEGORIES) else ()
+
+def _prepare_needs(user_needs: List[str]) -> List[Tuple[str, Tuple[str, ...]]]:
+    needs = []
+    for need in user_needs:
+        need_lower = need.lower()
+        needs.append((need_lower, _related_terms(need_lower)))
+    return needs
+
+def _scheme_texts(scheme_info: SchemeInfo, with_needs: bool = True) -> Tuple[Optional[str], str]:
+    """Lowercased text matched against needs (None unless with_needs), and against the category."""
+    description = scheme_info.description.lower()
+    criteria = ' '.join(str(v).lower() for v in scheme_info.eligibility_criteria.values())
+    needs_text = None
+    if with_needs:
+        benefits = ' '.join(b.lower() for b in scheme_info.benefits)
+        needs_text = ' '.join([description, benefits, criteria])
+    return needs_text, ' '.join([description, criteria])
+
+def _needs_match(scheme_text: str, needs: List[Tuple[str, Tuple[str, ...]]]) -> float:
+    matched_needs = 0
+    for need_lower, related_terms in needs:
+        if need_lower in scheme_text:
+            matched_needs += 1
+        # Check for related terms
+        elif any(related in scheme_text for related in related_terms):
+            matched_needs += 0.5
+    return matched_needs / len(needs)
+
+def _category_relevance(scheme_text: str, user_category: str) -> float:
+    # Check if scheme specifically mentions user's category
+    if user_category in scheme_text:
+        return 1.0
+    if any(cat in scheme_text for cat in ['general', 'all categories', 'any category']):
+        return 0.8
+    if any(cat in scheme_text for cat in ['sc', 'st', 'obc', 'minority']) and user_category in ['sc', 'st', 'obc', 'minority']:
+        return 0.9
+    return 0.5  # Default middle score
+
+def _accessibility(scheme_info: SchemeInfo, user_income: float) -> float:
+    accessibility_score = 0.0
+    factors_checked = 0
+    
+    # Check income requirements
+    income_mentioned = False
+    for criterion, requirement in scheme_info.eligibility_criteria.items():
+        if 'income' in criterion.lower():
+            income_mentioned = True
+            try:
+                max_income = float(_NUMBER.findall(requirement)[0])
+                if user_income <= max_income:
+                    accessibility_score += 1
+            except:
+                accessibility_score += 0.5  # If can't parse income requirement
+            factors_checked += 1
+    
+    if not income_mentioned:
+        accessibility_score += 0.8  # No income restriction is generally good
+        factors_checked += 1
+    
+    # Check document requirements
+    doc_score = 1.0
+    if scheme_info.required_documents:
+        doc_score = 1.0 - (len(scheme_info.required_documents) * 0.1)  # Reduce score for more documents
+        doc_score = max(0.2, doc_score)  # Don't go below 0.2
+    accessibility_score += doc_score
+    factors_checked += 1
+    
+    # Check application process complexity
+    process_score = 1.0
+    process_text = scheme_info.application_process.lower()
+    for indicator in COMPLEXITY_INDICATORS:
+        if indicator in process_text:
+            process_score -= 0.2
+    process_score = max(0.2, process_score)
+    accessibility_score += process_score
+    factors_checked += 1
+    
+    return accessibility_score / factors_checked
+
 class UserFriendlyAnalysis:
     def __init__(self, scheme_name: str):
         self.scheme_name = scheme_name
@@ -46,46 +254,55 @@ class UserFriendlyAnalysis:
     
     def to_bilingual_dict(self, target_lang: str) -> Dict[str, Dict[str, Any]]:
         """Convert analysis to bilingual dictionary format."""
+        # Translate every field in a single batch instead of one request per string
+        texts = [
+            self.scheme_name, self.summary, self.eligibility_status, self.application_process,
+            *self.key_benefits, *self.eligibility_details.keys(), *self.next_steps,
+            *self.required_documents, *self.success_factors, *self.warnings
+        ]
+        translations = dict(zip(texts, translate_many(texts, target_lang=target_lang)))
+        translate = lambda text: translations.get(text, text)
+        
         return {
             "scheme_name": {
                 "en": self.scheme_name,
-                target_lang: translate_text(self.scheme_name, target_lang=target_lang)
+                target_lang: translate(self.scheme_name)
             },
             "summary": {
                 "en": self.summary,
-                target_lang: translate_text(self.summary, target_lang=target_lang)
+                target_lang: translate(self.summary)
             },
             "key_benefits": {
                 "en": self.key_benefits,
-                target_lang: [translate_text(benefit, target_lang=target_lang) for benefit in self.key_benefits]
+                target_lang: [translate(benefit) for benefit in self.key_benefits]
             },
             "eligibility_status": {
                 "en": self.eligibility_status,
-                target_lang: translate_text(self.eligibility_status, target_lang=target_lang)
+                target_lang: translate(self.eligibility_status)
             },
             "eligibility_details": {
                 "en": self.eligibility_details,
-                target_lang: {translate_text(k, target_lang=target_lang): v for k, v in self.eligibility_details.items()}
+                target_lang: {translate(k): v for k, v in self.eligibility_details.items()}
             },
             "application_process": {
                 "en": self.application_process,
-                target_lang: translate_text(self.application_process, target_lang=target_lang)
+                target_lang: translate(self.application_process)
             },
             "next_steps": {
                 "en": self.next_steps,
-                target_lang: [translate_text(step, target_lang=target_lang) for step in self.next_steps]
+                target_lang: [translate(step) for step in self.next_steps]
             },
             "required_documents": {
                 "en": self.required_documents,
-                target_lang: [translate_text(doc, target_lang=target_lang) for doc in self.required_documents]
+                target_lang: [translate(doc) for doc in self.required_documents]
             },
             "success_factors": {
                 "en": self.success_factors,
-                target_lang: [translate_text(factor, target_lang=target_lang) for factor in self.success_factors]
+                target_lang: [translate(factor) for factor in self.success_factors]
             },
             "warnings": {
                 "en": self.warnings,
-                target_lang: [translate_text(warning, target_lang=target_lang) for warning in self.warnings]
+                target_lang: [translate(warning) for warning in self.warnings]
             }
         }
 
@@ -93,89 +310,8 @@ class SchemeAnalyzer:
     def extract_scheme_info(self, scheme_text: str) -> Optional[SchemeInfo]:
         """Extract structured information from scheme text."""
         try:
-            # Basic extraction of scheme name (first line or section)
-            lines = scheme_text.split('\n')
-            scheme_name = lines[0].strip()
-            
-            # Extract description (usually the first paragraph)
-            description = ""
-            for line in lines[1:]:
-                if line.strip():
-                    description = line.strip()
-                    break
-            
-            # Extract benefits (look for bullet points or numbered lists)
-            benefits = []
-            for line in lines:
-                line = line.strip()
-                if line.startswith('•') or line.startswith('-') or re.match(r'^\d+\.', line):
-                    benefits.append(line.lstrip('•-123456789. '))
-            
-            # Basic eligibility criteria extraction
-            eligibility_criteria = {}
-            in_eligibility_section = False
-            current_criterion = ""
-            
-            for line in lines:
-                line = line.strip().lower()
-                if 'eligibility' in line or 'criteria' in line:
-                    in_eligibility_section = True
-                    continue
-                if in_eligibility_section and line:
-                    if ':' in line:
-                        key, value = line.split(':', 1)
-                        eligibility_criteria[key.strip()] = value.strip()
-                    else:
-                        current_criterion += line + " "
-            
-            if current_criterion:
-                eligibility_criteria['general'] = current_criterion.strip()
-            
-            # Extract application process
-            application_process = ""
-            in_application_section = False
-            
-            for line in lines:
-                if 'how to apply' in line.lower() or 'application process' in line.lower():
-                    in_application_section = True
-                    continue
-                if in_application_section and line.strip():
-                    application_process += line.strip() + " "
-            
-            # Extract required documents
-            required_documents = []
-            in_documents_section = False
-            
-            for line in lines:
-                if 'required document' in line.lower() or 'document required' in line.lower():
-                    in_documents_section = True
-                    continue
-                if in_documents_section and line.strip():
-                    if line.startswith('•') or line.startswith('-'):
-                        required_documents.append(line.lstrip('•- '))
-            
-            # Extract success factors and warnings
-            success_factors = []
-            warnings = []
-            
-            for line in lines:
-                line = line.strip()
-                if 'important' in line.lower() or 'warning' in line.lower() or 'note:' in line.lower():
-                    warnings.append(line)
-                elif 'tip' in line.lower() or 'advice' in line.lower() or 'recommend' in line.lower():
-                    success_factors.append(line)
-            
-            return SchemeInfo(
-                scheme_name=scheme_name,
-                description=description,
-                benefits=benefits,
-                eligibility_criteria=eligibility_criteria,
-                application_process=application_process,
-                required_documents=required_documents,
-                success_factors=success_factors,
-                warnings=warnings
-            )
-            
+            # The parse is memoized per text; callers get their own copy to modify
+            return _copy_scheme_info(_parse_scheme_info(scheme_text))
         except Exception as e:
             print(f"Error extracting scheme info: {str(e)}")
             return None
@@ -191,7 +327,7 @@ class SchemeAnalyzer:
                 if 'age' in criterion_lower:
                     try:
                         # Extract numbers from the criterion
-                        numbers = re.findall(r'\d+', value)
+                        numbers = _NUMBER.findall(value)
                         if len(numbers) >= 2:
                             min_age = int(numbers[0])
                             max_age = int(numbers[1])
@@ -204,7 +340,7 @@ class SchemeAnalyzer:
                 elif 'income' in criterion_lower:
                     try:
                         # Extract numbers from the criterion
-                        numbers = re.findall(r'\d+', value)
+                        numbers = _NUMBER.findall(value)
                         if numbers:
                             max_income = float(numbers[0])
                             user_income = user_profile.get('annual_income', 0)
@@ -266,26 +402,7 @@ class SchemeAnalyzer:
         try:
             if not user_needs:
                 return 0.5  # Default match if no needs specified
-            
-            matched_needs = 0
-            total_needs = len(user_needs)
-            
-            # Convert everything to lowercase for comparison
-            scheme_text = ' '.join([
-                scheme_info.description.lower(),
-                ' '.join(b.lower() for b in scheme_info.benefits),
-                ' '.join(str(v).lower() for v in scheme_info.eligibility_criteria.values())
-            ])
-            
-            for need in user_needs:
-                need_lower = need.lower()
-                if need_lower in scheme_text:
-                    matched_needs += 1
-                # Check for related terms
-                elif any(related in scheme_text for related in self._get_related_terms(need_lower)):
-                    matched_needs += 0.5
-            
-            return matched_needs / total_needs
+            return _needs_match(_scheme_texts(scheme_info)[0], _prepare_needs(user_needs))
             
         except Exception as e:
             print(f"Error calculating needs match: {str(e)}")
@@ -294,23 +411,8 @@ class SchemeAnalyzer:
     def calculate_category_relevance(self, scheme_info: SchemeInfo, user_profile: Dict[str, Any]) -> float:
         """Calculate how relevant scheme is for user's category."""
         try:
-            relevance_score = 0.5  # Default middle score
-            
-            # Check if scheme specifically mentions user's category
             user_category = user_profile.get('category', '').lower()
-            scheme_text = ' '.join([
-                scheme_info.description.lower(),
-                ' '.join(str(v).lower() for v in scheme_info.eligibility_criteria.values())
-            ])
-            
-            if user_category in scheme_text:
-                relevance_score = 1.0
-            elif any(cat in scheme_text for cat in ['general', 'all categories', 'any category']):
-                relevance_score = 0.8
-            elif any(cat in scheme_text for cat in ['sc', 'st', 'obc', 'minority']) and user_category in ['sc', 'st', 'obc', 'minority']:
-                relevance_score = 0.9
-            
-            return relevance_score
+            return _category_relevance(_scheme_texts(scheme_info, with_needs=False)[1], user_category)
             
         except Exception as e:
             print(f"Error calculating category relevance: {str(e)}")
@@ -319,47 +421,7 @@ class SchemeAnalyzer:
     def calculate_accessibility(self, scheme_info: SchemeInfo, user_profile: Dict[str, Any]) -> float:
         """Calculate how accessible the scheme is for the user."""
         try:
-            accessibility_score = 0.0
-            factors_checked = 0
-            
-            # Check income requirements
-            income_mentioned = False
-            for criterion in scheme_info.eligibility_criteria:
-                if 'income' in criterion.lower():
-                    income_mentioned = True
-                    user_income = user_profile.get('annual_income', 0)
-                    try:
-                        max_income = float(re.findall(r'\d+', scheme_info.eligibility_criteria[criterion])[0])
-                        if user_income <= max_income:
-                            accessibility_score += 1
-                    except:
-                        accessibility_score += 0.5  # If can't parse income requirement
-                    factors_checked += 1
-            
-            if not income_mentioned:
-                accessibility_score += 0.8  # No income restriction is generally good
-                factors_checked += 1
-            
-            # Check document requirements
-            doc_score = 1.0
-            if scheme_info.required_documents:
-                doc_score = 1.0 - (len(scheme_info.required_documents) * 0.1)  # Reduce score for more documents
-                doc_score = max(0.2, doc_score)  # Don't go below 0.2
-            accessibility_score += doc_score
-            factors_checked += 1
-            
-            # Check application process complexity
-            process_score = 1.0
-            process_text = scheme_info.application_process.lower()
-            complexity_indicators = ['visit office', 'in person', 'multiple steps', 'verification']
-            for indicator in complexity_indicators:
-                if indicator in process_text:
-                    process_score -= 0.2
-            process_score = max(0.2, process_score)
-            accessibility_score += process_score
-            factors_checked += 1
-            
-            return accessibility_score / factors_checked if factors_checked > 0 else 0.5
+            return _accessibility(scheme_info, user_profile.get('annual_income', 0))
             
         except Exception as e:
             print(f"Error calculating accessibility: {str(e)}")
@@ -368,21 +430,7 @@ class SchemeAnalyzer:
     def _get_related_terms(self, need: str) -> List[str]:
         """Get related terms for a given need."""
         try:
-            related_terms_dict = {
-                'financial': ['money', 'loan', 'subsidy', 'grant', 'aid', 'assistance'],
-                'education': ['study', 'school', 'college', 'university', 'scholarship', 'learning'],
-                'healthcare': ['medical', 'health', 'hospital', 'treatment', 'medicine'],
-                'housing': ['home', 'house', 'accommodation', 'shelter', 'residence'],
-                'employment': ['job', 'work', 'career', 'business', 'self-employment', 'occupation'],
-                'agriculture': ['farming', 'crop', 'irrigation', 'farm', 'agricultural'],
-                'skill': ['training', 'development', 'workshop', 'vocational', 'apprenticeship']
-            }
-            
-            for category, terms in related_terms_dict.items():
-                if need in terms or category in need:
-                    return terms
-            
-            return []
+            return list(_related_terms(need))
             
         except Exception as e:
             print(f"Error matching needs to category: {str(e)}")
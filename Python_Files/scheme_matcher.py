@@ -1,17 +1,25 @@
 from typing import Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from enum import Enum
-from langchain_openai import ChatOpenAI
 from langchain.agents import tool, AgentExecutor, create_openai_functions_agent
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.schema import SystemMessage
 import json
-from pinecone import Pinecone
 import os
 from dotenv import load_dotenv
 import logging
 from datetime import datetime
-from openai import OpenAI
+from pydantic import BaseModel, Field
+from Python_Files.tracing import traced, record_error
+from Python_Files.structured_output import create_structured
+from Python_Files.model_router import ROUTER
+from Python_Files.llm_cache import cached_llm_call
+from Python_Files.metrics import CRITERIA_EXTRACTIONS
+from Python_Files.criteria_rules import extract_criteria
+from Python_Files.retrieval_results import rank
+from Python_Files.query_builder import SchemeQueryBuilder, QueryPriority, WeightedQuery, builder_profile
+from Python_Files.multi_query_retrieval import retrieve
+from Python_Files.service_clients import get_openai_client, get_pinecone_index
 
 load_dotenv()
 
@@ -31,6 +39,18 @@ class SchemeRecommendation:
     why_recommended: str
     eligibility_details: Optional[Dict[str, Any]] = None
 
+class SchemeAnalysis(BaseModel):
+    """One scheme as analyzed by the LLM."""
+    name: str
+    relevance: float = Field(description="0-1")
+    why: str = Field(description="Why it suits the user")
+    benefits: List[str]
+    requirements: Dict[str, str] = Field(description="Requirement -> details")
+    steps: List[str] = Field(description="How to apply, in order")
+
+class SchemeAnalyses(BaseModel):
+    schemes: List[SchemeAnalysis]
+
 @dataclass
 class UserProfile:
     """User profile with all relevant information for scheme matching."""
@@ -64,10 +84,10 @@ class SchemeMatch:
 
 class SchemeMatcher:
     def __init__(self):
-        self.pc = Pinecone(api_key=os.getenv('PINECONE_API_KEY'))
-        self.index = self.pc.Index(os.getenv('PINECONE_INDEX_NAME'))
-        self.llm = ChatOpenAI(temperature=0, model="gpt-4o-mini")
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        self.index = get_pinecone_index()
+        self.llm = ROUTER.chat_model("eligibility_agent", temperature=0)
+        self.openai_client = get_openai_client(api_key=os.getenv('OPENAI_API_KEY'))
+        self.query_builder = SchemeQueryBuilder()
         
         # Create agent with tools
         self.agent_executor = self._create_agent()
@@ -100,48 +120,57 @@ class SchemeMatcher:
     def _extract_scheme_details_tool(self, scheme_text: str) -> str:
         """Extract detailed information about a government scheme from text."""
         try:
-            response = self.llm.invoke(
-                messages=[{
-                    "role": "system",
-                    "content": "Extract scheme details in JSON format. Be precise and only include explicitly mentioned information."
-                }, {
-                    "role": "user",
-                    "content": f"Extract details from: {scheme_text}"
-                }],
-                functions=[{
-                    "name": "extract_scheme_details",
-                    "description": "Extract scheme details from text",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "scheme_name": {"type": "string"},
-                            "category": {"type": "string"},
-                            "eligibility": {
-                                "type": "object",
-                                "properties": {
-                                    "income_limit": {"type": "number", "nullable": True},
-                                    "age_range": {
-                                        "type": "object",
-                                        "properties": {
-                                            "min": {"type": "number"},
-                                            "max": {"type": "number"}
-                                        },
-                                        "nullable": True
+            messages = [{
+                "role": "system",
+                "content": "Extract scheme details in JSON format. Be precise and only include explicitly mentioned information."
+            }, {
+                "role": "user",
+                "content": f"Extract details from: {scheme_text}"
+            }]
+            functions = [{
+                "name": "extract_scheme_details",
+                "description": "Extract scheme details from text",
+                "parameters": {
+                    "type": "object",
+                    "properties": {
+                        "scheme_name": {"type": "string"},
+                        "category": {"type": "string"},
+                        "eligibility": {
+                            "type": "object",
+                            "properties": {
+                                "income_limit": {"type": "number", "nullable": True},
+                                "age_range": {
+                                    "type": "object",
+                                    "properties": {
+                                        "min": {"type": "number"},
+                                        "max": {"type": "number"}
                                     },
-                                    "category": {"type": "array", "items": {"type": "string"}, "nullable": True},
-                                    "gender": {"type": "array", "items": {"type": "string"}, "nullable": True},
-                                    "state_specific": {"type": "array", "items": {"type": "string"}, "nullable": True}
-                                }
-                            },
-                            "benefits": {"type": "array", "items": {"type": "string"}},
-                            "application_process": {"type": "string", "nullable": True}
-                        }
+                                    "nullable": True
+                                },
+                                "category": {"type": "array", "items": {"type": "string"}, "nullable": True},
+                                "gender": {"type": "array", "items": {"type": "string"}, "nullable": True},
+                                "state_specific": {"type": "array", "items": {"type": "string"}, "nullable": True}
+                            }
+                        },
+                        "benefits": {"type": "array", "items": {"type": "string"}},
+                        "application_process": {"type": "string", "nullable": True}
                     }
-                }],
-                function_call={"name": "extract_scheme_details"}
+                }
+            }]
+
+            def extract():
+                response = self.llm.invoke(
+                    messages=messages,
+                    functions=functions,
+                    function_call={"name": "extract_scheme_details"}
+                )
+                return response.additional_kwargs["function_call"]["arguments"]
+
+            # The same scheme text yields the same details for every user
+            return cached_llm_call(
+                "scheme_details", self.llm.model_name, self.llm.temperature,
+                {"messages": messages, "functions": functions}, extract
             )
-            
-            return response.additional_kwargs["function_call"]["arguments"]
         except Exception as e:
             return json.dumps({
                 "error": f"Failed to extract scheme details: {str(e)}",
@@ -236,6 +265,7 @@ class SchemeMatcher:
                 "reason": f"Error evaluating eligibility: {str(e)}"
             })
 
+    @traced("embedding", provider="openai", operation="embeddings")
     def _get_embedding(self, text: str) -> List[float]:
         """Generate embedding for text using OpenAI."""
         try:
@@ -270,24 +300,27 @@ class SchemeMatcher:
         
         return " ".join(query_parts)
 
+    def _search_queries(self, user_profile: UserProfile) -> List[WeightedQuery]:
+        """The profile query followed by the query builder's queries for the profile."""
+        needs = " ".join(user_profile.specific_needs or [])
+        return [WeightedQuery(self._generate_search_query(user_profile), QueryPriority.HIGH)] + \
+            self.query_builder.build_weighted_queries(builder_profile(user_profile), needs or None)
+
     def get_initial_schemes(self, user_profile: UserProfile) -> List[Dict]:
         """Get initial schemes based on semantic search."""
         try:
-            search_query = self._generate_search_query(user_profile)
-            logger.info(f"Generated search query: {search_query}")
+            search_queries = self._search_queries(user_profile)
+            logger.info(f"Generated search queries: {[query.text for query in search_queries]}")
             
-            results = self.index.query(
-                vector=self._get_embedding(search_query),
-                top_k=50,
-                include_metadata=True
-            )
+            # All queries are embedded and searched in one batch, then fused by priority
+            results = retrieve(self.index, self.openai_client, search_queries, top_k=50)
             
             schemes = []
-            for match in results.matches:
+            for chunk in results:
                 schemes.append({
-                    'scheme_name': match.metadata.get('name', 'Unknown Scheme'),
-                    'details': match.metadata.get('text', ''),
-                    'score': match.score
+                    'scheme_name': chunk.get('name', 'Unknown Scheme'),
+                    'details': chunk.text,
+                    'score': chunk.score
                 })
             
             return schemes
@@ -296,6 +329,7 @@ class SchemeMatcher:
             logger.error(f"Error getting initial schemes: {str(e)}")
             return []
 
+    @traced("llm", provider="openai", operation="chat")
     def analyze_schemes_with_llm(self, user_profile: UserProfile, schemes: List[Dict]) -> List[SchemeRecommendation]:
         """Analyze schemes using LLM to get detailed recommendations."""
         try:
@@ -311,92 +345,40 @@ User Profile:
 - Education: {user_profile.education_level or 'Not specified'}
 - Specific Needs: {', '.join(user_profile.specific_needs) if user_profile.specific_needs else 'None'}
 
-For each scheme, provide details in this format:
-SCHEME NAME: [name]
-RELEVANCE: [0-1 score]
-WHY RECOMMENDED: [explanation]
-BENEFITS:
-• [benefit 1]
-• [benefit 2]
-ELIGIBILITY REQUIREMENTS:
-• [requirement 1]: [details]
-• [requirement 2]: [details]
-HOW TO APPLY:
-1. [step 1]
-2. [step 2]
-
-Analyze these schemes:
+Analyze these schemes and report each one with report_schemes:
 {json.dumps([{'name': s['scheme_name'], 'details': s['details']} for s in schemes], indent=2)}"""
 
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
+            analyses = create_structured(
+                ROUTER.client(self.openai_client, "final_analysis"),
+                SchemeAnalyses,
                 messages=[
                     {"role": "system", "content": "You are an expert in Indian government schemes."},
                     {"role": "user", "content": prompt}
                 ],
+                name="report_schemes",
+                description="Report the analysis of each scheme for the user",
                 temperature=0.3
             )
 
-            # Parse response into recommendations
-            recommendations = []
-            scheme_texts = response.choices[0].message.content.split('SCHEME NAME:')
-            
-            for scheme_text in scheme_texts[1:]:  # Skip first empty split
-                try:
-                    lines = scheme_text.strip().split('\n')
-                    scheme_data = {
-                        'name': lines[0].strip(),
-                        'relevance': 0.0,
-                        'why': '',
-                        'benefits': [],
-                        'requirements': {},
-                        'process': []
-                    }
-                    
-                    current_section = None
-                    for line in lines[1:]:
-                        line = line.strip()
-                        if not line:
-                            continue
-                            
-                        if line.startswith('RELEVANCE:'):
-                            scheme_data['relevance'] = float(line.split(':')[1].strip())
-                        elif line.startswith('WHY RECOMMENDED:'):
-                            scheme_data['why'] = line.split(':')[1].strip()
-                        elif line.startswith('BENEFITS:'):
-                            current_section = 'benefits'
-                        elif line.startswith('ELIGIBILITY REQUIREMENTS:'):
-                            current_section = 'requirements'
-                        elif line.startswith('HOW TO APPLY:'):
-                            current_section = 'process'
-                        elif line.startswith('•') and current_section == 'benefits':
-                            scheme_data['benefits'].append(line[1:].strip())
-                        elif line.startswith('•') and current_section == 'requirements':
-                            key, value = line[1:].split(':', 1)
-                            scheme_data['requirements'][key.strip()] = value.strip()
-                        elif current_section == 'process' and (line.startswith('1.') or line.startswith('2.')):
-                            scheme_data['process'].append(line.split('.', 1)[1].strip())
-                    
-                    recommendations.append(SchemeRecommendation(
-                        scheme_name=scheme_data['name'],
-                        relevance_score=scheme_data['relevance'],
-                        benefits=scheme_data['benefits'],
-                        eligibility_requirements=scheme_data['requirements'],
-                        eligibility_status={},  # Will be filled by eligibility checker
-                        application_process=scheme_data['process'],
-                        why_recommended=scheme_data['why']
-                    ))
-                    
-                except Exception as e:
-                    logger.error(f"Error parsing scheme recommendation: {str(e)}")
-                    continue
-            
-            return recommendations
+            return [
+                SchemeRecommendation(
+                    scheme_name=analysis.name,
+                    relevance_score=min(max(analysis.relevance, 0.0), 1.0),
+                    benefits=analysis.benefits,
+                    eligibility_requirements=analysis.requirements,
+                    eligibility_status={},  # Will be filled by eligibility checker
+                    application_process=analysis.steps,
+                    why_recommended=analysis.why
+                )
+                for analysis in analyses.schemes
+            ]
             
         except Exception as e:
             logger.error(f"Error analyzing schemes: {str(e)}")
+            record_error(e)
             return []
 
+    @traced("recommendation")
     def get_scheme_recommendations(self, user_profile: UserProfile) -> List[SchemeRecommendation]:
         """Get scheme recommendations with robust hard criteria checking and fallbacks."""
         try:
@@ -459,20 +441,26 @@ Analyze these schemes:
             try:
                 recommendations = self.analyze_schemes_with_llm(user_profile, combined_schemes)
                 
+                # First scheme of each name, and which of them are uncertain
+                schemes_by_name = {}
+                for scheme in combined_schemes:
+                    schemes_by_name.setdefault(scheme['scheme_name'], scheme)
+                uncertain_ids = {id(scheme) for scheme in uncertain_schemes}
+                
                 # Add eligibility check results to recommendations
                 for rec in recommendations:
-                    matching_scheme = next((s for s in combined_schemes if s['scheme_name'] == rec.scheme_name), None)
+                    matching_scheme = schemes_by_name.get(rec.scheme_name)
                     if matching_scheme and 'eligibility_check' in matching_scheme:
                         rec.eligibility_details = matching_scheme['eligibility_check']
                         
                         # Adjust relevance score based on eligibility certainty
-                        if matching_scheme in uncertain_schemes:
+                        if id(matching_scheme) in uncertain_ids:
                             # Reduce relevance score slightly for uncertain schemes
                             rec.relevance_score *= 0.9
                             rec.why_recommended = "(Note: Some eligibility criteria could not be verified) " + rec.why_recommended
                 
                 # Sort recommendations by relevance score
-                recommendations.sort(key=lambda x: x.relevance_score, reverse=True)
+                recommendations = rank(recommendations, [rec.relevance_score for rec in recommendations])
                 
             except Exception as e:
                 logger.error(f"Error in final analysis: {str(e)}")
@@ -677,38 +665,57 @@ class HardCriteriaChecker:
             "timestamp": datetime.now().isoformat()
         }
 
+@traced("criteria")
 def extract_hard_criteria(scheme_text: str, openai_client) -> SchemeHardCriteria:
+    """Extract hard criteria with the rules, asking the LLM only when they aren't confident."""
+    rules = extract_criteria(scheme_text)
+    if rules.confident:
+        CRITERIA_EXTRACTIONS.inc(source="rules")
+        return SchemeHardCriteria(**rules.criteria)
+    CRITERIA_EXTRACTIONS.inc(source="llm")
+    return _extract_hard_criteria_with_llm(scheme_text, openai_client)
+
+@traced("llm", provider="openai", operation="chat")
+def _extract_hard_criteria_with_llm(scheme_text: str, openai_client) -> SchemeHardCriteria:
     """Extract hard criteria with fallback mechanisms."""
     try:
         prompt = """Extract the exact eligibility criteria from this scheme text.
         If a criterion is not explicitly mentioned, mark it as null or ["All"].
         
         Return in this JSON format:
-        {
+        {{
             "income_range": [min_income, max_income],
             "age_range": [min_age, max_age],
             "eligible_genders": ["Male"/"Female"/"All"],
             "eligible_states": ["State1", "State2"] or ["All"],
             "eligible_categories": ["SC", "ST", "OBC", "General"] or ["All"]
-        }
+        }}
         
         Scheme text:
         {text}
         """
+        messages = [
+            {"role": "system", "content": "You are a precise eligibility criteria extractor."},
+            {"role": "user", "content": prompt.format(text=scheme_text)}
+        ]
         
-        response = openai_client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a precise eligibility criteria extractor."},
-                {"role": "user", "content": prompt.format(text=scheme_text)}
-            ],
-            response_format={ "type": "json_object" }
-        )
+        def extract():
+            response = ROUTER.complete(
+                openai_client,
+                "criteria_extraction",
+                messages=messages,
+                temperature=0,
+                response_format={ "type": "json_object" }
+            )
+            return json.loads(response.choices[0].message.content)
         
-        criteria_dict = json.loads(response.choices[0].message.content)
+        criteria_dict = cached_llm_call(
+            "hard_criteria", ROUTER.model_for("criteria_extraction"), 0, messages, extract
+        )
         return SchemeHardCriteria(**criteria_dict)
         
     except Exception as e:
         logger.error(f"Error extracting hard criteria: {str(e)}")
+        record_error(e)
         # Return default criteria (all inclusive) to avoid excluding schemes when extraction fails
         return SchemeHardCriteria()
\ No newline at end of file
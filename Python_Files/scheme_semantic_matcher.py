@@ -1,17 +1,31 @@
 from typing import List, Dict, Any, Tuple, Optional
 from pydantic import BaseModel
-from pinecone import Pinecone
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
-import numpy as np
 from dataclasses import dataclass
-import re
 import json
+from Python_Files.tracing import span, record_error, submit
+from Python_Files.service_clients import get_async_openai_client, get_pinecone_index
+from Python_Files.model_router import ROUTER
+from Python_Files.llm_cache import cached_llm_call_async
+from Python_Files.retrieval_results import ResultBatch, rank
+from Python_Files.query_builder import SchemeQueryBuilder, QueryPriority, WeightedQuery, builder_profile
+from Python_Files.multi_query_retrieval import retrieve_async
 
 # Load environment variables
 load_dotenv()
 
+# Chunks handled by one name-identification + analysis pair of calls
+ANALYSIS_BATCH_SIZE = int(os.getenv("ANALYSIS_BATCH_SIZE", "5"))
+
+# Upper bound on LLM calls in flight for one recommendation request
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv("MAX_CONCURRENT_LLM_CALLS", "4"))
+
+# Recommendations kept after merging the per-batch analyses
+MAX_RECOMMENDATIONS = 5
+
 @dataclass
 class UserProfile:
     """User profile with all relevant information for scheme matching."""
@@ -39,20 +53,11 @@ class SchemeRecommendation(BaseModel):
 
 class SemanticSchemeMatcher:
     def __init__(self):
-        """Initialize with Pinecone and OpenAI."""
-        self.pc = Pinecone(api_key=os.getenv('PINECONE_API_KEY'))
-        self.index = self.pc.Index(os.getenv('PINECONE_INDEX_NAME'))
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+        """Initialize with Pinecone; OpenAI clients are opened per request."""
+        self.index = get_pinecone_index()
+        self.query_builder = SchemeQueryBuilder()
         self.MIN_RELEVANCE_SCORE = 0.7
 
-    def generate_embedding(self, text: str) -> np.ndarray:
-        """Generate embedding for text using OpenAI."""
-        response = self.openai_client.embeddings.create(
-            input=text,
-            model="text-embedding-ada-002"
-        )
-        return np.array(response.data[0].embedding, dtype='float32')
-
     def is_scheme_applicable_for_state(self, scheme_details: str, user_state: str) -> bool:
         """Check if scheme is applicable for user's state."""
         scheme_details = scheme_details.lower()
@@ -116,44 +121,22 @@ class SemanticSchemeMatcher:
             
         return " ".join(query_parts)
 
-    def get_initial_schemes(self, user_profile: UserProfile) -> List[Dict]:
-        """Get initial set of potentially relevant schemes."""
-        search_query = self.create_search_query(user_profile)
-        query_embedding = self.generate_embedding(search_query)
-        
-        results = self.index.query(
-            vector=query_embedding.tolist(),
-            top_k=20,
-            include_metadata=True
+    def search_queries(self, user_profile: UserProfile) -> List[WeightedQuery]:
+        """The profile query followed by the query builder's queries for the profile."""
+        open_text = " ".join([user_profile.interests or ""] + list(user_profile.specific_needs or [])).strip()
+        return [WeightedQuery(self.create_search_query(user_profile), QueryPriority.HIGH)] + \
+            self.query_builder.build_weighted_queries(builder_profile(user_profile), open_text or None)
+
+    def _relevant_chunks(self, results: ResultBatch, user_state: str) -> List[Tuple[str, float]]:
+        """(text, score) of the results above the relevance threshold that apply in the user's state, in order."""
+        batch = (
+            results
+            .above(self.MIN_RELEVANCE_SCORE)
+            .filter(lambda text: self.is_scheme_applicable_for_state(text, user_state))
         )
-        
-        filtered_schemes = []
-        chunks_to_identify = []
-        
-        # First collect all relevant chunks
-        for match in results.matches:
-            if match.score >= self.MIN_RELEVANCE_SCORE:
-                text = match.metadata.get("text", "")
-                if self.is_scheme_applicable_for_state(text, user_profile.state):
-                    chunks_to_identify.append(text)
-        
-        # Use LLM to identify scheme names from chunks
-        if chunks_to_identify:
-            scheme_names = self._identify_schemes_with_llm(chunks_to_identify)
-            
-            # Create filtered schemes with identified names
-            for text, name in zip(chunks_to_identify, scheme_names):
-                if name:  # Only add if we got a valid name
-                    filtered_schemes.append({
-                        "scheme_name": name,
-                        "details": text,
-                        "score": float(match.score)
-                    })
-        
-        return filtered_schemes
+        return list(zip(batch.texts(), batch.scores.tolist()))
 
-    def _identify_schemes_with_llm(self, texts: List[str]) -> List[str]:
-        """Use LLM to identify scheme names from text chunks."""
+    def _identification_messages(self, texts: List[str]) -> List[Dict[str, str]]:
         prompt = """For each text chunk below, identify the official government scheme name. 
         If multiple schemes are mentioned, identify the main scheme being discussed.
         If no specific scheme name is found, return "Unknown Scheme".
@@ -167,36 +150,27 @@ class SemanticSchemeMatcher:
         
         # Join texts with clear separators
         formatted_texts = "\n\n###\n\n".join(texts)
+        return [
+            {"role": "system", "content": "You are an expert in identifying Indian government schemes."},
+            {"role": "user", "content": prompt.format(formatted_texts)}
+        ]
+
+    @staticmethod
+    def _parse_scheme_names(content: str, count: int) -> List[str]:
+        # Split response into lines and clean
+        scheme_names = [
+            name.strip() 
+            for name in content.strip().split('\n')
+            if name.strip()
+        ]
         
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert in identifying Indian government schemes."},
-                    {"role": "user", "content": prompt.format(formatted_texts)}
-                ],
-                temperature=0.3  # Lower temperature for more consistent naming
-            )
+        # Names pair with chunks by position, so a reply of any other length can't be matched up
+        if len(scheme_names) != count:
+            raise ValueError(f"Expected {count} scheme names, got {len(scheme_names)}")
             
-            # Split response into lines and clean
-            scheme_names = [
-                name.strip() 
-                for name in response.choices[0].message.content.strip().split('\n')
-                if name.strip()
-            ]
-            
-            # Ensure we have same number of names as input texts
-            while len(scheme_names) < len(texts):
-                scheme_names.append("Unknown Scheme")
-                
-            return scheme_names
-            
-        except Exception as e:
-            print(f"Error identifying scheme names: {e}")
-            return ["Unknown Scheme"] * len(texts)
+        return scheme_names
 
-    def analyze_schemes_with_llm(self, user_profile: UserProfile, schemes: List[Dict]) -> List[SchemeRecommendation]:
-        """Analyze schemes using LLM to find best matches."""
+    def _analysis_messages(self, user_profile: UserProfile, schemes: List[Dict]) -> List[Dict[str, str]]:
         prompt = f"""You are an expert in Indian government schemes. Analyze these schemes for this user:
 
 User Profile:
@@ -244,114 +218,200 @@ Return details for only the top 5 most relevant schemes where the user meets ALL
 DO NOT include any schemes where the user's income exceeds the scheme's limit.
 Separate each scheme with ---"""
 
-        try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an expert in Indian government schemes with strict attention to eligibility criteria."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3
-            )
-
-            # Get the response text
-            analysis = response.choices[0].message.content
-            
-            # Parse into recommendations
-            recommendations = []
-            schemes = [s.strip() for s in analysis.split('---') if s.strip()]
-            
-            for scheme_text in schemes:
-                try:
-                    lines = scheme_text.split('\n')
-                    scheme_data = {
-                        'name': '',
-                        'score': 0.0,
-                        'reason': '',
-                        'benefits': [],
-                        'eligibility_requirements': {},
-                        'eligibility_status': {},
-                        'process': []
-                    }
-                    
-                    current_section = None
-                    income_eligible = None  # Track income eligibility, None means not yet determined
+        return [
+            {"role": "system", "content": "You are an expert in Indian government schemes with strict attention to eligibility criteria."},
+            {"role": "user", "content": prompt}
+        ]
+
+    @staticmethod
+    def _parse_analysis(analysis: str) -> List[SchemeRecommendation]:
+        """Parse the analysis text into recommendations, skipping income-ineligible schemes."""
+        recommendations = []
+        schemes = [s.strip() for s in analysis.split('---') if s.strip()]
+        
+        for scheme_text in schemes:
+            try:
+                lines = scheme_text.split('\n')
+                scheme_data = {
+                    'name': '',
+                    'score': 0.0,
+                    'reason': '',
+                    'benefits': [],
+                    'eligibility_requirements': {},
+                    'eligibility_status': {},
+                    'process': []
+                }
+                
+                current_section = None
+                income_eligible = None  # Track income eligibility, None means not yet determined
+                
+                for line in lines:
+                    line = line.strip()
+                    if not line:
+                        continue
                     
-                    for line in lines:
-                        line = line.strip()
-                        if not line:
-                            continue
-                        
-                        if line.startswith('SCHEME NAME:'):
-                            scheme_data['name'] = line.replace('SCHEME NAME:', '').strip()
-                        elif line.startswith('RELEVANCE:'):
-                            try:
-                                scheme_data['score'] = float(line.replace('RELEVANCE:', '').strip())
-                            except:
-                                scheme_data['score'] = 0.5
-                        elif line.startswith('WHY RECOMMENDED:'):
-                            scheme_data['reason'] = line.replace('WHY RECOMMENDED:', '').strip()
-                        elif line.startswith('BENEFITS:'):
-                            current_section = 'benefits'
-                        elif line.startswith('ELIGIBILITY:'):
-                            current_section = 'eligibility'
-                        elif line.startswith('HOW TO APPLY:'):
-                            current_section = 'process'
-                        elif line.startswith('•') or line.startswith('*'):
-                            if current_section == 'benefits':
-                                scheme_data['benefits'].append(line.replace('•', '').replace('*', '').strip())
-                            elif current_section == 'eligibility':
-                                # Split eligibility criteria and status
-                                parts = line.replace('•', '').replace('*', '').strip().split('|')
-                                if len(parts) == 2:
-                                    criterion, status = parts[0].split(':')
-                                    criterion = criterion.strip()
-                                    requirement = status.strip()
-                                    status = parts[1].strip().lower() == 'yes'
-                                    
-                                    # Check if this is income criterion
-                                    if 'income' in criterion.lower():
-                                        income_eligible = status
-                                    
-                                    scheme_data['eligibility_requirements'][criterion] = requirement
-                                    scheme_data['eligibility_status'][criterion] = status
-                        elif line.startswith(('1.', '2.', '3.')) and current_section == 'process':
-                            scheme_data['process'].append(line.strip())
+                    if line.startswith('SCHEME NAME:'):
+                        scheme_data['name'] = line.replace('SCHEME NAME:', '').strip()
+                    elif line.startswith('RELEVANCE:'):
+                        try:
+                            scheme_data['score'] = float(line.replace('RELEVANCE:', '').strip())
+                        except:
+                            scheme_data['score'] = 0.5
+                    elif line.startswith('WHY RECOMMENDED:'):
+                        scheme_data['reason'] = line.replace('WHY RECOMMENDED:', '').strip()
+                    elif line.startswith('BENEFITS:'):
+                        current_section = 'benefits'
+                    elif line.startswith('ELIGIBILITY:'):
+                        current_section = 'eligibility'
+                    elif line.startswith('HOW TO APPLY:'):
+                        current_section = 'process'
+                    elif line.startswith('•') or line.startswith('*'):
+                        if current_section == 'benefits':
+                            scheme_data['benefits'].append(line.replace('•', '').replace('*', '').strip())
+                        elif current_section == 'eligibility':
+                            # Split eligibility criteria and status
+                            parts = line.replace('•', '').replace('*', '').strip().split('|')
+                            if len(parts) == 2:
+                                criterion, status = parts[0].split(':')
+                                criterion = criterion.strip()
+                                requirement = status.strip()
+                                status = parts[1].strip().lower() == 'yes'
+                                
+                                # Check if this is income criterion
+                                if 'income' in criterion.lower():
+                                    income_eligible = status
+                                
+                                scheme_data['eligibility_requirements'][criterion] = requirement
+                                scheme_data['eligibility_status'][criterion] = status
+                    elif line.startswith(('1.', '2.', '3.')) and current_section == 'process':
+                        scheme_data['process'].append(line.strip())
+                
+                # Only add scheme if it has a valid name and either:
+                # 1. Income is explicitly eligible (income_eligible is True)
+                # 2. No income criteria mentioned (income_eligible is None)
+                if scheme_data['name'] and (income_eligible is True or income_eligible is None):
+                    recommendations.append(SchemeRecommendation(
+                        scheme_name=scheme_data['name'],
+                        relevance_score=scheme_data['score'],
+                        benefits=scheme_data['benefits'],
+                        eligibility_requirements=scheme_data['eligibility_requirements'],
+                        eligibility_status=scheme_data['eligibility_status'],
+                        application_process=scheme_data['process'],
+                        why_recommended=scheme_data['reason']
+                    ))
                     
-                    # Only add scheme if it has a valid name and either:
-                    # 1. Income is explicitly eligible (income_eligible is True)
-                    # 2. No income criteria mentioned (income_eligible is None)
-                    if scheme_data['name'] and (income_eligible is True or income_eligible is None):
-                        recommendations.append(SchemeRecommendation(
-                            scheme_name=scheme_data['name'],
-                            relevance_score=scheme_data['score'],
-                            benefits=scheme_data['benefits'],
-                            eligibility_requirements=scheme_data['eligibility_requirements'],
-                            eligibility_status=scheme_data['eligibility_status'],
-                            application_process=scheme_data['process'],
-                            why_recommended=scheme_data['reason']
-                        ))
-                        
-                except Exception as parse_error:
-                    print(f"Error parsing scheme: {parse_error}")
-                    continue
-            
-            return recommendations
-            
-        except Exception as e:
-            print(f"Error in analyze_schemes_with_llm: {e}")
+            except Exception as parse_error:
+                print(f"Error parsing scheme: {parse_error}")
+                continue
+        
+        return recommendations
+
+    async def _complete_async(self, client, task: str, messages: List[Dict[str, str]], temperature: float) -> str:
+        response = await ROUTER.complete_async(
+            client,
+            task,
+            messages=messages,
+            temperature=temperature
+        )
+        return response.choices[0].message.content
+
+    async def _identify_schemes_async(self, client, semaphore: asyncio.Semaphore, texts: List[str]) -> List[str]:
+        # The span opens once a call slot is free, so it doesn't count time spent queued
+        async with semaphore:
+            with span("SemanticSchemeMatcher._identify_schemes_async", stage="llm", provider="openai", operation="chat"):
+                try:
+                    messages = self._identification_messages(texts)
+
+                    async def identify():
+                        content = await self._complete_async(client, "name_extraction", messages, 0.3)
+                        return self._parse_scheme_names(content, len(texts))
+
+                    return await cached_llm_call_async(
+                        "scheme_names", ROUTER.model_for("name_extraction"), 0.3, messages, identify
+                    )
+                except Exception as e:
+                    print(f"Error identifying scheme names: {e}")
+                    record_error(e)
+                    return ["Unknown Scheme"] * len(texts)
+
+    async def _analyze_batch_async(self, client, semaphore: asyncio.Semaphore, user_profile: UserProfile,
+                                   chunks: List[Tuple[str, float]]) -> List[SchemeRecommendation]:
+        """Name the schemes in one batch of chunks, then analyze them for the user."""
+        names = await self._identify_schemes_async(client, semaphore, [text for text, _ in chunks])
+        schemes = [
+            {"scheme_name": name, "details": text, "score": score}
+            for (text, score), name in zip(chunks, names) if name
+        ]
+        if not schemes:
             return []
 
+        async with semaphore:
+            with span("SemanticSchemeMatcher._analyze_batch_async", stage="llm", provider="openai", operation="chat"):
+                try:
+                    content = await self._complete_async(
+                        client, "recommendation_analysis", self._analysis_messages(user_profile, schemes), 0.3
+                    )
+                    return self._parse_analysis(content)
+                except Exception as e:
+                    print(f"Error analyzing schemes: {e}")
+                    record_error(e)
+                    return []
+
+    @staticmethod
+    def _merge_recommendations(batches: List[List[SchemeRecommendation]]) -> List[SchemeRecommendation]:
+        """Most relevant recommendations across batches, one per scheme name.
+
+        Each batch is scored by a separate analysis call, so scores from
+        different batches are compared as if they shared one scale; ranking
+        across batches is therefore approximate.
+        """
+        best = {}
+        for recommendations in batches:
+            for recommendation in recommendations:
+                key = recommendation.scheme_name.strip().lower()
+                if key not in best or recommendation.relevance_score > best[key].relevance_score:
+                    best[key] = recommendation
+        candidates = list(best.values())
+        return rank(candidates, [r.relevance_score for r in candidates], MAX_RECOMMENDATIONS)
+
+    async def get_scheme_recommendations_async(self, user_profile: UserProfile) -> List[SchemeRecommendation]:
+        """Recommendations with the LLM work split into batches that run concurrently.
+
+        Each batch of ANALYSIS_BATCH_SIZE chunks has its scheme names identified
+        and is then analyzed, so one batch's analysis overlaps the next one's
+        identification. At most MAX_CONCURRENT_LLM_CALLS calls are in flight.
+
+        The trade-off is two LLM calls per batch instead of two per request, in
+        exchange for lower latency, and relevance scores that each come from a
+        separate analysis (see _merge_recommendations). Raise ANALYSIS_BATCH_SIZE
+        to make fewer, slower calls.
+        """
+        with span("SemanticSchemeMatcher.get_scheme_recommendations", stage="recommendation"):
+            client = get_async_openai_client(api_key=os.getenv('OPENAI_API_KEY'))
+            try:
+                results = await retrieve_async(self.index, client, self.search_queries(user_profile), top_k=20)
+
+                chunks = self._relevant_chunks(results, user_profile.state)
+                if not chunks:
+                    return []
+
+                semaphore = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+                batches = [chunks[i:i + ANALYSIS_BATCH_SIZE] for i in range(0, len(chunks), ANALYSIS_BATCH_SIZE)]
+                analyses = await asyncio.gather(*(
+                    self._analyze_batch_async(client, semaphore, user_profile, batch) for batch in batches
+                ))
+                return self._merge_recommendations(analyses)
+            finally:
+                await client.close()
+
     def get_scheme_recommendations(self, user_profile: UserProfile) -> List[SchemeRecommendation]:
         """Main method to get scheme recommendations."""
-        # Get initial schemes based on semantic search
-        initial_schemes = self.get_initial_schemes(user_profile)
-        
-        # If no schemes found, return empty list
-        if not initial_schemes:
-            return []
-            
-        # Analyze schemes with LLM to get final recommendations
-        recommendations = self.analyze_schemes_with_llm(user_profile, initial_schemes)
-        
-        return recommendations 
\ No newline at end of file
+        coroutine = self.get_scheme_recommendations_async(user_profile)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+
+        # Called from code already running an event loop: run on a fresh loop in a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return submit(executor, asyncio.run, coroutine).result()
@@ -0,0 +1,96 @@
+from typing import Dict, Iterable, List
+import os
+import re
+from tqdm import tqdm
+from Python_Files.scheme_analyzer import SchemeAnalyzer
+from Python_Files.translation_cache import TranslationCache, SCHEME_TRANSLATIONS_PATH
+from Python_Files.translation_utils import LANGUAGES, _translate_concurrently
+
+CHUNK_HEADER = re.compile(r"^CHUNK \d+\n=+\n", re.MULTILINE)
+
+# Texts sent per translation wave; progress is saved to the store after each one
+INGEST_BATCH_SIZE = 200
+
+def read_chunks(chunks_dir: str) -> List[str]:
+    """Read every chunk from the *_chunks.txt files in chunks_dir."""
+    chunks = []
+    for file in sorted(os.listdir(chunks_dir)):
+        if not file.endswith('_chunks.txt'):
+            continue
+        with open(os.path.join(chunks_dir, file), 'r', encoding='utf-8') as f:
+            content = f.read()
+        chunks.extend(chunk.strip() for chunk in CHUNK_HEADER.split(content) if chunk.strip())
+    return chunks
+
+def build_catalog(chunks: Iterable[str]) -> Dict[str, Dict]:
+    """Extract the displayable fields of each scheme, keyed by scheme name."""
+    analyzer = SchemeAnalyzer()
+    catalog = {}
+    for chunk in chunks:
+        info = analyzer.extract_scheme_info(chunk)
+        if not info or not info.scheme_name:
+            continue
+        entry = catalog.setdefault(info.scheme_name, {
+            "scheme_name": info.scheme_name,
+            "summary": info.description,
+            "benefits": [],
+            "eligibility": {},
+            "documents": []
+        })
+        entry["benefits"].extend(b for b in info.benefits if b not in entry["benefits"])
+        entry["eligibility"].update(info.eligibility_criteria)
+        entry["documents"].extend(d for d in info.required_documents if d not in entry["documents"])
+    return catalog
+
+def catalog_texts(catalog: Dict[str, Dict]) -> List[str]:
+    """All distinct strings in the catalog that a page may render."""
+    texts = []
+    for entry in catalog.values():
+        texts.extend([entry["scheme_name"], entry["summary"]])
+        texts.extend(entry["benefits"])
+        for criterion, requirement in entry["eligibility"].items():
+            texts.extend([criterion, str(requirement)])
+        texts.extend(entry["documents"])
+    return list(dict.fromkeys(t for t in texts if t and t.strip()))
+
+def pretranslate(texts: List[str], store: TranslationCache, languages: Iterable[str]):
+    """Translate texts into each language, skipping anything already in the store."""
+    for lang in languages:
+        cached = store.get_many(texts, lang)
+        missing = [t for t in texts if t not in cached]
+        print(f"\n{LANGUAGES[lang]} ({lang}): {len(cached)} cached, {len(missing)} to translate")
+
+        failed = 0
+        for i in tqdm(range(0, len(missing), INGEST_BATCH_SIZE), desc=f"Translating to {lang}"):
+            batch = missing[i:i + INGEST_BATCH_SIZE]
+            translated = _translate_concurrently(batch, lang)
+            store.set_many(translated, lang)
+            failed += len(batch) - len(translated)
+
+        if failed:
+            print(f"Warning: {failed} texts could not be translated to {lang}; rerun to retry them")
+
+def main(chunks_dir: str, store_path: str = SCHEME_TRANSLATIONS_PATH):
+    """Build the scheme catalog from chunks and precompute its translations."""
+    print("Starting scheme catalog translation...")
+
+    try:
+        chunks = read_chunks(chunks_dir)
+        if not chunks:
+            print("No chunk files found!")
+            return
+
+        catalog = build_catalog(chunks)
+        texts = catalog_texts(catalog)
+        print(f"Found {len(catalog)} schemes with {len(texts)} distinct texts in {len(chunks)} chunks")
+
+        store = TranslationCache(store_path)
+        pretranslate(texts, store, [lang for lang in LANGUAGES if lang != 'en'])
+
+        print(f"\nScheme translations saved to: {store_path}")
+
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
+
+if __name__ == "__main__":
+    main(os.getenv("CHUNKS_DIR", "chunks"))
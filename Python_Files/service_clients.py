@@ -0,0 +1,650 @@
+"""Factories for the OpenAI, Pinecone and Google Translate clients, switched by SERVICE_MODE."""
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from types import SimpleNamespace
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import numpy as np
+from dotenv import load_dotenv
+from Python_Files.ann_index import build_index, load_index, DEFAULT_NPROBE
+from Python_Files.tracing import submit
+
+load_dotenv()
+
+MODES = ("live", "record", "replay", "fake")
+
+DEFAULT_FIXTURES_PATH = "data/service_fixtures.json"
+FAKE_CHUNKS_DIR = os.getenv("FAKE_CHUNKS_DIR", "chunks")
+FAKE_INDEX_PRECISION = os.getenv("FAKE_INDEX_PRECISION", "float32")
+FAKE_INDEX_TYPE = os.getenv("FAKE_INDEX_TYPE", "exact")
+FAKE_INDEX_NPROBE = int(os.getenv("FAKE_INDEX_NPROBE", DEFAULT_NPROBE))
+
+# Index saved with python -m Python_Files.ann_index; when set, VectorDBQuerier searches it instead of Pinecone
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR")
+LOCAL_INDEX_PRECISION = os.getenv("LOCAL_INDEX_PRECISION", "float32")
+# 0 keeps the nprobe the index was saved with
+LOCAL_INDEX_NPROBE = int(os.getenv("LOCAL_INDEX_NPROBE", "0"))
+
+# Bounded pool shared by all sessions for the concurrent Pinecone queries of query_many
+VECTOR_QUERY_MAX_WORKERS = int(os.getenv("VECTOR_QUERY_MAX_WORKERS", "8"))
+_vector_query_pool = ThreadPoolExecutor(max_workers=VECTOR_QUERY_MAX_WORKERS, thread_name_prefix="vector-query")
+
+# ada-002 and text-embedding-3-small both return 1536 dimensions
+FAKE_EMBEDDING_DIM = 1536
+
+# Share of each fake embedding common to all texts. Like ada-002, unrelated
+# texts then score around this cosine similarity and related ones above it.
+FAKE_EMBEDDING_BASELINE = 0.7
+
+FAKE_COMPLETION = "This is a placeholder response generated offline; no language model was called."
+
+PROVIDERS = ("openai", "pinecone", "google_translate")
+
+# Per-call transport settings (e.g. the model router's timeout); they don't change the response
+TRANSPORT_ARGS = ("timeout", "extra_headers")
+
+class MissingFixture(KeyError):
+    """A replayed request has no recorded response."""
+
+def service_mode() -> str:
+    mode = os.getenv("SERVICE_MODE", "live").lower()
+    if mode not in MODES:
+        raise ValueError(f"SERVICE_MODE must be one of {MODES}, got {mode!r}")
+    return mode
+
+def fixtures_path() -> str:
+    return os.getenv("SERVICE_FIXTURES_PATH", DEFAULT_FIXTURES_PATH)
+
+def configure(mode: str = None, fixtures: str = None, latency_ms: str = None):
+    """Set the mode, fixture file and injected latency for clients created from now on."""
+    if mode is not None:
+        os.environ["SERVICE_MODE"] = mode
+        service_mode()
+    if fixtures is not None:
+        os.environ["SERVICE_FIXTURES_PATH"] = fixtures
+    if latency_ms is not None:
+        os.environ["SERVICE_LATENCY_MS"] = latency_ms
+
+def injected_latency(provider: str) -> float:
+    """Seconds of delay added to each call to provider in replay and fake modes."""
+    setting = os.getenv("SERVICE_LATENCY_MS", "").strip()
+    if not setting:
+        return 0.0
+    if "=" not in setting:
+        return float(setting) / 1000
+    for part in setting.split(","):
+        name, _, value = part.partition("=")
+        if name.strip() == provider:
+            return float(value) / 1000
+    return 0.0
+
+def _simulate_call(provider: str):
+    delay = injected_latency(provider)
+    if delay > 0:
+        time.sleep(delay)
+
+# ---------------------------------------------------------------------------
+# Fixtures
+
+class Record(SimpleNamespace):
+    """Attribute view of a stored response that can still be dumped like an SDK model.
+
+    ``metadata`` stays a plain dict, as Pinecone returns it.
+    """
+
+    @classmethod
+    def build(cls, value: Any) -> Any:
+        if isinstance(value, dict):
+            return cls(**{key: item if key == "metadata" else cls.build(item) for key, item in value.items()})
+        if isinstance(value, list):
+            return [cls.build(item) for item in value]
+        return value
+
+    def model_dump(self, **kwargs) -> Dict[str, Any]:
+        return {key: _dump(value) for key, value in vars(self).items()}
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.model_dump()
+    if isinstance(value, list):
+        return [_dump(item) for item in value]
+    return value
+
+def request_key(kind: str, payload: Dict[str, Any]) -> str:
+    """Stable hash of a request: its kind plus every argument that affects the response."""
+    payload = {key: value for key, value in payload.items() if key not in TRANSPORT_ARGS}
+    canonical = json.dumps({"kind": kind, "payload": payload}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class FixtureStore:
+    """JSON file mapping request hashes to recorded responses."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.responses: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.responses = json.load(f)
+
+    def lookup(self, kind: str, payload: Dict[str, Any]) -> Any:
+        key = request_key(kind, payload)
+        if key not in self.responses:
+            raise MissingFixture(f"No recorded {kind} response for request {key[:12]}; record it with SERVICE_MODE=record")
+        return self.responses[key]
+
+    def record(self, kind: str, payload: Dict[str, Any], response: Any):
+        with self._lock:
+            self.responses[request_key(kind, payload)] = response
+
+    def save(self):
+        """Write the responses, merged with whatever another process or import saved meanwhile."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            merged = {}
+            if os.path.exists(self.path):
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    merged = json.load(f)
+            merged.update(self.responses)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(merged, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+_stores: Dict[str, FixtureStore] = {}
+_stores_lock = threading.Lock()
+
+def get_fixture_store(path: str = None) -> FixtureStore:
+    """The shared store for a fixture file; in record mode it is saved at exit."""
+    path = path or fixtures_path()
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = FixtureStore(path)
+            if service_mode() == "record":
+                atexit.register(_stores[path].save)
+        return _stores[path]
+
+def save_fixtures():
+    """Save every store opened by this process."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.save()
+
+class _ReplayStream:
+    """A recorded stream of chunks, usable like the SDK's Stream (iterable and a context manager)."""
+
+    def __init__(self, chunks: List[Any]):
+        self._chunks = chunks
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._chunks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def close(self):
+        pass
+
+class _RecordingStream:
+    """Pass a live stream through while keeping its chunks; they are stored once it is exhausted."""
+
+    def __init__(self, stream, on_complete: Callable[[List[Any]], None]):
+        self._stream = stream
+        self._on_complete = on_complete
+
+    def __iter__(self) -> Iterator[Any]:
+        chunks = []
+        for chunk in self._stream:
+            chunks.append(chunk.model_dump())
+            yield chunk
+        self._on_complete(chunks)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        if hasattr(self._stream, "close"):
+            self._stream.close()
+
+class _FixtureEndpoint:
+    """One client method: records through the live method, or replays from the store."""
+
+    def __init__(self, store: FixtureStore, provider: str, kind: str, live_method: Callable = None,
+                 serialize: Callable = None):
+        self.store = store
+        self.provider = provider
+        self.kind = kind
+        self.live_method = live_method
+        self.serialize = serialize or (lambda response: response.model_dump())
+
+    def __call__(self, **kwargs):
+        if self.live_method is None:
+            _simulate_call(self.provider)
+            response = self.store.lookup(self.kind, kwargs)
+            if kwargs.get("stream"):
+                return _ReplayStream(Record.build(response))
+            return Record.build(response)
+
+        response = self.live_method(**kwargs)
+        if kwargs.get("stream"):
+            return _RecordingStream(response, lambda chunks: self.store.record(self.kind, kwargs, chunks))
+        self.store.record(self.kind, kwargs, self.serialize(response))
+        return response
+
+class FixtureOpenAI:
+    """The parts of the OpenAI client the app uses: embeddings and chat completions."""
+
+    def __init__(self, store: FixtureStore, live=None):
+        self.embeddings = SimpleNamespace(create=_FixtureEndpoint(
+            store, "openai", "openai.embeddings", live.embeddings.create if live else None
+        ))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=_FixtureEndpoint(
+            store, "openai", "openai.chat", live.chat.completions.create if live else None
+        )))
+
+def _serialize_query_response(response) -> Dict[str, Any]:
+    return {"matches": [
+        {"id": match.id, "score": match.score, "metadata": dict(match.metadata or {})}
+        for match in response.matches
+    ]}
+
+class FixtureIndex:
+    """A Pinecone index that only supports ``query``."""
+
+    def __init__(self, store: FixtureStore, live=None):
+        self.query = _FixtureEndpoint(
+            store, "pinecone", "pinecone.query", live.query if live else None, serialize=_serialize_query_response
+        )
+
+class FixtureTranslator:
+    """GoogleTranslator's ``translate`` through the fixture store."""
+
+    def __init__(self, store: FixtureStore, source: str, target: str, live=None):
+        self.source = source
+        self.target = target
+        self._endpoint = _FixtureEndpoint(
+            store, "google_translate", "google_translate.translate",
+            (lambda source, target, text: live.translate(text)) if live else None,
+            serialize=lambda response: response
+        )
+
+    def translate(self, text: str, **kwargs) -> str:
+        return self._endpoint(source=self.source, target=self.target, text=text)
+
+# ---------------------------------------------------------------------------
+# Fakes
+
+_TOKEN = re.compile(r"\w+")
+
+@lru_cache(maxsize=None)
+def _baseline_vector(dim: int) -> np.ndarray:
+    vector = np.random.default_rng(0).standard_normal(dim)
+    return vector / np.linalg.norm(vector)
+
+@lru_cache(maxsize=100000)
+def _token_slot(token: str, dim: int) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little") % dim
+
+def fake_embedding(text: str, dim: int = FAKE_EMBEDDING_DIM) -> np.ndarray:
+    """Deterministic unit vector: a fixed baseline plus the text's hashed bag of words.
+
+    Texts sharing words score higher; unrelated texts score FAKE_EMBEDDING_BASELINE.
+    """
+    baseline = _baseline_vector(dim)
+    words = np.zeros(dim)
+    for token in _TOKEN.findall(text.lower()):
+        words[_token_slot(token, dim)] += 1.0
+    words -= words.dot(baseline) * baseline
+    norm = np.linalg.norm(words)
+    if norm == 0:
+        return baseline.copy()
+    return np.sqrt(FAKE_EMBEDDING_BASELINE) * baseline + np.sqrt(1 - FAKE_EMBEDDING_BASELINE) * words / norm
+
+_canned_completions: List[Tuple[re.Pattern, str]] = []
+
+def register_canned_completion(pattern: str, content: str):
+    """Answer fake chat completions whose last message matches pattern with content."""
+    _canned_completions.append((re.compile(pattern, re.IGNORECASE | re.DOTALL), content))
+
+def _canned_reply(messages: List[Dict[str, Any]]) -> Optional[str]:
+    prompt = str(messages[-1].get("content", "")) if messages else ""
+    for pattern, content in reversed(_canned_completions):
+        if pattern.search(prompt):
+            return content
+    return None
+
+def _schema_placeholder(schema: Dict[str, Any], definitions: Dict[str, Any] = None) -> Any:
+    """Smallest value valid against a JSON schema: required properties only, empty arrays, zeros."""
+    definitions = definitions if definitions is not None else schema.get("$defs", {})
+    if "$ref" in schema:
+        return _schema_placeholder(definitions[schema["$ref"].rsplit("/", 1)[-1]], definitions)
+    if "anyOf" in schema:
+        return _schema_placeholder(schema["anyOf"][0], definitions)
+    kind = schema.get("type")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {name: _schema_placeholder(properties[name], definitions) for name in schema.get("required", [])}
+    return {"array": [], "string": "", "integer": 0, "number": 0.0, "boolean": False}.get(kind)
+
+class _FakeEmbeddings:
+    def create(self, input, model: str = "text-embedding-ada-002", dimensions: int = None, **kwargs):
+        _simulate_call("openai")
+        texts = [input] if isinstance(input, str) else list(input)
+        dim = dimensions or FAKE_EMBEDDING_DIM
+        tokens = sum(len(_TOKEN.findall(text)) for text in texts)
+        return Record.build({
+            "object": "list",
+            "model": model,
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(text, dim).tolist()}
+                for i, text in enumerate(texts)
+            ],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+        })
+
+class _FakeChatCompletions:
+    def create(self, messages: List[Dict[str, Any]], model: str = "gpt-4o-mini", stream: bool = False, **kwargs):
+        _simulate_call("openai")
+        canned = _canned_reply(messages)
+        tool_choice = kwargs.get("tool_choice")
+        if isinstance(tool_choice, dict):
+            # Forced function call: canned arguments, or the smallest valid ones
+            name = tool_choice["function"]["name"]
+            parameters = next(tool["function"]["parameters"] for tool in kwargs.get("tools", [])
+                              if tool["function"]["name"] == name)
+            arguments = canned if canned is not None else json.dumps(_schema_placeholder(parameters))
+            return Record.build({
+                "id": "fake-completion",
+                "object": "chat.completion",
+                "created": 0,
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": "tool_calls", "message": {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{"id": "fake-call", "type": "function",
+                                    "function": {"name": name, "arguments": arguments}}]
+                }}]
+            })
+
+        content = canned if canned is not None else FAKE_COMPLETION
+        if stream:
+            pieces = re.findall(r"\S+\s*", content)
+            chunks = [
+                {"id": "fake-completion", "object": "chat.completion.chunk", "created": 0, "model": model,
+                 "choices": [{"index": 0, "delta": {"role": "assistant", "content": piece}, "finish_reason": None}]}
+                for piece in pieces
+            ]
+            chunks.append({"id": "fake-completion", "object": "chat.completion.chunk", "created": 0, "model": model,
+                           "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+            return _ReplayStream(Record.build(chunks))
+
+        prompt_tokens = sum(len(_TOKEN.findall(str(m.get("content", "")))) for m in messages)
+        completion_tokens = len(_TOKEN.findall(content))
+        return Record.build({
+            "id": "fake-completion",
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        })
+
+class FakeOpenAI:
+    """Offline OpenAI client: hashed embeddings and canned chat completions."""
+
+    def __init__(self):
+        self.embeddings = _FakeEmbeddings()
+        self.chat = SimpleNamespace(completions=_FakeChatCompletions())
+
+_CHUNK_HEADER = re.compile(r"^CHUNK (\d+)\n=+\n", re.MULTILINE)
+
+def read_chunk_records(chunks_dir: str) -> List[Dict[str, Any]]:
+    """Metadata records, shaped like the ones in Pinecone, for every chunk in chunks_dir."""
+    records = []
+    if not os.path.isdir(chunks_dir):
+        return records
+    for file in sorted(os.listdir(chunks_dir)):
+        if not file.endswith('_chunks.txt'):
+            continue
+        doc_name = file[:-len('_chunks.txt')]
+        with open(os.path.join(chunks_dir, file), 'r', encoding='utf-8') as f:
+            parts = _CHUNK_HEADER.split(f.read())
+        # split() alternates text before the first header, chunk number, chunk text, ...
+        for number, text in zip(parts[1::2], parts[2::2]):
+            text = text.strip()
+            if not text:
+                continue
+            records.append({
+                "chunk_id": f"{doc_name}_chunk_{int(number):04d}",
+                "source_file": doc_name,
+                "chunk_index": int(number),
+                "scheme_name": text.split("\n", 1)[0].strip(),
+                "text": text
+            })
+    return records
+
+# Pinecone metadata filter operators; a bare value means $eq
+_FILTER_OPERATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$gt": lambda value, operand: value > operand,
+    "$gte": lambda value, operand: value >= operand,
+    "$lt": lambda value, operand: value < operand,
+    "$lte": lambda value, operand: value <= operand,
+    "$in": lambda value, operand: value in operand,
+    "$nin": lambda value, operand: value not in operand,
+}
+
+def metadata_matches(metadata: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    """Whether metadata passes a Pinecone metadata filter (the operators above, $and and $or)."""
+    for key, condition in filter.items():
+        if key == "$and":
+            passed = all(metadata_matches(metadata, part) for part in condition)
+        elif key == "$or":
+            passed = any(metadata_matches(metadata, part) for part in condition)
+        else:
+            if not isinstance(condition, dict):
+                condition = {"$eq": condition}
+            if key not in metadata:
+                # Only negative conditions hold for a missing field
+                passed = all(operator in ("$ne", "$nin") for operator in condition)
+            else:
+                passed = all(_FILTER_OPERATORS[operator](metadata[key], operand)
+                             for operator, operand in condition.items())
+        if not passed:
+            return False
+    return True
+
+class LocalVectorIndex:
+    """Pinecone-shaped query and query_many over an in-process index (see local_index and ann_index)."""
+
+    def __init__(self, index):
+        self.index = index
+
+    def query(self, vector, top_k: int = 10, include_metadata: bool = False, filter: Dict[str, Any] = None,
+              **kwargs):
+        return Record.build({"matches": self.index.matches(vector, top_k, include_metadata, self._allowed(filter))})
+
+    def query_many(self, vectors, top_k: int = 10, filter: Dict[str, Any] = None, include_metadata: bool = False):
+        """query() for every vector, as one call scored in one matrix product."""
+        return [
+            Record.build({"matches": matches})
+            for matches in self.index.matches_many(vectors, top_k, include_metadata, self._allowed(filter))
+        ]
+
+    def _allowed(self, filter: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Rows (in index order) passing filter, or None for no filter."""
+        if not filter:
+            return None
+        records = self.index.records
+        return np.fromiter((metadata_matches(record, filter) for record in records), dtype=bool, count=len(records))
+
+class FakeIndex(LocalVectorIndex):
+    """Offline Pinecone index: cosine search over fake embeddings of the local chunks.
+
+    Scores on FAKE_INDEX_PRECISION (float32, float16 or int8; see local_index).
+    FAKE_INDEX_TYPE selects exact search or an approximate ivf or faiss index
+    probing FAKE_INDEX_NPROBE lists (see ann_index).
+    """
+
+    def __init__(self, chunks_dir: str = FAKE_CHUNKS_DIR, precision: str = None, index_type: str = None):
+        self.records = read_chunk_records(chunks_dir)
+        if self.records:
+            vectors = np.vstack([fake_embedding(record["text"]) for record in self.records]).astype(np.float32)
+        else:
+            vectors = np.zeros((0, FAKE_EMBEDDING_DIM), dtype=np.float32)
+        super().__init__(build_index(vectors, self.records, index_type or FAKE_INDEX_TYPE,
+                                     precision or FAKE_INDEX_PRECISION, FAKE_INDEX_NPROBE))
+
+    def query(self, vector, top_k: int = 10, include_metadata: bool = False, filter: Dict[str, Any] = None,
+              **kwargs):
+        _simulate_call("pinecone")
+        return super().query(vector, top_k, include_metadata, filter)
+
+    def query_many(self, vectors, top_k: int = 10, filter: Dict[str, Any] = None, include_metadata: bool = False):
+        _simulate_call("pinecone")
+        return super().query_many(vectors, top_k, filter, include_metadata)
+
+class FakeTranslator:
+    """Offline translator: tags each line with the target language, keeping line structure."""
+
+    def __init__(self, source: str = "auto", target: str = "en"):
+        self.source = source
+        self.target = target
+
+    def translate(self, text: str, **kwargs) -> str:
+        _simulate_call("google_translate")
+        if self.target == "en":
+            return text
+        return "\n".join(f"[{self.target}] {line}" if line.strip() else line for line in text.split("\n"))
+
+_fake_index: Optional[FakeIndex] = None
+_fake_index_lock = threading.Lock()
+
+def _get_fake_index() -> FakeIndex:
+    global _fake_index
+    with _fake_index_lock:
+        if _fake_index is None:
+            _fake_index = FakeIndex()
+        return _fake_index
+
+# ---------------------------------------------------------------------------
+# Factories
+
+def get_openai_client(**kwargs):
+    """OpenAI client for the current mode; kwargs go to the live client."""
+    mode = service_mode()
+    if mode == "fake":
+        return FakeOpenAI()
+    if mode == "replay":
+        return FixtureOpenAI(get_fixture_store())
+    from openai import OpenAI
+    live = OpenAI(**kwargs)
+    return FixtureOpenAI(get_fixture_store(), live=live) if mode == "record" else live
+
+class _AsyncEndpoint:
+    def __init__(self, method: Callable):
+        self._method = method
+
+    async def __call__(self, **kwargs):
+        return await asyncio.to_thread(self._method, **kwargs)
+
+class AsyncClientAdapter:
+    """AsyncOpenAI-shaped wrapper that runs a sync (fixture or fake) client's calls on worker threads."""
+
+    def __init__(self, client):
+        self.embeddings = SimpleNamespace(create=_AsyncEndpoint(client.embeddings.create))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=_AsyncEndpoint(client.chat.completions.create)))
+
+    async def close(self):
+        pass
+
+def get_async_openai_client(**kwargs):
+    """AsyncOpenAI client for the current mode.
+
+    Its connection pool belongs to the event loop it is first used on, so create
+    one per loop and close it when the loop is done.
+    """
+    if service_mode() != "live":
+        return AsyncClientAdapter(get_openai_client(**kwargs))
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(**kwargs)
+
+def get_chat_model(**kwargs):
+    """LangChain ChatOpenAI whose requests go through get_openai_client."""
+    from langchain_openai import ChatOpenAI
+    if service_mode() == "live":
+        return ChatOpenAI(**kwargs)
+    # The async client ChatOpenAI builds alongside needs some key, even if unused
+    kwargs.setdefault("api_key", os.getenv("OPENAI_API_KEY") or "offline")
+    return ChatOpenAI(client=get_openai_client().chat.completions, **kwargs)
+
+def get_pinecone_index(name: str = None):
+    """Pinecone index for the current mode (default: PINECONE_INDEX_NAME)."""
+    mode = service_mode()
+    if mode == "fake":
+        return _get_fake_index()
+    if mode == "replay":
+        return FixtureIndex(get_fixture_store())
+    from pinecone import Pinecone
+    live = Pinecone(api_key=os.getenv('PINECONE_API_KEY')).Index(name or os.getenv('PINECONE_INDEX_NAME'))
+    return FixtureIndex(get_fixture_store(), live=live) if mode == "record" else live
+
+@lru_cache(maxsize=None)
+def get_local_index(directory: str = None) -> LocalVectorIndex:
+    """Index saved in directory (default: LOCAL_INDEX_DIR), loaded once per process."""
+    return LocalVectorIndex(load_index(directory or LOCAL_INDEX_DIR, LOCAL_INDEX_PRECISION, LOCAL_INDEX_NPROBE or None))
+
+def query_many(index, vectors, top_k: int = 10, filter: Dict[str, Any] = None,
+               include_metadata: bool = False) -> List[Any]:
+    """Query responses (each with .matches) for every vector, in order.
+
+    The fake index scores all vectors in one matrix product. A Pinecone index
+    (live, recording or replaying) gets the queries concurrently, so N queries
+    take about as long as the slowest one rather than N round trips.
+    """
+    if hasattr(index, "query_many"):
+        return index.query_many(vectors, top_k=top_k, filter=filter, include_metadata=include_metadata)
+    requests = []
+    for vector in vectors:
+        request = {
+            "vector": vector.tolist() if isinstance(vector, np.ndarray) else list(vector),
+            "top_k": top_k,
+            "include_metadata": include_metadata
+        }
+        if filter:
+            request["filter"] = filter
+        requests.append(request)
+    if len(requests) <= 1:
+        return [index.query(**request) for request in requests]
+    futures = [submit(_vector_query_pool, index.query, **request) for request in requests]
+    return [future.result() for future in futures]
+
+def get_translator(source: str = "auto", target: str = "en"):
+    """Translator with GoogleTranslator's translate(text) for the current mode."""
+    mode = service_mode()
+    if mode == "fake":
+        return FakeTranslator(source, target)
+    if mode == "replay":
+        return FixtureTranslator(get_fixture_store(), source, target)
+    from deep_translator import GoogleTranslator
+    live = GoogleTranslator(source=source, target=target)
+    return FixtureTranslator(get_fixture_store(), source, target, live=live) if mode == "record" else live
@@ -0,0 +1,51 @@
+"""Structured LLM output through OpenAI function calling.
+
+The model is forced to call a single function whose parameters are a Pydantic
+model's JSON schema, and the call's arguments are validated back into that
+model. This replaces prompting for a text layout and re-parsing it line by line.
+"""
+from typing import Any, Dict, List, Type, TypeVar
+from pydantic import BaseModel, ValidationError
+
+T = TypeVar("T", bound=BaseModel)
+
+class StructuredOutputError(ValueError):
+    """The model did not return arguments matching the requested schema."""
+
+def compact_schema(schema: Any) -> Any:
+    """JSON schema without the titles Pydantic adds to every model and field; they only cost prompt tokens."""
+    if isinstance(schema, dict):
+        # A property that happens to be called "title" maps to a dict, not a string, and is kept
+        return {key: compact_schema(value) for key, value in schema.items()
+                if not (key == "title" and isinstance(value, str))}
+    if isinstance(schema, list):
+        return [compact_schema(item) for item in schema]
+    return schema
+
+def function_tool(model: Type[BaseModel], name: str, description: str) -> Dict[str, Any]:
+    """Chat completions tool definition whose parameters are model's schema."""
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": compact_schema(model.model_json_schema())
+        }
+    }
+
+def create_structured(client, output_model: Type[T], messages: List[Dict[str, str]], name: str, description: str,
+                      **completion_kwargs) -> T:
+    """Run a chat completion that must answer by calling `name` with output_model's fields."""
+    response = client.chat.completions.create(
+        messages=messages,
+        tools=[function_tool(output_model, name, description)],
+        tool_choice={"type": "function", "function": {"name": name}},
+        **completion_kwargs
+    )
+    tool_calls = response.choices[0].message.tool_calls or []
+    if not tool_calls:
+        raise StructuredOutputError(f"Model did not call {name}")
+    try:
+        return output_model.model_validate_json(tool_calls[0].function.arguments)
+    except ValidationError as e:
+        raise StructuredOutputError(f"Invalid {name} arguments: {e}") from e
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+import unittest
+import sys
+import os
+import importlib.util
+import tempfile
+import numpy as np
+
+# Add the parent directory to the Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Python_Files.local_index import LocalIndex, normalize_rows
+from Python_Files.ann_index import (FaissIndex, IVFIndex, assign_lists, build_index, default_n_lists, load_index,
+                                    train_centroids)
+
+def _clustered(rows: int = 400, dim: int = 32, clusters: int = 8, seed: int = 0) -> np.ndarray:
+    """Embeddings scattered around a few random directions, like topics in a corpus."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return (centers[rng.integers(clusters, size=rows)] + 0.3 * rng.normal(size=(rows, dim))).astype(np.float32)
+
+def _records(rows: int):
+    return [{"chunk_id": f"chunk_{i}", "row": i} for i in range(rows)]
+
+class TestClustering(unittest.TestCase):
+    def test_default_n_lists(self):
+        self.assertEqual(default_n_lists(1), 1)
+        self.assertEqual(default_n_lists(10), 10)
+        self.assertEqual(default_n_lists(10000), 400)
+
+    def test_centroids_are_unit_rows(self):
+        vectors = normalize_rows(_clustered())
+        centroids = train_centroids(vectors, 8)
+        self.assertEqual(centroids.shape, (8, vectors.shape[1]))
+        np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, rtol=1e-5)
+
+    def test_rows_go_to_the_closest_centroid(self):
+        vectors = normalize_rows(_clustered(rows=50))
+        centroids = train_centroids(vectors, 4)
+        assignment = assign_lists(vectors, centroids)
+        np.testing.assert_array_equal(assignment, np.argmax(vectors @ centroids.T, axis=1))
+
+class TestIVFIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.embeddings = _clustered()
+        cls.records = _records(len(cls.embeddings))
+        cls.exact = LocalIndex.build(cls.embeddings, cls.records)
+        cls.index = IVFIndex.build(cls.embeddings, cls.records, n_lists=16, nprobe=4)
+        cls.queries = _clustered(rows=20, seed=1)
+
+    def _chunk_ids(self, index, rows):
+        return [index.records[row]["chunk_id"] for row in rows.tolist()]
+
+    def test_lists_partition_the_rows(self):
+        self.assertEqual(self.index.n_lists, 16)
+        self.assertEqual(self.index.list_offsets[0], 0)
+        self.assertEqual(self.index.list_offsets[-1], len(self.records))
+        self.assertTrue(np.all(np.diff(self.index.list_offsets) >= 0))
+        self.assertEqual(sorted(record["row"] for record in self.index.records), list(range(len(self.records))))
+        # Every stored row sits in the list of its closest centroid
+        assignment = assign_lists(self.index.vectors, self.index.centroids)
+        for i in range(self.index.n_lists):
+            start, stop = self.index.list_offsets[i], self.index.list_offsets[i + 1]
+            self.assertTrue(np.all(assignment[start:stop] == i))
+
+    def test_probing_every_list_is_exact(self):
+        for query in self.queries:
+            rows, scores = self.index.search(query, top_k=10, nprobe=self.index.n_lists)
+            exact_rows, exact_scores = self.exact.search(query, top_k=10)
+            self.assertEqual(self._chunk_ids(self.index, rows), self._chunk_ids(self.exact, exact_rows))
+            np.testing.assert_allclose(scores, exact_scores, rtol=1e-5)
+
+    def test_recall_with_few_lists_probed(self):
+        found = total = 0
+        for query in self.queries:
+            rows, _ = self.index.search(query, top_k=10)
+            exact_rows, _ = self.exact.search(query, top_k=10)
+            found += len(set(self._chunk_ids(self.index, rows)) & set(self._chunk_ids(self.exact, exact_rows)))
+            total += 10
+        self.assertGreaterEqual(found / total, 0.8)
+
+    def test_quantized_ivf_reranks(self):
+        index = IVFIndex.build(self.embeddings, self.records, precision="int8", n_lists=16, nprobe=16)
+        for query in self.queries[:5]:
+            rows, scores = index.search(query, top_k=5)
+            unit = index.vectors[rows] @ (query / np.linalg.norm(query))
+            np.testing.assert_allclose(scores, unit, rtol=1e-5)
+
+    def test_allowed_rows(self):
+        allowed = np.array([record["row"] % 2 == 0 for record in self.index.records])
+        rows, _ = self.index.search(self.queries[0], top_k=10, allowed=allowed, nprobe=self.index.n_lists)
+        self.assertEqual(len(rows), 10)
+        self.assertTrue(all(self.index.records[row]["row"] % 2 == 0 for row in rows.tolist()))
+
+    def test_search_many_matches_search(self):
+        for (rows, scores), query in zip(self.index.search_many(self.queries, top_k=5), self.queries):
+            single_rows, single_scores = self.index.search(query, top_k=5)
+            self.assertEqual(rows.tolist(), single_rows.tolist())
+            np.testing.assert_allclose(scores, single_scores)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.index.save(directory)
+            loaded = IVFIndex.load(directory)
+            self.assertEqual(loaded.nprobe, 4)
+            np.testing.assert_array_equal(loaded.list_offsets, self.index.list_offsets)
+            query = self.queries[0]
+            self.assertEqual(loaded.search(query, top_k=5)[0].tolist(), self.index.search(query, top_k=5)[0].tolist())
+            # The same files load as an exact index over the rows in list order
+            plain = LocalIndex.load(directory)
+            exact_rows, _ = self.exact.search(query, top_k=5)
+            self.assertEqual(self._chunk_ids(plain, plain.search(query, top_k=5)[0]),
+                             self._chunk_ids(self.exact, exact_rows))
+            del loaded, plain
+
+    def test_mismatched_offsets(self):
+        with self.assertRaises(ValueError):
+            IVFIndex(self.index.vectors, self.index.records, self.index.centroids, [0, len(self.records)])
+
+class TestBuildIndex(unittest.TestCase):
+    def test_index_types(self):
+        embeddings = _clustered(rows=60)
+        records = _records(60)
+        self.assertIs(type(build_index(embeddings, records)), LocalIndex)
+        index = build_index(embeddings, records, "ivf", precision="float16", nprobe=3, n_lists=6)
+        self.assertIsInstance(index, IVFIndex)
+        self.assertEqual((index.n_lists, index.nprobe, index.precision), (6, 3, "float16"))
+
+    def test_empty_corpus_is_exact(self):
+        self.assertIs(type(build_index(np.empty((0, 8)), [], "ivf")), LocalIndex)
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            build_index(_clustered(rows=10), _records(10), "hnsw")
+
+    def test_load_index_picks_the_saved_type(self):
+        embeddings = _clustered(rows=60)
+        records = _records(60)
+        for index_type, expected in (("exact", LocalIndex), ("ivf", IVFIndex)):
+            with self.subTest(index_type=index_type), tempfile.TemporaryDirectory() as directory:
+                build_index(embeddings, records, index_type, nprobe=3, n_lists=6).save(directory)
+                loaded = load_index(directory, precision="int8")
+                self.assertIs(type(loaded), expected)
+                self.assertEqual(loaded.precision, "int8")
+                if index_type == "ivf":
+                    self.assertEqual(loaded.nprobe, 3)
+                    self.assertEqual(load_index(directory, nprobe=5).nprobe, 5)
+                del loaded
+
+@unittest.skipUnless(importlib.util.find_spec("faiss"), "faiss is not installed")
+class TestFaissIndex(unittest.TestCase):
+    def test_probing_every_list_is_exact(self):
+        embeddings = _clustered()
+        records = _records(len(embeddings))
+        exact = LocalIndex.build(embeddings, records)
+        index = FaissIndex.build(embeddings, records, n_lists=8)
+        for query in _clustered(rows=5, seed=1):
+            rows, _ = index.search(query, top_k=5, nprobe=8)
+            self.assertEqual(rows.tolist(), exact.search(query, top_k=5)[0].tolist())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+import unittest
+import sys
+import os
+
+# Add the parent directory to the Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Python_Files.criteria_rules import (extract_criteria, parse_amount, CONFIDENCE_THRESHOLD, EXPLICIT,
+                                         WEAK_EXPLICIT, NOT_MENTIONED, CONFLICTING, UNEXPLAINED)
+
+def _field(text: str, name: str):
+    extraction = extract_criteria(text)
+    return extraction.criteria[name], extraction.field_confidence[name]
+
+class TestAmounts(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(parse_amount("2.5", "lakh"), 250000)
+        self.assertEqual(parse_amount("1,20,000", None), 120000)
+        self.assertEqual(parse_amount("1", "crore"), 10000000)
+        self.assertEqual(parse_amount("50", "thousand"), 50000)
+
+class TestIncome(unittest.TestCase):
+    def test_upper_limit(self):
+        cases = {
+            "Annual family income should be less than Rs. 2.5 lakh.": 250000,
+            "Family income not exceeding Rs. 8 lakh per annum.": 800000,
+            "The annual income of the family must not exceed ₹ 3,00,000.": 300000,
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(_field(text, "income_range"), ((None, expected), EXPLICIT))
+
+    def test_lower_limit(self):
+        self.assertEqual(_field("Annual income of more than Rs. 1 lakh.", "income_range"), ((100000, None), EXPLICIT))
+
+    def test_range(self):
+        self.assertEqual(_field("Annual income between Rs. 1 lakh and Rs. 3 lakh.", "income_range"),
+                         ((100000, 300000), EXPLICIT))
+
+    def test_monthly_limit_is_annualised(self):
+        self.assertEqual(_field("Monthly income below Rs. 10,000.", "income_range"), ((None, 120000), EXPLICIT))
+
+    def test_negated_limits_flip(self):
+        cases = {
+            "Annual family income should not be more than Rs. 3 Lakh.": (None, 300000),
+            "Family income should not be above Rs. 2 lakh.": (None, 200000),
+            "Income should not be less than Rs. 1 lakh.": (100000, None),
+            "Annual income must not be below Rs. 50,000.": (50000, None),
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(_field(text, "income_range"), (expected, EXPLICIT))
+
+    def test_second_amount_is_distrusted(self):
+        text = "Annual income below Rs. 1.5 lakh in rural areas and Rs. 2 lakh in urban areas."
+        self.assertEqual(_field(text, "income_range")[1], CONFLICTING)
+
+    def test_unmatched_income_wording(self):
+        self.assertEqual(_field("An income certificate is required.", "income_range"), ((None, None), UNEXPLAINED))
+
+    def test_not_mentioned(self):
+        self.assertEqual(_field("Free coaching for competitive exams.", "income_range"), ((None, None), NOT_MENTIONED))
+
+class TestAge(unittest.TestCase):
+    def test_range(self):
+        self.assertEqual(_field("Applicants aged 18 to 40 years.", "age_range"), ((18, 40), EXPLICIT))
+        self.assertEqual(_field("Candidates between 21 and 35 years of age.", "age_range"), ((21, 35), EXPLICIT))
+
+    def test_minimum(self):
+        self.assertEqual(_field("Applicants aged above 60 years.", "age_range"), ((60, None), EXPLICIT))
+        self.assertEqual(_field("Age 18 years and above.", "age_range"), ((18, None), EXPLICIT))
+
+    def test_maximum(self):
+        self.assertEqual(_field("The applicant's age should not exceed 45 years.", "age_range"), ((None, 45), EXPLICIT))
+        self.assertEqual(_field("Age below 14 years.", "age_range"), ((None, 14), EXPLICIT))
+
+    def test_negated_limits_flip(self):
+        cases = {
+            "The age should not be more than 35 years.": (None, 35),
+            "Applicant's age should not be above 60 years of age.": (None, 60),
+            "Applicant age must not be below 21 years.": (21, None),
+            "Age should not be less than 18 years and not more than 40 years.": (18, 40),
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(_field(text, "age_range"), (expected, EXPLICIT))
+
+    def test_senior_citizens(self):
+        self.assertEqual(_field("Pension for senior citizens.", "age_range"), ((60, None), EXPLICIT))
+
+    def test_years_without_age_word(self):
+        # Could be the age of a vehicle or a building
+        self.assertEqual(_field("Vehicles more than 15 years old.", "age_range"), ((None, None), UNEXPLAINED))
+
+    def test_not_mentioned(self):
+        self.assertEqual(_field("Subsidy on drip irrigation.", "age_range"), ((None, None), NOT_MENTIONED))
+
+class TestGender(unittest.TestCase):
+    def test_female_only(self):
+        self.assertEqual(_field("This scheme is only for women.", "eligible_genders"), (["Female"], EXPLICIT))
+
+    def test_female_group_in_title(self):
+        self.assertEqual(_field("Girl Child Education Scheme\nSupport for schooling.", "eligible_genders"),
+                         (["Female"], EXPLICIT))
+
+    def test_for_women_is_weak(self):
+        self.assertEqual(_field("Loans for farmers\nA special window for women.", "eligible_genders"),
+                         (["Female"], WEAK_EXPLICIT))
+
+    def test_male_only(self):
+        self.assertEqual(_field("The applicant must be a male.", "eligible_genders"), (["Male"], EXPLICIT))
+
+    def test_passing_mention(self):
+        self.assertEqual(_field("Benefits reach mothers and children.", "eligible_genders"), (["All"], UNEXPLAINED))
+
+class TestCategories(unittest.TestCase):
+    def test_restricted(self):
+        self.assertEqual(_field("Applicants belonging to SC/ST communities.", "eligible_categories"),
+                         (["SC", "ST"], EXPLICIT))
+
+    def test_target_group(self):
+        self.assertEqual(_field("Scholarships for OBC students.", "eligible_categories"), (["OBC"], WEAK_EXPLICIT))
+
+    def test_abbreviation_in_a_word_is_ignored(self):
+        self.assertEqual(_field("The first step is to register.", "eligible_categories"), (["All"], NOT_MENTIONED))
+
+class TestStates(unittest.TestCase):
+    def test_residency(self):
+        self.assertEqual(_field("Scheme details\nApplicant must be a permanent resident of Bihar.", "eligible_states"),
+                         (["Bihar"], EXPLICIT))
+
+    def test_alias(self):
+        self.assertEqual(_field("Scheme details\nThe applicant should be a domicile of Orissa.", "eligible_states"),
+                         (["Odisha"], EXPLICIT))
+
+    def test_nationwide(self):
+        self.assertEqual(_field("Scheme details\nAvailable in Kerala and across the country.", "eligible_states"),
+                         (["All"], NOT_MENTIONED))
+
+class TestConfidence(unittest.TestCase):
+    def test_weakest_field_decides(self):
+        extraction = extract_criteria("Annual income below Rs. 2.5 lakh.")
+        self.assertTrue(extraction.confident)
+        extraction = extract_criteria("Annual income below Rs. 2.5 lakh. An income certificate and caste details are needed.")
+        self.assertEqual(extraction.confidence, UNEXPLAINED)
+        self.assertLess(extraction.confidence, CONFIDENCE_THRESHOLD)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+import unittest
+import sys
+import os
+import asyncio
+import tempfile
+from unittest import mock
+
+# Add the parent directory to the Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Python_Files import llm_cache
+from Python_Files.llm_cache import LLMCache, cached_llm_call, cached_llm_call_async, note_answering_model
+
+class TestLLMCacheEviction(unittest.TestCase):
+    """Size bounds of the memory and disk tiers."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = LLMCache(os.path.join(self._tmp.name, "cache.sqlite3"), memory_entries=2, disk_entries=10)
+
+    def tearDown(self):
+        self.cache._conn.close()
+        self._tmp.cleanup()
+
+    def _disk_keys(self):
+        return {row[0] for row in self.cache._conn.execute("SELECT key FROM llm_results")}
+
+    def test_memory_keeps_most_recently_used(self):
+        for key in ("a", "b", "c"):
+            self.cache.set(key, key)
+        self.assertEqual(list(self.cache._memory), ["b", "c"])
+        # Evicted from memory, still served from disk
+        self.assertEqual(self.cache.get("a"), "a")
+        self.assertEqual(list(self.cache._memory), ["c", "a"])
+
+    def test_disk_overflow_drops_least_recently_used(self):
+        with mock.patch("Python_Files.llm_cache.time.time", side_effect=range(1000)):
+            for i in range(10):
+                self.cache.set(f"k{i}", i)
+            # Reading k0 on disk makes it the most recently used
+            self.cache._memory.clear()
+            self.assertEqual(self.cache.get("k0"), 0)
+            self.cache.set("k10", 10)
+
+        # The entry over the bound and a tenth of the bound are dropped
+        self.assertEqual(self.cache._disk_count, 9)
+        self.assertEqual(self._disk_keys(), {"k0", "k3", "k4", "k5", "k6", "k7", "k8", "k9", "k10"})
+
+    def test_replacing_a_key_does_not_grow_the_count(self):
+        for _ in range(3):
+            self.cache.set("same", 1)
+        self.assertEqual(self.cache._disk_count, 1)
+
+class TestCachedLLMCall(unittest.TestCase):
+    """Which results cached_llm_call stores."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache = LLMCache(os.path.join(self._tmp.name, "cache.sqlite3"))
+        patcher = mock.patch.object(llm_cache, "_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.cache._conn.close()
+        self._tmp.cleanup()
+
+    def test_result_is_reused(self):
+        calls = []
+        def compute():
+            calls.append(1)
+            note_answering_model("model-a")
+            return ["name"]
+        for _ in range(2):
+            self.assertEqual(cached_llm_call("test", "model-a", 0, "prompt", compute), ["name"])
+        self.assertEqual(len(calls), 1)
+
+    def test_fallback_answer_is_not_cached(self):
+        def compute():
+            note_answering_model("model-b")
+            return ["name"]
+        self.assertEqual(cached_llm_call("test", "model-a", 0, "prompt", compute), ["name"])
+        self.assertIsNone(self.cache.get(LLMCache.key("model-a", 0, "prompt")))
+
+    def test_failure_is_not_cached(self):
+        def compute():
+            raise ValueError("bad reply")
+        with self.assertRaises(ValueError):
+            cached_llm_call("test", "model-a", 0, "prompt", compute)
+        self.assertIsNone(self.cache.get(LLMCache.key("model-a", 0, "prompt")))
+
+    def test_async_fallback_answer_is_not_cached(self):
+        async def compute(model):
+            note_answering_model(model)
+            return [model]
+        asyncio.run(cached_llm_call_async("test", "model-a", 0, "fallback", lambda: compute("model-b")))
+        asyncio.run(cached_llm_call_async("test", "model-a", 0, "primary", lambda: compute("model-a")))
+        self.assertIsNone(self.cache.get(LLMCache.key("model-a", 0, "fallback")))
+        self.assertEqual(self.cache.get(LLMCache.key("model-a", 0, "primary")), ["model-a"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add the parent directory to the Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Python_Files.local_index import LocalIndex, PRECISIONS, normalize_rows, quantize_int8
+
+def _embeddings(rows: int = 300, dim: int = 48, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(size=(rows, dim)).astype(np.float32)
+
+def _records(rows: int):
+    return [{"chunk_id": f"chunk_{i}", "source_file": f"doc_{i % 3}"} for i in range(rows)]
+
+def _exact_top(vectors: np.ndarray, query: np.ndarray, top_k: int) -> list:
+    scores = normalize_rows(vectors) @ (query / np.linalg.norm(query))
+    return sorted(range(len(scores)), key=lambda i: -scores[i])[:top_k]
+
+class TestNormalizeAndQuantize(unittest.TestCase):
+    def test_rows_have_unit_length(self):
+        vectors = normalize_rows([[3.0, 4.0], [0.0, 0.0], [1.0, 0.0]])
+        self.assertEqual(vectors.dtype, np.float32)
+        np.testing.assert_allclose(vectors, [[0.6, 0.8], [0.0, 0.0], [1.0, 0.0]], rtol=1e-6)
+
+    def test_rejects_a_single_vector(self):
+        with self.assertRaises(ValueError):
+            normalize_rows([1.0, 2.0])
+
+    def test_int8_round_trip(self):
+        vectors = normalize_rows(_embeddings())
+        codes, scale, offset = quantize_int8(vectors)
+        self.assertEqual(codes.dtype, np.int8)
+        restored = (codes.astype(np.float32) + 128) * scale + offset
+        # Rounding to the nearest code is off by at most half a step per dimension
+        self.assertTrue(np.all(np.abs(restored - vectors) <= scale / 2 + 1e-6))
+
+    def test_int8_constant_dimension(self):
+        vectors = np.ones((4, 3), dtype=np.float32)
+        codes, scale, offset = quantize_int8(vectors)
+        np.testing.assert_allclose((codes.astype(np.float32) + 128) * scale + offset, vectors)
+
+class TestLocalIndexSearch(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.embeddings = _embeddings()
+        cls.records = _records(len(cls.embeddings))
+        cls.indexes = {precision: LocalIndex.build(cls.embeddings, cls.records, precision)
+                       for precision in PRECISIONS}
+        cls.queries = _embeddings(rows=10, seed=1)
+
+    def test_float32_is_exact(self):
+        index = self.indexes["float32"]
+        for query in self.queries:
+            rows, scores = index.search(query, top_k=5)
+            self.assertEqual(rows.tolist(), _exact_top(self.embeddings, query, 5))
+            self.assertTrue(np.all(np.diff(scores) <= 0))
+
+    def test_quantized_results_are_reranked_at_full_precision(self):
+        unit = normalize_rows(self.embeddings)
+        for precision in ("float16", "int8"):
+            index = self.indexes[precision]
+            for query in self.queries:
+                with self.subTest(precision=precision):
+                    rows, scores = index.search(query, top_k=5)
+                    np.testing.assert_allclose(scores, unit[rows] @ (query / np.linalg.norm(query)), rtol=1e-5)
+                    exact = _exact_top(self.embeddings, query, 5)
+                    self.assertGreaterEqual(len(set(rows.tolist()) & set(exact)), 4)
+
+    def test_stored_vector_finds_itself(self):
+        for precision, index in self.indexes.items():
+            for row in (0, 57, 299):
+                with self.subTest(precision=precision, row=row):
+                    rows, _ = index.search(self.embeddings[row], top_k=1, rerank=False)
+                    self.assertEqual(rows.tolist(), [row])
+
+    def test_allowed_rows(self):
+        allowed = np.zeros(len(self.records), dtype=bool)
+        allowed[::7] = True
+        for precision, index in self.indexes.items():
+            with self.subTest(precision=precision):
+                rows, _ = index.search(self.queries[0], top_k=10, allowed=allowed)
+                self.assertEqual(len(rows), 10)
+                self.assertTrue(all(row % 7 == 0 for row in rows.tolist()))
+
+    def test_search_many_matches_search(self):
+        for precision, index in self.indexes.items():
+            with self.subTest(precision=precision):
+                batched = index.search_many(self.queries, top_k=5)
+                self.assertEqual(len(batched), len(self.queries))
+                for query, (rows, scores) in zip(self.queries, batched):
+                    single_rows, single_scores = index.search(query, top_k=5)
+                    self.assertEqual(rows.tolist(), single_rows.tolist())
+                    np.testing.assert_allclose(scores, single_scores, rtol=1e-5)
+
+    def test_empty_searches(self):
+        index = self.indexes["int8"]
+        self.assertEqual(len(index.search(self.queries[0], top_k=0)[0]), 0)
+        self.assertEqual(index.search_many(np.empty((0, self.embeddings.shape[1]))), [])
+        empty = LocalIndex.build(np.empty((0, 4)), [])
+        self.assertEqual(len(empty.search(np.ones(4))[0]), 0)
+
+    def test_matches(self):
+        index = self.indexes["float32"]
+        matches = index.matches(self.embeddings[3], top_k=2, include_metadata=True)
+        self.assertEqual(matches[0]["id"], "chunk_3")
+        self.assertEqual(matches[0]["metadata"], self.records[3])
+        self.assertIsNone(index.matches(self.embeddings[3], top_k=1)[0]["metadata"])
+        self.assertEqual(index.matches_many(self.embeddings[[3, 4]], top_k=1)[1][0]["id"], "chunk_4")
+
+    def test_quantized_copies_are_smaller(self):
+        sizes = {precision: index.codes.nbytes for precision, index in self.indexes.items()}
+        self.assertEqual(sizes["float16"] * 2, sizes["float32"])
+        self.assertEqual(sizes["int8"] * 4, sizes["float32"])
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            LocalIndex.build(self.embeddings, self.records, precision="int4")
+        with self.assertRaises(ValueError):
+            LocalIndex.build(self.embeddings, self.records[:-1])
+
+class TestSaveLoad(unittest.TestCase):
+    def test_round_trip(self):
+        embeddings = _embeddings(rows=50)
+        records = _records(50)
+        query = _embeddings(rows=1, seed=2)[0]
+        for precision in PRECISIONS:
+            with self.subTest(precision=precision), tempfile.TemporaryDirectory() as directory:
+                index = LocalIndex.build(embeddings, records, precision)
+                index.save(directory)
+                loaded = LocalIndex.load(directory, precision)
+                self.assertIsInstance(loaded.vectors, np.memmap)
+                self.assertEqual(loaded.records, records)
+                np.testing.assert_array_equal(loaded.codes, index.codes)
+                self.assertEqual(loaded.search(query, top_k=5)[0].tolist(), index.search(query, top_k=5)[0].tolist())
+                # Memory-mapped vectors aren't counted as held in memory
+                self.assertEqual(loaded.memory_bytes, index.memory_bytes - (0 if precision == "float32" else index.vectors.nbytes))
+                del loaded
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+import unittest
+import sys
+import os
+import tempfile
+from datetime import date
+
+# Add the parent directory to the Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.logging_utils import ConversationLogger
+from Python_Files.tracing import span
+
+class TestConversationLogger(unittest.TestCase):
+    """What the logger stores, and failure paths of its background writer."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.logger = ConversationLogger(self._tmp.name)
+
+    def tearDown(self):
+        self.logger.close()
+        self._tmp.cleanup()
+
+    def test_unserializable_entry_is_dropped(self):
+        self.logger.log_conversation("find_schemes", "bad", "response", {"dob": date(2000, 1, 1)})
+        self.logger.log_conversation("find_schemes", "good", "response", {"age": 24})
+
+        self.assertTrue(self.logger.flush(timeout=5))
+        entries = list(self.logger.iter_entries("find_schemes"))
+        self.assertEqual([entry["user_query"] for entry in entries], ["good"])
+
+    def test_unserializable_error_is_dropped(self):
+        self.logger.log_error("matcher", "bad", {"when": date(2000, 1, 1)})
+        self.logger.log_error("matcher", "good")
+
+        self.assertTrue(self.logger.flush(timeout=5))
+        self.assertEqual([entry["error"] for entry in self.logger.iter_entries("errors")], ["good"])
+
+    def test_entry_is_captured_when_logged(self):
+        responses = {"age": 24}
+        self.logger.log_conversation("find_schemes", "query", "response", {"user_responses": responses})
+        responses["age"] = 60
+
+        self.assertTrue(self.logger.flush(timeout=5))
+        entry, = self.logger.iter_entries("find_schemes")
+        self.assertEqual(entry["metadata"]["user_responses"], {"age": 24})
+
+    def test_trace_is_stored_only_inside_a_request(self):
+        self.logger.log_conversation("semantic_search", "untraced", "response")
+        with span("request", stage="request"):
+            self.logger.log_conversation("semantic_search", "traced", "response")
+
+        self.assertTrue(self.logger.flush(timeout=5))
+        untraced, traced = self.logger.iter_entries("semantic_search")
+        self.assertNotIn("trace", untraced["metadata"])
+        self.assertIn("trace", traced["metadata"])
+
+    def test_unwritable_file_does_not_stop_writer(self):
+        # No directory exists for this log type, so its file can't be opened
+        self.logger.log_conversation("missing_type", "lost", "response")
+        self.logger.log_conversation("semantic_search", "kept", "response")
+
+        self.assertTrue(self.logger.flush(timeout=5))
+        self.logger.log_conversation("semantic_search", "after", "response")
+        self.assertTrue(self.logger.flush(timeout=5))
+        queries = [entry["user_query"] for entry in self.logger.iter_entries("semantic_search")]
+        self.assertEqual(queries, ["kept", "after"])
+
+if __name__ == '__main__':
+    unittest.main()
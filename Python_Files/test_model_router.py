@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+import unittest
+import sys
+import os
+import json
+import asyncio
+import tempfile
+from types import SimpleNamespace
+
+# Add the parent directory to the Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Python_Files.model_router import ModelRouter, load_config, DEFAULT_TIER
+from Python_Files.metrics import LLM_CALLS, LLM_FALLBACKS
+
+def _config():
+    return {
+        "tiers": {
+            "fast": {"model": "fast-model", "timeout": 1.0, "max_in_flight": 2, "fallback": None},
+            "strong": {"model": "strong-model", "timeout": 2.0, "max_in_flight": 1, "fallback": "fast"},
+        },
+        "tasks": {"summary": "fast", "analysis": "strong", "misconfigured": "missing"},
+        "default_tier": "fast",
+    }
+
+class FakeClient:
+    """OpenAI-style client whose calls to a model raise the error configured for it."""
+
+    def __init__(self, errors=None, is_async=False):
+        self.errors = errors or {}
+        self.calls = []
+        self.in_flight_seen = []
+        create = self._create_async if is_async else self._create
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+        self.router = None
+
+    def _create(self, model, timeout, **kwargs):
+        self.calls.append((model, timeout))
+        if self.router is not None:
+            self.in_flight_seen.append(dict(self.router._in_flight))
+        if model in self.errors:
+            raise self.errors[model]
+        return SimpleNamespace(model=model, usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5))
+
+    async def _create_async(self, model, timeout, **kwargs):
+        return self._create(model, timeout, **kwargs)
+
+class APITimeoutError(Exception):
+    """Stands in for openai.APITimeoutError, which isn't a TimeoutError."""
+
+def _count(metric, **labels) -> float:
+    return metric._values.get(metric._key(labels), 0)
+
+class TestTierSelection(unittest.TestCase):
+    def setUp(self):
+        self.router = ModelRouter(_config())
+
+    def test_tier_for_task(self):
+        self.assertEqual(self.router.tier_for("analysis"), "strong")
+        self.assertEqual(self.router.tier_for("summary"), "fast")
+        self.assertEqual(self.router.model_for("analysis"), "strong-model")
+
+    def test_unknown_task_or_tier_uses_default(self):
+        self.assertEqual(self.router.tier_for("not_configured"), "fast")
+        self.assertEqual(self.router.tier_for("misconfigured"), "fast")
+
+    def test_tier_at_capacity_falls_back(self):
+        before = _count(LLM_FALLBACKS, task="analysis", from_tier="strong", to_tier="fast", reason="load")
+        self.assertEqual(self.router.select_tier("analysis"), "strong")
+        self.router._enter("strong")
+        self.assertEqual(self.router.select_tier("analysis"), "fast")
+        self.assertEqual(_count(LLM_FALLBACKS, task="analysis", from_tier="strong", to_tier="fast", reason="load"),
+                         before + 1)
+
+    def test_tier_without_fallback_stays_at_capacity(self):
+        self.router._enter("fast")
+        self.router._enter("fast")
+        self.assertEqual(self.router.select_tier("summary"), "fast")
+
+    def test_fallback_cycle_terminates(self):
+        config = _config()
+        config["tiers"]["fast"]["fallback"] = "strong"
+        router = ModelRouter(config)
+        for tier in ("fast", "fast", "strong"):
+            router._enter(tier)
+        self.assertIn(router.select_tier("analysis"), ("fast", "strong"))
+
+class TestLoadConfig(unittest.TestCase):
+    def test_overrides_merge_into_defaults(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump({"tiers": {"strong": {"model": "other-model"}}, "tasks": {"final_analysis": "fast"}}, f)
+        try:
+            config = load_config(f.name)
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(config["tiers"]["strong"]["model"], "other-model")
+        # Keys not in the override keep their defaults
+        self.assertEqual(config["tiers"]["strong"]["fallback"], "fast")
+        self.assertEqual(config["tasks"]["final_analysis"], "fast")
+        self.assertEqual(config["default_tier"], DEFAULT_TIER)
+
+    def test_unreadable_file_gives_defaults(self):
+        config = load_config(os.path.join(tempfile.gettempdir(), "no-such-routing-config.json"))
+        self.assertEqual(config["default_tier"], DEFAULT_TIER)
+        self.assertIn("final_analysis", config["tasks"])
+
+class TestComplete(unittest.TestCase):
+    def setUp(self):
+        self.router = ModelRouter(_config())
+
+    def test_call_goes_to_the_task_model(self):
+        client = FakeClient()
+        response = self.router.complete(client, "analysis", messages=[])
+        self.assertEqual(response.model, "strong-model")
+        self.assertEqual(client.calls, [("strong-model", 2.0)])
+
+    def test_timeout_is_retried_on_the_fallback(self):
+        client = FakeClient({"strong-model": APITimeoutError("timed out")})
+        client.router = self.router
+        before = _count(LLM_CALLS, task="analysis", tier="strong", outcome="timeout")
+        response = self.router.complete(client, "analysis", messages=[])
+        self.assertEqual(response.model, "fast-model")
+        self.assertEqual([model for model, _ in client.calls], ["strong-model", "fast-model"])
+        # The timed-out attempt has left its tier by the time the retry runs
+        self.assertEqual(client.in_flight_seen, [{"fast": 0, "strong": 1}, {"fast": 1, "strong": 0}])
+        self.assertEqual(_count(LLM_CALLS, task="analysis", tier="strong", outcome="timeout"), before + 1)
+        self.assertEqual(self.router._in_flight, {"fast": 0, "strong": 0})
+
+    def test_timeout_without_fallback_raises(self):
+        client = FakeClient({"fast-model": TimeoutError("timed out")})
+        with self.assertRaises(TimeoutError):
+            self.router.complete(client, "summary", messages=[])
+        self.assertEqual(len(client.calls), 1)
+        self.assertEqual(self.router._in_flight, {"fast": 0, "strong": 0})
+
+    def test_fallback_timeout_raises(self):
+        client = FakeClient({"strong-model": TimeoutError("slow"), "fast-model": TimeoutError("slow too")})
+        with self.assertRaisesRegex(TimeoutError, "slow too"):
+            self.router.complete(client, "analysis", messages=[])
+        self.assertEqual([model for model, _ in client.calls], ["strong-model", "fast-model"])
+
+    def test_other_errors_are_not_retried(self):
+        client = FakeClient({"strong-model": ValueError("bad request")})
+        before = _count(LLM_CALLS, task="analysis", tier="strong", outcome="error")
+        with self.assertRaises(ValueError):
+            self.router.complete(client, "analysis", messages=[])
+        self.assertEqual(len(client.calls), 1)
+        self.assertEqual(_count(LLM_CALLS, task="analysis", tier="strong", outcome="error"), before + 1)
+        self.assertEqual(self.router._in_flight, {"fast": 0, "strong": 0})
+
+    def test_routed_client(self):
+        client = FakeClient()
+        response = self.router.client(client, "summary").chat.completions.create(messages=[])
+        self.assertEqual(response.model, "fast-model")
+
+class TestCompleteAsync(unittest.TestCase):
+    def setUp(self):
+        self.router = ModelRouter(_config())
+
+    def test_call_goes_to_the_task_model(self):
+        client = FakeClient(is_async=True)
+        response = asyncio.run(self.router.complete_async(client, "analysis", messages=[]))
+        self.assertEqual(response.model, "strong-model")
+
+    def test_timeout_is_retried_on_the_fallback(self):
+        client = FakeClient({"strong-model": APITimeoutError("timed out")}, is_async=True)
+        response = asyncio.run(self.router.complete_async(client, "analysis", messages=[]))
+        self.assertEqual(response.model, "fast-model")
+        self.assertEqual([model for model, _ in client.calls], ["strong-model", "fast-model"])
+        self.assertEqual(self.router._in_flight, {"fast": 0, "strong": 0})
+
+    def test_other_errors_are_not_retried(self):
+        client = FakeClient({"strong-model": ValueError("bad request")}, is_async=True)
+        with self.assertRaises(ValueError):
+            asyncio.run(self.router.complete_async(client, "analysis", messages=[]))
+        self.assertEqual(len(client.calls), 1)
+        self.assertEqual(self.router._in_flight, {"fast": 0, "strong": 0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+import unittest
+import sys
+import os
+import re
+import random
+from types import SimpleNamespace
+import numpy as np
+
+# Add the parent directory to the Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Python_Files.retrieval_results import (ResultBatch, RRF_K, reciprocal_rank_fusion, text_fingerprint,
+                                            top_k_indices, rank)
+
+def _batch(*results) -> ResultBatch:
+    """Batch of (chunk id, score) pairs; each chunk's text names its batch position."""
+    return ResultBatch.from_matches(
+        SimpleNamespace(id=chunk_id, score=score, metadata={"text": f"{chunk_id} at {i}"})
+        for i, (chunk_id, score) in enumerate(results)
+    )
+
+def _full_fingerprint(text: str, length: int = 100) -> str:
+    # The fingerprint as defined: normalize the whole text, then cut it
+    return re.sub(r'\s+', ' ', text.lower())[:length]
+
+class TestTextFingerprint(unittest.TestCase):
+    def test_case_and_whitespace_are_normalized(self):
+        self.assertEqual(text_fingerprint("PM  Kisan\n\tScheme"), "pm kisan scheme")
+        self.assertEqual(text_fingerprint("PM Kisan Scheme"), text_fingerprint("pm   kisan\nscheme"))
+
+    def test_cut_to_length(self):
+        self.assertEqual(text_fingerprint("abcdef", length=3), "abc")
+        self.assertEqual(len(text_fingerprint("word " * 500)), 100)
+
+    def test_long_texts_match_whole_text_normalization(self):
+        cases = [
+            "Scheme " + "x" * 1000,
+            # A whitespace run crossing the prefix window
+            "a" * 99 + " " * 600 + "b" * 50,
+            # Whitespace-only prefix that collapses below the requested length
+            " " * 450 + "Scheme details follow here. " * 10,
+            "Line one\n\n" * 100,
+            "İSTANBUL " * 100,
+        ]
+        for text in cases:
+            for length in (1, 50, 100, 250):
+                with self.subTest(text=text[:20], length=length):
+                    self.assertEqual(text_fingerprint(text, length), _full_fingerprint(text, length))
+
+    def test_short_text(self):
+        self.assertEqual(text_fingerprint(" Short "), " short ")
+        self.assertEqual(text_fingerprint(""), "")
+
+class TestTopKIndices(unittest.TestCase):
+    def test_highest_first(self):
+        self.assertEqual(top_k_indices([0.1, 0.9, 0.5, 0.7], 2).tolist(), [1, 3])
+
+    def test_ties_keep_their_order(self):
+        self.assertEqual(top_k_indices([0.5, 0.9, 0.5, 0.5, 0.1], 3).tolist(), [1, 0, 2])
+        self.assertEqual(top_k_indices([0.5, 0.5, 0.5]).tolist(), [0, 1, 2])
+
+    def test_k_edges(self):
+        scores = [0.3, 0.1, 0.2]
+        self.assertEqual(top_k_indices(scores).tolist(), [0, 2, 1])
+        self.assertEqual(top_k_indices(scores, 3).tolist(), [0, 2, 1])
+        self.assertEqual(top_k_indices(scores, 10).tolist(), [0, 2, 1])
+        self.assertEqual(top_k_indices(scores, 0).tolist(), [])
+        self.assertEqual(top_k_indices([], 5).tolist(), [])
+
+    def test_matches_stable_sort(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            # Few distinct values, so most selections cut through a run of ties
+            scores = [rng.choice([0.1, 0.2, 0.3, 0.4]) for _ in range(rng.randint(1, 30))]
+            k = rng.randint(1, len(scores))
+            expected = sorted(range(len(scores)), key=lambda i: -scores[i])[:k]
+            self.assertEqual(top_k_indices(np.array(scores), k).tolist(), expected)
+
+class TestRank(unittest.TestCase):
+    def test_items_by_score(self):
+        self.assertEqual(rank(["a", "b", "c"], [0.2, 0.8, 0.5]), ["b", "c", "a"])
+        self.assertEqual(rank(["a", "b", "c"], [0.2, 0.8, 0.5], 1), ["b"])
+
+    def test_empty(self):
+        self.assertEqual(rank([], [], 3), [])
+
+class TestReciprocalRankFusion(unittest.TestCase):
+    def test_results_found_by_several_queries_rank_first(self):
+        fused = reciprocal_rank_fusion([
+            _batch(("a", 0.9), ("b", 0.8)),
+            _batch(("c", 0.95), ("b", 0.7)),
+        ])
+        # b is second in both lists; a and c are each first in one
+        self.assertEqual(fused.chunk_ids.tolist(), ["b", "a", "c"])
+
+    def test_rank_is_by_score_not_batch_order(self):
+        fused = reciprocal_rank_fusion([_batch(("low", 0.2), ("high", 0.9)), _batch(("high", 0.5))])
+        self.assertEqual(fused.chunk_ids.tolist(), ["high", "low"])
+
+    def test_weights(self):
+        batches = [_batch(("a", 0.9)), _batch(("b", 0.9))]
+        self.assertEqual(reciprocal_rank_fusion(batches, [1.0, 2.0]).chunk_ids.tolist(), ["b", "a"])
+        # Equal fused scores keep first-seen order
+        self.assertEqual(reciprocal_rank_fusion(batches).chunk_ids.tolist(), ["a", "b"])
+
+    def test_best_score_and_first_metadata_are_kept(self):
+        fused = reciprocal_rank_fusion([_batch(("x", 0.1), ("a", 0.4)), _batch(("a", 0.8))])
+        chunk = fused[0]
+        self.assertEqual(chunk.chunk_id, "a")
+        self.assertEqual(chunk.score, 0.8)
+        self.assertEqual(chunk.text, "a at 1")
+
+    def test_limit(self):
+        fused = reciprocal_rank_fusion([_batch(("a", 0.9), ("b", 0.8), ("c", 0.7))], limit=2)
+        self.assertEqual(fused.chunk_ids.tolist(), ["a", "b"])
+
+    def test_fused_order_follows_the_formula(self):
+        rng = random.Random(1)
+        ids = [f"c{i}" for i in range(12)]
+        batches, weights = [], []
+        for _ in range(4):
+            chosen = rng.sample(ids, 6)
+            batches.append(_batch(*[(chunk_id, rng.random()) for chunk_id in chosen]))
+            weights.append(rng.choice([0.5, 1.0, 2.0]))
+        expected = {}
+        for batch, weight in zip(batches, weights):
+            ordered = sorted(zip(batch.chunk_ids.tolist(), batch.scores.tolist()), key=lambda pair: -pair[1])
+            for position, (chunk_id, _) in enumerate(ordered, start=1):
+                expected[chunk_id] = expected.get(chunk_id, 0.0) + weight / (RRF_K + position)
+        fused = reciprocal_rank_fusion(batches, weights)
+        self.assertEqual(fused.chunk_ids.tolist(), sorted(expected, key=lambda chunk_id: -expected[chunk_id]))
+
+    def test_empty(self):
+        self.assertEqual(len(reciprocal_rank_fusion([])), 0)
+        self.assertEqual(len(reciprocal_rank_fusion([ResultBatch.empty(), ResultBatch.empty()])), 0)
+
+if __name__ == '__main__':
+    unittest.main()
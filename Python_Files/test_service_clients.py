@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+import unittest
+import sys
+import os
+import tempfile
+import numpy as np
+
+# Add the parent directory to the Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Python_Files.service_clients import (FakeIndex, Record, fake_embedding, get_local_index, metadata_matches,
+                                         query_many)
+from Python_Files.local_index import LocalIndex
+from Python_Files.tracing import current_span, span
+
+class TestMetadataMatches(unittest.TestCase):
+    metadata = {"source_file": "central_doc_1", "chunk_index": 4, "scheme_name": "PM Kisan"}
+
+    def test_bare_value_is_equality(self):
+        self.assertTrue(metadata_matches(self.metadata, {"source_file": "central_doc_1"}))
+        self.assertFalse(metadata_matches(self.metadata, {"source_file": "central_doc_2"}))
+
+    def test_operators(self):
+        cases = {
+            "$eq": (4, 5), "$ne": (5, 4), "$gt": (3, 4), "$gte": (4, 5),
+            "$lt": (5, 4), "$lte": (4, 3), "$in": ([1, 4], [1, 2]), "$nin": ([1, 2], [1, 4]),
+        }
+        for operator, (passing, failing) in cases.items():
+            with self.subTest(operator=operator):
+                self.assertTrue(metadata_matches(self.metadata, {"chunk_index": {operator: passing}}))
+                self.assertFalse(metadata_matches(self.metadata, {"chunk_index": {operator: failing}}))
+
+    def test_every_condition_must_hold(self):
+        self.assertTrue(metadata_matches(self.metadata, {"chunk_index": {"$gte": 2, "$lt": 5},
+                                                         "scheme_name": "PM Kisan"}))
+        self.assertFalse(metadata_matches(self.metadata, {"chunk_index": {"$gte": 2, "$lt": 4}}))
+        self.assertFalse(metadata_matches(self.metadata, {"chunk_index": 4, "scheme_name": "Other"}))
+
+    def test_and_or(self):
+        self.assertTrue(metadata_matches(self.metadata, {"$or": [{"chunk_index": 1}, {"scheme_name": "PM Kisan"}]}))
+        self.assertFalse(metadata_matches(self.metadata, {"$or": [{"chunk_index": 1}, {"scheme_name": "Other"}]}))
+        self.assertTrue(metadata_matches(self.metadata, {"$and": [{"chunk_index": {"$gt": 1}},
+                                                                  {"$or": [{"source_file": "central_doc_1"}]}]}))
+        self.assertFalse(metadata_matches(self.metadata, {"$and": [{"chunk_index": 4}, {"scheme_name": "Other"}]}))
+
+    def test_missing_field(self):
+        # Only negative conditions hold for a field the record doesn't have
+        self.assertFalse(metadata_matches(self.metadata, {"state": "Kerala"}))
+        self.assertFalse(metadata_matches(self.metadata, {"state": {"$in": ["Kerala"]}}))
+        self.assertTrue(metadata_matches(self.metadata, {"state": {"$ne": "Kerala"}}))
+        self.assertTrue(metadata_matches(self.metadata, {"state": {"$nin": ["Kerala"]}}))
+
+    def test_empty_filter_matches(self):
+        self.assertTrue(metadata_matches(self.metadata, {}))
+
+class TestFakeIndexQueries(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._tmp = tempfile.TemporaryDirectory()
+        for doc, schemes in {"central_doc_1": ["PM Kisan", "Digital India"],
+                             "kerala_doc_1": ["Kerala Farmers Pension"]}.items():
+            with open(os.path.join(cls._tmp.name, f"{doc}_chunks.txt"), 'w', encoding='utf-8') as f:
+                for number, scheme in enumerate(schemes, start=1):
+                    f.write(f"CHUNK {number}\n{'=' * 50}\n{scheme}\nSupport for farmers and families.\n\n")
+        cls.index = FakeIndex(cls._tmp.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._tmp.cleanup()
+
+    def test_filter_restricts_matches(self):
+        vector = fake_embedding("farmers pension")
+        response = self.index.query(vector, top_k=10, include_metadata=True,
+                                    filter={"source_file": {"$ne": "kerala_doc_1"}})
+        self.assertEqual({match.metadata["scheme_name"] for match in response.matches}, {"PM Kisan", "Digital India"})
+
+    def test_query_many_matches_query(self):
+        vectors = np.vstack([fake_embedding("farmers pension"), fake_embedding("digital services")])
+        filter = {"chunk_index": 1}
+        responses = query_many(self.index, vectors, top_k=2, filter=filter, include_metadata=True)
+        self.assertEqual(len(responses), 2)
+        for vector, response in zip(vectors, responses):
+            single = self.index.query(vector, top_k=2, include_metadata=True, filter=filter)
+            self.assertEqual([match.id for match in response.matches], [match.id for match in single.matches])
+
+    def test_query_many_without_batched_search(self):
+        class PerQueryIndex:
+            def __init__(self):
+                self.requests = []
+                self.spans = []
+
+            def query(self, **request):
+                self.requests.append(request)
+                self.spans.append(current_span())
+                return Record.build({"matches": [{"id": str(request["vector"][0]), "score": 1.0}]})
+
+        index = PerQueryIndex()
+        with span("vector_query") as caller_span:
+            responses = query_many(index, np.eye(3, dtype=np.float32), top_k=4, filter={"chunk_index": 1})
+        # Responses come back in the order of the vectors, whatever order the requests ran in
+        self.assertEqual([response.matches[0].id for response in responses], ["1.0", "0.0", "0.0"])
+        self.assertEqual(len(index.requests), 3)
+        self.assertTrue(all(request["filter"] == {"chunk_index": 1} and request["top_k"] == 4
+                            for request in index.requests))
+        # Each query runs in a pool thread under the caller's span
+        self.assertEqual(index.spans, [caller_span] * 3)
+
+class TestLocalIndex(unittest.TestCase):
+    def test_saved_index_answers_like_pinecone(self):
+        records = [{"chunk_id": f"doc_{i}_chunk", "source_file": f"doc_{i}", "text": text}
+                   for i, text in enumerate(["farmers pension", "student scholarship", "housing loan"])]
+        embeddings = np.vstack([fake_embedding(record["text"]) for record in records])
+        with tempfile.TemporaryDirectory() as directory:
+            LocalIndex.build(embeddings, records).save(directory)
+            index = get_local_index(directory)
+            self.assertIs(get_local_index(directory), index)
+            response = index.query(fake_embedding("scholarship for students"), top_k=2, include_metadata=True)
+            self.assertEqual(response.matches[0].id, "doc_1_chunk")
+            self.assertEqual(response.matches[0].metadata["text"], "student scholarship")
+            filtered = query_many(index, embeddings[:1], top_k=3, filter={"source_file": {"$ne": "doc_0"}})
+            self.assertEqual({match.id for match in filtered[0].matches}, {"doc_1_chunk", "doc_2_chunk"})
+            get_local_index.cache_clear()
+            del index
+
+if __name__ == '__main__':
+    unittest.main()
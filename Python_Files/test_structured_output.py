@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+import unittest
+import sys
+import os
+import json
+from types import SimpleNamespace
+from typing import List, Optional
+from pydantic import BaseModel, Field
+
+# Add the parent directory to the Python path so we can import our modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Python_Files.structured_output import StructuredOutputError, compact_schema, create_structured, function_tool
+
+class Criterion(BaseModel):
+    title: str
+    met: bool
+
+class Assessment(BaseModel):
+    scheme: str = Field(description="Scheme name")
+    score: float
+    criteria: List[Criterion]
+    note: Optional[str] = None
+
+class FakeClient:
+    """Chat client answering every request with the given tool calls."""
+
+    def __init__(self, tool_calls):
+        self.requests = []
+        message = SimpleNamespace(tool_calls=tool_calls)
+        response = SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+        def create(**kwargs):
+            self.requests.append(kwargs)
+            return response
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=create))
+
+def _tool_call(name: str, arguments) -> SimpleNamespace:
+    if not isinstance(arguments, str):
+        arguments = json.dumps(arguments)
+    return SimpleNamespace(function=SimpleNamespace(name=name, arguments=arguments))
+
+class TestCompactSchema(unittest.TestCase):
+    def test_titles_are_dropped(self):
+        schema = compact_schema(Assessment.model_json_schema())
+        self.assertNotIn("title", schema)
+        self.assertNotIn("title", schema["properties"]["scheme"])
+        self.assertNotIn("title", schema["$defs"]["Criterion"])
+        self.assertEqual(schema["properties"]["scheme"]["description"], "Scheme name")
+
+    def test_property_named_title_is_kept(self):
+        schema = compact_schema(Criterion.model_json_schema())
+        self.assertEqual(schema["properties"]["title"], {"type": "string"})
+        self.assertEqual(schema["required"], ["title", "met"])
+
+    def test_function_tool(self):
+        tool = function_tool(Assessment, "record_assessment", "Record the assessment")
+        self.assertEqual(tool["type"], "function")
+        self.assertEqual(tool["function"]["name"], "record_assessment")
+        self.assertEqual(tool["function"]["parameters"], compact_schema(Assessment.model_json_schema()))
+
+class TestCreateStructured(unittest.TestCase):
+    messages = [{"role": "user", "content": "Assess this scheme"}]
+    arguments = {"scheme": "PM Kisan", "score": 0.8, "criteria": [{"title": "Farmer", "met": True}]}
+
+    def test_arguments_are_validated_into_the_model(self):
+        client = FakeClient([_tool_call("record_assessment", self.arguments)])
+        result = create_structured(client, Assessment, self.messages, "record_assessment", "Record it",
+                                   model="gpt-4o-mini", temperature=0)
+        self.assertEqual(result, Assessment(**self.arguments))
+        request = client.requests[0]
+        self.assertEqual(request["tool_choice"], {"type": "function", "function": {"name": "record_assessment"}})
+        self.assertEqual(request["tools"], [function_tool(Assessment, "record_assessment", "Record it")])
+        self.assertEqual(request["model"], "gpt-4o-mini")
+        self.assertEqual(request["messages"], self.messages)
+
+    def test_no_tool_call(self):
+        for tool_calls in (None, []):
+            with self.subTest(tool_calls=tool_calls):
+                with self.assertRaisesRegex(StructuredOutputError, "did not call record_assessment"):
+                    create_structured(FakeClient(tool_calls), Assessment, self.messages, "record_assessment", "")
+
+    def test_invalid_arguments(self):
+        for arguments in ({"scheme": "PM Kisan"}, "{not json"):
+            with self.subTest(arguments=arguments):
+                client = FakeClient([_tool_call("record_assessment", arguments)])
+                with self.assertRaisesRegex(StructuredOutputError, "Invalid record_assessment arguments"):
+                    create_structured(client, Assessment, self.messages, "record_assessment", "")
+
+    def test_error_is_a_value_error(self):
+        # Callers that caught parse failures as ValueError keep working
+        self.assertTrue(issubclass(StructuredOutputError, ValueError))
+
+if __name__ == '__main__':
+    unittest.main()
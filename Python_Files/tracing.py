@@ -0,0 +1,250 @@
+"""Request spans with per-stage latency percentiles, carried into worker threads by submit and bind."""
+from typing import Any, Callable, Dict, List, Optional
+from collections import defaultdict, deque
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from functools import wraps
+import json
+import math
+import os
+import threading
+import time
+import uuid
+
+# Latency samples kept per stage for the percentile export
+MAX_SAMPLES_PER_STAGE = 10000
+
+PERCENTILES = (50, 95, 99)
+
+@dataclass
+class Span:
+    name: str
+    stage: str
+    trace: "Trace"
+    parent_id: Optional[str] = None
+    span_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    start: float = field(default_factory=time.perf_counter)
+    duration_ms: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    def set(self, **attributes):
+        """Attach attributes (result counts, model names, ...) to the span."""
+        self.attributes.update(attributes)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.start) * 1000
+
+    def finish(self):
+        if self.duration_ms is None:
+            self.duration_ms = self.elapsed_ms()
+            _record_sample(self.stage, self.duration_ms)
+            _notify(_finish_listeners, self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration_ms = self.duration_ms if self.duration_ms is not None else self.elapsed_ms()
+        return {
+            "name": self.name,
+            "stage": self.stage,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ms": round((self.start - self.trace.start) * 1000, 3),
+            "duration_ms": round(duration_ms, 3),
+            "finished": self.duration_ms is not None,
+            **({"attributes": self.attributes} if self.attributes else {})
+        }
+
+class Trace:
+    """All spans of one request, possibly recorded from several threads."""
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.start = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Wall time per stage, summed over the finished spans."""
+        totals = defaultdict(float)
+        with self._lock:
+            for span in self.spans:
+                if span.duration_ms is not None:
+                    totals[span.stage] += span.duration_ms
+        return {stage: round(total, 3) for stage, total in totals.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [span.to_dict() for span in self.spans]
+        return {"trace_id": self.trace_id, "stages": self.stage_totals(), "spans": spans}
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+_samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=MAX_SAMPLES_PER_STAGE))
+_samples_lock = threading.Lock()
+
+_start_listeners: List[Callable[[Span], None]] = []
+_finish_listeners: List[Callable[[Span], None]] = []
+
+def _record_sample(stage: str, duration_ms: float):
+    with _samples_lock:
+        _samples[stage].append(duration_ms)
+
+def add_span_listener(on_start: Callable[[Span], None] = None, on_finish: Callable[[Span], None] = None):
+    """Call on_start / on_finish for every span opened / finished in this process."""
+    if on_start:
+        _start_listeners.append(on_start)
+    if on_finish:
+        _finish_listeners.append(on_finish)
+
+def remove_span_listener(on_start: Callable[[Span], None] = None, on_finish: Callable[[Span], None] = None):
+    """Unregister listeners added with add_span_listener."""
+    if on_start in _start_listeners:
+        _start_listeners.remove(on_start)
+    if on_finish in _finish_listeners:
+        _finish_listeners.remove(on_finish)
+
+def _notify(listeners: List[Callable[[Span], None]], span_obj: Span):
+    for listener in listeners:
+        try:
+            listener(span_obj)
+        except Exception as e:
+            print(f"Error in span listener: {str(e)}")
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def current_trace() -> Optional[Trace]:
+    span = _current_span.get()
+    return span.trace if span else None
+
+def record_error(error: BaseException):
+    """Mark the active span as failed when the error is handled inside it."""
+    span_obj = _current_span.get()
+    if span_obj:
+        span_obj.set(error=f"{type(error).__name__}: {error}")
+
+class span:
+    """Context manager timing one stage; nests under the active span.
+
+    With ``activate=False`` the span is recorded but not made current. Use that
+    inside generators, whose body may resume in a different context than the one
+    the span was opened in.
+    """
+
+    def __init__(self, name: str, stage: str = None, activate: bool = True, **attributes):
+        self.name = name
+        self.stage = stage or name
+        self.activate = activate
+        self.attributes = attributes
+        self.span: Optional[Span] = None
+        self._token = None
+
+    def __enter__(self) -> Span:
+        parent = _current_span.get()
+        trace = parent.trace if parent else Trace()
+        self.span = Span(
+            name=self.name,
+            stage=self.stage,
+            trace=trace,
+            parent_id=parent.span_id if parent else None,
+            attributes=dict(self.attributes)
+        )
+        trace.add(self.span)
+        _notify(_start_listeners, self.span)
+        if self.activate:
+            self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.span.set(error=f"{exc_type.__name__}: {exc}")
+        self.span.finish()
+        if self._token is not None:
+            _current_span.reset(self._token)
+        return False
+
+class use_span:
+    """Make an existing span current, e.g. on a worker thread doing work on its behalf."""
+
+    def __init__(self, span_obj: Optional[Span]):
+        self.span_obj = span_obj
+        self._token = None
+
+    def __enter__(self) -> Optional[Span]:
+        self._token = _current_span.set(self.span_obj)
+        return self.span_obj
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        return False
+
+def traced(stage: str, name: str = None, **attributes):
+    """Decorator wrapping every call of a function in a span."""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, stage=stage, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def bind(func: Callable) -> Callable:
+    """Bind func to the current context, so spans it opens on another thread join this trace."""
+    context = copy_context()
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+    return wrapper
+
+def submit(executor, func: Callable, *args, **kwargs):
+    """executor.submit that carries the active span into the worker thread."""
+    return executor.submit(copy_context().run, func, *args, **kwargs)
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
+
+def summarize(samples: Dict[str, List[float]]) -> Dict[str, Dict[str, float]]:
+    """count and p50/p95/p99 (ms) for each stage's samples."""
+    summary = {}
+    for stage, values in sorted(samples.items()):
+        if not values:
+            continue
+        ordered = sorted(values)
+        summary[stage] = {"count": len(ordered)}
+        for pct in PERCENTILES:
+            summary[stage][f"p{pct}"] = round(_percentile(ordered, pct), 3)
+    return summary
+
+def stage_percentiles() -> Dict[str, Dict[str, float]]:
+    """Percentiles over the spans finished in this process."""
+    with _samples_lock:
+        samples = {stage: list(values) for stage, values in _samples.items()}
+    return summarize(samples)
+
+def export_stage_percentiles(path: str) -> Dict[str, Dict[str, float]]:
+    """Write this process's per-stage percentiles to a JSON file."""
+    summary = stage_percentiles()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+def percentiles_from_entries(entries) -> Dict[str, Dict[str, float]]:
+    """Percentiles over the spans stored in conversation log entries."""
+    samples = defaultdict(list)
+    for entry in entries:
+        trace = (entry.get("metadata") or {}).get("trace") or {}
+        for recorded in trace.get("spans", []):
+            if recorded.get("finished"):
+                samples[recorded["stage"]].append(recorded["duration_ms"])
+    return summarize(samples)
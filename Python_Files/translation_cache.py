@@ -0,0 +1,98 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+import hashlib
+import os
+import sqlite3
+import threading
+
+DEFAULT_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", os.path.join("cache", "translations.sqlite3"))
+
+# Scheme catalog translations produced ahead of time by Python_Files/scheme_translations.py
+SCHEME_TRANSLATIONS_PATH = os.getenv("SCHEME_TRANSLATIONS_PATH", os.path.join("data", "scheme_translations.sqlite3"))
+
+class TranslationCache:
+    """Persistent translation store keyed by (language, text hash).
+
+    Entries live in a SQLite file so they survive restarts and are shared by every
+    Streamlit session in the process (and by other processes on the same host).
+    An in-process dict sits in front of the database for repeated lookups.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_CACHE_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        self._memory: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS translations (
+                    lang TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    translation TEXT NOT NULL,
+                    PRIMARY KEY (lang, text_hash)
+                )"""
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Stable hash of the source text used as the cache key."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def get(self, text: str, lang: str) -> Optional[str]:
+        """Return the cached translation of text, or None."""
+        return self.get_many([text], lang).get(text)
+
+    def get_many(self, texts: Iterable[str], lang: str) -> Dict[str, str]:
+        """Return cached translations for the given texts as a {text: translation} dict."""
+        found = {}
+        missing = {}
+        for text in texts:
+            key = (lang, self.text_hash(text))
+            if key in self._memory:
+                found[text] = self._memory[key]
+            else:
+                missing[key[1]] = text
+
+        if missing:
+            hashes = list(missing)
+            with self._lock:
+                rows = []
+                # Stay well below SQLite's bound-parameter limit
+                for i in range(0, len(hashes), 500):
+                    batch = hashes[i:i + 500]
+                    placeholders = ",".join("?" * len(batch))
+                    rows.extend(self._conn.execute(
+                        f"SELECT text_hash, translation FROM translations "
+                        f"WHERE lang = ? AND text_hash IN ({placeholders})",
+                        [lang, *batch]
+                    ).fetchall())
+            for text_hash, translation in rows:
+                self._memory[(lang, text_hash)] = translation
+                found[missing[text_hash]] = translation
+
+        return found
+
+    def set(self, text: str, lang: str, translation: str) -> None:
+        """Store a single translation."""
+        self.set_many({text: translation}, lang)
+
+    def set_many(self, translations: Dict[str, str], lang: str) -> None:
+        """Store several translations for one language in a single transaction."""
+        rows: List[Tuple[str, str, str]] = []
+        for text, translation in translations.items():
+            text_hash = self.text_hash(text)
+            self._memory[(lang, text_hash)] = translation
+            rows.append((lang, text_hash, translation))
+
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (lang, text_hash, translation) VALUES (?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
@@ -1,7 +1,15 @@
-from deep_translator import GoogleTranslator
 import streamlit as st
 import time
+from typing import Dict, List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import os
+import re
+import threading
 from langdetect import detect
+from Python_Files.translation_cache import TranslationCache, SCHEME_TRANSLATIONS_PATH
+from Python_Files.tracing import submit, traced, record_error
+from Python_Files.metrics import record_cache_lookup
+from Python_Files.service_clients import get_translator
 
 # Supported Languages with their native names
 LANGUAGES = {
@@ -11,14 +19,78 @@ LANGUAGES = {
     "te": "తెలుగు"
 }
 
+# Google Translate rejects requests longer than this
+MAX_REQUEST_CHARS = 5000
+
+# Several short strings are packed into one request separated by line breaks,
+# which the translation service preserves
+BATCH_SEPARATOR = "\n"
+
+# Long texts are cut after sentence-ending punctuation (including the Devanagari
+# danda) or at line breaks
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?।])\s+|\n+")
+
+# Bounded pool shared by all sessions, so a burst of long texts can't open an
+# unbounded number of connections to the translation service
+TRANSLATION_MAX_WORKERS = int(os.getenv("TRANSLATION_MAX_WORKERS", "4"))
+_translation_pool = ThreadPoolExecutor(max_workers=TRANSLATION_MAX_WORKERS, thread_name_prefix="translate")
+_worker_state = threading.local()
+
+# Static UI labels rendered on every page, pre-warmed so no page render translates them live
+UI_STRINGS = [
+    "Your Location",
+    "Select your state",
+    "Select Language",
+    "Please select your state from the sidebar to continue",
+    "Start New Search",
+    "Thinking...",
+    "Translation",
+    "Translation:",
+    "Conversation Summary",
+    "Smart Search",
+    "Ask me anything about Indian Government Schemes!",
+    "Type your question here...",
+    "Find Right Scheme",
+    "Answer a few questions to discover the perfect schemes for you.",
+    "Previous",
+    "Next",
+    "Ask Follow-up Questions",
+    "Feel free to ask specific questions about any scheme or explore more options.",
+    "Ask follow-up questions about schemes...",
+    "No matching schemes found. Please try adjusting your responses.",
+    "There was an error displaying the recommendations. Please try refreshing the page.",
+    "There was an error processing your question. Please try again.",
+    "This field is required",
+    "Invalid input",
+    "Student",
+    "Employed",
+    "Self-employed/Business",
+    "Unemployed",
+    "Senior Citizen",
+    "Farmer/Agricultural Worker",
+    "Top Recommended Schemes",
+    "Why This Scheme",
+    "Key Benefits",
+    "Eligibility Status",
+    "Requirement",
+    "How to Apply",
+    "Match Score",
+]
+
+# Languages whose UI labels are all in the translation cache
+_warmed_languages = set()
+
 @st.cache_resource(show_spinner=False)
-def get_translator(target_lang):
-    """Get a cached translator instance for the target language"""
-    try:
-        return GoogleTranslator(source='en', target=target_lang)
-    except Exception as e:
-        print(f"Error initializing translator: {e}")
+def get_translation_cache():
+    """Get the process-wide persistent translation cache"""
+    return TranslationCache()
+
+@st.cache_resource(show_spinner=False)
+def get_scheme_translations():
+    """Get the precomputed scheme catalog translations, if the ingest job has produced them"""
+    if not os.path.exists(SCHEME_TRANSLATIONS_PATH):
         return None
+    return TranslationCache(SCHEME_TRANSLATIONS_PATH)
 
 def initialize_translation_settings():
     """Initialize translation settings in session state"""
@@ -27,34 +99,212 @@ def initialize_translation_settings():
     if "selected_language" not in st.session_state:
         st.session_state.selected_language = LANGUAGES["en"]
 
-def translate_text(text, target_lang=None):
-    """Translate text to target language"""
-    if not text or not isinstance(text, str):
-        return text
-        
+def _get_worker_translator(target_lang):
+    """Translator owned by the current pool thread.
+
+    GoogleTranslator keeps the text of the in-flight request on the instance, so
+    one instance can't be shared by concurrent requests.
+    """
+    translators = getattr(_worker_state, "translators", None)
+    if translators is None:
+        translators = _worker_state.translators = {}
+    if target_lang not in translators:
+        translators[target_lang] = get_translator(source='en', target=target_lang)
+    return translators[target_lang]
+
+def _split_long_sentence(sentence: str, separator: str, limit: int) -> List[Tuple[str, str]]:
+    """Break a sentence longer than limit on word boundaries (hard-cut oversized words).
+    
+    The whitespace at each cut becomes that part's separator, so joining part +
+    separator for every pair reproduces the sentence and its separator.
+    """
+    if len(sentence) <= limit:
+        return [(sentence, separator)]
+    
+    pieces = []
+    start = end = None
+    for word in re.finditer(r"\S+", sentence):
+        word_start, word_end = word.span()
+        while word_end - word_start > limit:
+            if start is not None:
+                pieces.append((start, end))
+                start = None
+            pieces.append((word_start, word_start + limit))
+            word_start += limit
+        if word_start == word_end:
+            continue
+        if start is not None and word_end - start > limit:
+            pieces.append((start, end))
+            start = word_start
+        elif start is None:
+            start = word_start
+        end = word_end
+    if start is not None:
+        pieces.append((start, end))
+    
+    # Leading whitespace stays with the first part, trailing whitespace with the last separator
+    pieces[0] = (0, pieces[0][1])
+    parts = [(sentence[s:e], sentence[e:next_start]) for (s, e), (next_start, _) in zip(pieces, pieces[1:])]
+    last_start, last_end = pieces[-1]
+    return parts + [(sentence[last_start:last_end], sentence[last_end:] + separator)]
+
+def _split_segments(text: str, limit: int = MAX_REQUEST_CHARS) -> List[Tuple[str, str]]:
+    """Split text into (segment, separator) pairs that each fit in one request.
+    
+    Cuts fall on sentence boundaries where possible, and always on line breaks so
+    no segment contains BATCH_SEPARATOR. Joining segment + separator for every
+    pair reproduces the text.
+    """
+    sentences = []
+    position = 0
+    for boundary in _SENTENCE_BOUNDARY.finditer(text):
+        sentences.append((text[position:boundary.start()], boundary.group()))
+        position = boundary.end()
+    sentences.append((text[position:], ""))
+    
+    segments = []
+    current, current_separator = "", ""
+    for sentence, separator in sentences:
+        for part, part_separator in _split_long_sentence(sentence, separator, limit):
+            if current and len(current) + len(current_separator) + len(part) > limit:
+                segments.append((current, current_separator))
+                current = part
+            elif current:
+                current = current + current_separator + part
+            else:
+                current = part
+            current_separator = part_separator
+            if BATCH_SEPARATOR in part_separator:
+                segments.append((current, current_separator))
+                current, current_separator = "", ""
+    if current or current_separator:
+        segments.append((current, current_separator))
+    return segments
+
+def _pack_requests(texts: List[str]) -> List[List[str]]:
+    """Group texts so each group joined with BATCH_SEPARATOR fits in one request"""
+    packs = []
+    current = []
+    current_len = 0
+    for text in texts:
+        added_len = len(text) + (len(BATCH_SEPARATOR) if current else 0)
+        if current and current_len + added_len > MAX_REQUEST_CHARS:
+            packs.append(current)
+            current, current_len = [], 0
+            added_len = len(text)
+        current.append(text)
+        current_len += added_len
+    if current:
+        packs.append(current)
+    return packs
+
+@traced("translation_request", provider="google_translate", operation="translate")
+def _translate_pack(target_lang: str, pack: List[str]) -> List[str]:
+    """Translate one packed request on a pool thread"""
+    translator = _get_worker_translator(target_lang)
+    if len(pack) == 1:
+        return [translator.translate(pack[0])]
+    
+    translated = translator.translate(BATCH_SEPARATOR.join(pack))
+    parts = translated.split(BATCH_SEPARATOR) if translated else []
+    if len(parts) == len(pack):
+        return [part.strip() for part in parts]
+    # The service merged or split lines; fall back to one request per segment
+    return [translator.translate(text) for text in pack]
+
+def _translate_concurrently(texts: List[str], target_lang: str) -> Dict[str, str]:
+    """Translate uncached texts in one parallel wave of requests.
+    
+    Every text is cut into segments, identical segments are sent once, segments are
+    packed into as few requests as possible, and the requests run on the bounded
+    translation pool. A text is only returned if all of its segments translated.
+    """
+    segmented = {text: _split_segments(text) for text in texts}
+    unique_segments = list(dict.fromkeys(
+        segment for segments in segmented.values() for segment, _ in segments if segment.strip()
+    ))
+    
+    packs = _pack_requests(unique_segments)
+    futures = [submit(_translation_pool, _translate_pack, target_lang, pack) for pack in packs]
+    segment_translations = {}
+    for pack, future in zip(packs, futures):
+        try:
+            segment_translations.update(zip(pack, future.result()))
+        except Exception as e:
+            print(f"Translation error: {e}")
+    
+    translations = {}
+    for text, segments in segmented.items():
+        parts = []
+        for segment, separator in segments:
+            translated = segment_translations.get(segment) if segment.strip() else segment
+            if translated is None:
+                break
+            parts.append(translated + separator)
+        else:
+            translated_text = "".join(parts).strip()
+            if translated_text:
+                translations[text] = translated_text
+    return translations
+
+@traced("translation")
+def translate_many(texts, target_lang=None):
+    """Translate a list of texts, sending all uncached strings in one concurrent wave"""
     if not target_lang:
         target_lang = st.session_state.get('language', 'en')
     
     if target_lang == 'en':
-        return text
+        return list(texts)
     
+    translatable = list(dict.fromkeys(t for t in texts if t and isinstance(t, str)))
+    results = {}
     try:
-        # Get cached translator for target language
-        translator = get_translator(target_lang)
-        if translator:
-            # Split text into smaller chunks if it's too long
-            if len(text) > 5000:
-                chunks = [text[i:i+5000] for i in range(0, len(text), 5000)]
-                translated_chunks = [translator.translate(chunk) for chunk in chunks]
-                return ' '.join(translated_chunks)
-            else:
-                return translator.translate(text)
-        return text
+        # Scheme content is served from the precomputed catalog, then the live cache
+        scheme_translations = get_scheme_translations()
+        if scheme_translations:
+            results = scheme_translations.get_many(translatable, target_lang)
+            record_cache_lookup("scheme_translations", len(results), len(translatable) - len(results))
+        
+        cache = get_translation_cache()
+        remaining = [t for t in translatable if t not in results]
+        cached = cache.get_many(remaining, target_lang)
+        record_cache_lookup("translation", len(cached), len(remaining) - len(cached))
+        results.update(cached)
+        uncached = [t for t in translatable if t not in results]
+        
+        if uncached:
+            translated = _translate_concurrently(uncached, target_lang)
+            cache.set_many(translated, target_lang)
+            results.update(translated)
             
     except Exception as e:
         print(f"Translation error: {e}")
-        return text  # Fallback to original text if translation fails
+    
+    # Fallback to original text for anything that couldn't be translated
+    return [results.get(t, t) if t and isinstance(t, str) else t for t in texts]
+
+def translate_text(text, target_lang=None):
+    """Translate text to target language"""
+    if not text or not isinstance(text, str):
+        return text
+    
+    # Long texts are split on sentence boundaries and the pieces translated in parallel
+    return translate_many([text], target_lang=target_lang)[0]
+
+def prefetch_translations(texts, target_lang=None):
+    """Warm the cache with every string a page is about to render, in one batch"""
+    translate_many(texts, target_lang=target_lang)
+
+def prewarm_ui_strings(target_lang):
+    """Translate the static UI labels once per process and language"""
+    if target_lang == 'en' or target_lang in _warmed_languages:
+        return
+    prefetch_translations(UI_STRINGS, target_lang=target_lang)
+    # Failed translations aren't cached, so a language only counts as warm once every label is
+    if len(get_translation_cache().get_many(UI_STRINGS, target_lang)) == len(set(UI_STRINGS)):
+        _warmed_languages.add(target_lang)
 
+@traced("translation", provider="google_translate", operation="translate")
 def translate_to_english(text: str) -> str:
     """Translate text from any language to English."""
     try:
@@ -64,9 +314,10 @@ def translate_to_english(text: str) -> str:
             return text
             
         # Translate to English using your translation service
-        translator = GoogleTranslator(source=source_lang, target='en')
+        translator = get_translator(source=source_lang, target='en')
         translated = translator.translate(text)
         return translated.text
     except Exception as e:
         print(f"Translation error: {str(e)}")
+        record_error(e)
         return text  # Return original text if translation fails
\ No newline at end of file
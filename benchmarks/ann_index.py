@@ -0,0 +1,151 @@
+"""Latency and recall of the IVF index against exact search on synthetic corpora.
+
+Each corpus is a mixture of Gaussian clusters of unit vectors (real embeddings
+cluster by topic too). Queries are fresh draws from the same mixture. For
+every size the script builds an exact LocalIndex and an IVFIndex, saves the
+IVF index and loads it back memory-mapped, then times exact search and IVF
+search at each nprobe. Recall@k is measured against the exact top-k. With
+--faiss, a faiss IVF index is measured too; faiss must be installed.
+
+    python -m benchmarks.ann_index
+    python -m benchmarks.ann_index --sizes 10000 100000 1000000 --dim 128 --nprobe 1 4 16 64
+    python -m benchmarks.ann_index --sizes 100000 --dim 1536 --precision int8 --output benchmarks/results/ann_index.json
+
+A million rows at the default 128 dims needs about 2 GB of memory while building.
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from Python_Files.ann_index import FaissIndex, IVFIndex, default_n_lists
+from Python_Files.local_index import LocalIndex, PRECISIONS, normalize_rows
+from Python_Files.tracing import summarize
+
+# Rows generated at a time, so no float64 temporary of the whole corpus is made
+GENERATE_BLOCK_ROWS = 65536
+
+def synthetic_vectors(rows: int, centers: np.ndarray, spread: float, rng: np.random.Generator) -> np.ndarray:
+    """Unit float32 rows, each a random center plus Gaussian noise of relative size spread."""
+    vectors = np.empty((rows, centers.shape[1]), dtype=np.float32)
+    scale = spread / np.sqrt(centers.shape[1])
+    for start in range(0, rows, GENERATE_BLOCK_ROWS):
+        count = min(GENERATE_BLOCK_ROWS, rows - start)
+        block = centers[rng.integers(0, len(centers), count)]
+        block += scale * rng.standard_normal((count, centers.shape[1]), dtype=np.float32)
+        vectors[start:start + count] = block
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def _search_ms(search, queries: np.ndarray, k: int):
+    """(latencies in ms, result rows) of search over every query."""
+    timings, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows, _ = search(query, k)
+        timings.append((time.perf_counter() - start) * 1000)
+        results.append(rows)
+    return timings, results
+
+def _recall(ids: List[np.ndarray], expected: List[set], k: int) -> float:
+    hits = sum(len(truth & set(found.tolist())) for found, truth in zip(ids, expected))
+    return round(hits / (k * len(expected)), 4)
+
+def measure_size(rows: int, args) -> Dict[str, Any]:
+    rng = np.random.default_rng(args.seed)
+    centers = normalize_rows(rng.standard_normal((args.clusters, args.dim), dtype=np.float32))
+    vectors = synthetic_vectors(rows, centers, args.spread, rng)
+    queries = synthetic_vectors(args.queries, centers, args.spread, rng)
+    # Row numbers as ids, so results of indexes storing rows in another order compare directly
+    records = [{"chunk_id": i} for i in range(rows)]
+    n_lists = args.n_lists or default_n_lists(rows)
+    report = {"rows": rows, "dim": args.dim, "n_lists": n_lists, "variants": {}}
+
+    # Exact float32 search is the baseline for every precision
+    exact = LocalIndex(vectors, records)
+    timings, found = _search_ms(exact.search, queries, args.k)
+    expected = [set(exact.records[i]["chunk_id"] for i in top.tolist()) for top in found]
+    report["variants"]["exact"] = {"nprobe": None, "recall_at_k": 1.0, "latency_ms": summarize({"exact": timings})["exact"]}
+    del exact
+
+    if args.faiss:
+        start = time.perf_counter()
+        index = FaissIndex.build(vectors, records, args.precision, n_lists=n_lists)
+        report["faiss_build_s"] = round(time.perf_counter() - start, 2)
+        # faiss keeps rows in input order, so row numbers are the ids
+        for nprobe in args.nprobe:
+            timings, found = _search_ms(lambda query, k: index.search(query, k, nprobe=nprobe), queries, args.k)
+            report["variants"][f"faiss nprobe={nprobe}"] = {
+                "nprobe": nprobe,
+                "recall_at_k": _recall(found, expected, args.k),
+                "latency_ms": summarize({"faiss": timings})["faiss"],
+            }
+        del index
+
+    start = time.perf_counter()
+    index = IVFIndex.build(vectors, records, args.precision, n_lists=n_lists, seed=args.seed)
+    report["build_s"] = round(time.perf_counter() - start, 2)
+    del vectors
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        index.save(directory)
+        report["save_s"] = round(time.perf_counter() - start, 2)
+        del index
+        start = time.perf_counter()
+        index = IVFIndex.load(directory, args.precision)
+        report["load_s"] = round(time.perf_counter() - start, 2)
+
+        for nprobe in args.nprobe:
+            timings, found = _search_ms(lambda query, k: index.search(query, k, nprobe=nprobe), queries, args.k)
+            ids = [np.array([index.records[i]["chunk_id"] for i in top.tolist()]) for top in found]
+            report["variants"][f"ivf nprobe={nprobe}"] = {
+                "nprobe": nprobe,
+                "recall_at_k": _recall(ids, expected, args.k),
+                "latency_ms": summarize({"ivf": timings})["ivf"],
+            }
+    return report
+
+def print_report(reports: List[Dict[str, Any]], k: int, precision: str):
+    for report in reports:
+        exact_p50 = report["variants"]["exact"]["latency_ms"]["p50"]
+        print(f"\n{report['rows']} rows x {report['dim']} dims, {precision}, {report['n_lists']} lists; "
+              f"build {report['build_s']}s, save {report['save_s']}s, load {report['load_s']}s")
+        print(f"{'variant':<18} {'recall@' + str(k):>9} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8}")
+        for name, variant in report["variants"].items():
+            latency = variant["latency_ms"]
+            speedup = exact_p50 / latency["p50"] if latency["p50"] else float("inf")
+            print(f"{name:<18} {variant['recall_at_k']:>9.3f} {latency['p50']:>8.2f} "
+                  f"{latency['p95']:>8.2f} {speedup:>7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="Exact vs IVF search latency and recall on synthetic vectors.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=128, help="Vector dimensions (ada-002 embeddings have 1536)")
+    parser.add_argument("--clusters", type=int, default=1000, help="Gaussian clusters in the synthetic corpus")
+    parser.add_argument("--spread", type=float, default=1.0, help="Noise around each cluster center, relative to it")
+    parser.add_argument("--precision", choices=PRECISIONS, default="float32")
+    parser.add_argument("--n-lists", type=int, help="IVF lists (default: 4 * sqrt(rows))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--faiss", action="store_true", help="Also measure a faiss IVF index")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    reports = [measure_size(rows, args) for rows in args.sizes]
+    print_report(reports, args.k, args.precision)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({"k": args.k, "precision": args.precision, "sizes": reports}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
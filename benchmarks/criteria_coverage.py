@@ -0,0 +1,152 @@
+"""Coverage, accuracy and speed of the rule-based hard-criteria extractor on chunks/.
+
+For every chunk, ``criteria_rules.extract_criteria`` either reaches the
+confidence threshold (the rules answer and no LLM call is made) or not (the LLM
+is asked). Reported: the share of chunks the rules cover, which fields keep the
+rest below the threshold, what each field was read as, and time per extraction.
+
+Coverage alone says nothing about whether the rules read the limits right, so
+the rules are also compared with hand labels (``fixtures/criteria_labels.json``:
+income and age limits of a seeded sample of rule-answered chunks plus chunks
+that state a limit with a negation). Agreement is reported over all labelled
+chunks and over those the rules answer, which is what users would see.
+
+    python -m benchmarks.criteria_coverage
+    python -m benchmarks.criteria_coverage --samples 10 --output benchmarks/results/criteria_coverage.json
+"""
+from typing import Any, Dict, List
+from collections import Counter, defaultdict
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from Python_Files import criteria_rules
+from Python_Files.service_clients import read_chunk_records
+from Python_Files.tracing import summarize
+
+DEFAULT_LABELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "criteria_labels.json")
+
+CONFIDENCE_LABELS = {
+    criteria_rules.EXPLICIT: "explicit",
+    criteria_rules.WEAK_EXPLICIT: "weak_explicit",
+    criteria_rules.NOT_MENTIONED: "not_mentioned",
+    criteria_rules.CONFLICTING: "conflicting",
+    criteria_rules.UNEXPLAINED: "unexplained",
+}
+
+def measure(records: List[Dict[str, Any]], threshold: float, samples: int, seed: int) -> Dict[str, Any]:
+    outcomes = Counter()
+    blocking = Counter()
+    field_outcomes = defaultdict(Counter)
+    timings = []
+    restricted = []
+
+    for record in records:
+        start = time.perf_counter()
+        extraction = criteria_rules.extract_criteria(record["text"])
+        timings.append((time.perf_counter() - start) * 1_000_000)
+
+        confident = extraction.confidence >= threshold
+        outcomes["rules" if confident else "llm"] += 1
+        for name, confidence in extraction.field_confidence.items():
+            field_outcomes[name][CONFIDENCE_LABELS.get(confidence, str(confidence))] += 1
+            if confidence < threshold:
+                blocking[name] += 1
+        if confident and any(confidence == criteria_rules.EXPLICIT for confidence in extraction.field_confidence.values()):
+            restricted.append({"chunk_id": record["chunk_id"], "criteria": extraction.criteria})
+
+    total = len(records)
+    rng = random.Random(seed)
+    return {
+        "chunks": total,
+        "threshold": threshold,
+        "covered_by_rules": outcomes["rules"],
+        "coverage": round(outcomes["rules"] / total, 4) if total else 0,
+        "fields_below_threshold": dict(blocking.most_common()),
+        "field_outcomes": {name: dict(counts) for name, counts in field_outcomes.items()},
+        "extraction_us": summarize({"extract_criteria": timings}).get("extract_criteria", {}),
+        # Chunks answered by the rules with at least one restriction, for spot checks against the text
+        "samples": rng.sample(restricted, min(samples, len(restricted))),
+    }
+
+def _same_range(read, label) -> bool:
+    return [None if value is None else float(value) for value in read] == \
+           [None if value is None else float(value) for value in label]
+
+def measure_agreement(records: List[Dict[str, Any]], labels: Dict[str, Any], threshold: float) -> Dict[str, Any]:
+    """Per labelled field: how often the rules read the labelled limits, over all chunks and rule-answered ones."""
+    texts = {record["chunk_id"]: record["text"] for record in records}
+    fields = {name: {"labelled": 0, "agree": 0, "answered": 0, "answered_agree": 0} for name in labels["fields"]}
+    disagreements = []
+    for label in labels["labels"]:
+        if label["chunk_id"] not in texts:
+            continue
+        extraction = criteria_rules.extract_criteria(texts[label["chunk_id"]])
+        answered = extraction.confidence >= threshold
+        for name, counts in fields.items():
+            agree = _same_range(extraction.criteria[name], label[name])
+            counts["labelled"] += 1
+            counts["agree"] += agree
+            counts["answered"] += answered
+            counts["answered_agree"] += answered and agree
+            if not agree:
+                disagreements.append({"chunk_id": label["chunk_id"], "field": name, "answered": answered,
+                                      "rules": list(extraction.criteria[name]), "label": label[name],
+                                      "note": label.get("note")})
+    return {"fields": fields, "disagreements": disagreements}
+
+def print_report(report: Dict[str, Any]):
+    print(f"{report['covered_by_rules']}/{report['chunks']} chunks covered by the rules "
+          f"({report['coverage']:.1%}) at confidence >= {report['threshold']}")
+    timing = report["extraction_us"]
+    if timing:
+        print(f"Extraction time: p50={timing['p50']:.0f} us  p95={timing['p95']:.0f} us  p99={timing['p99']:.0f} us")
+    print("\nChunks sent to the LLM because of each field:")
+    for name, count in report["fields_below_threshold"].items():
+        print(f"  {name:<20} {count}")
+    print("\nField outcomes:")
+    for name, counts in report["field_outcomes"].items():
+        print(f"  {name:<20} " + "  ".join(f"{label}={count}" for label, count in sorted(counts.items())))
+    if report.get("agreement"):
+        print("\nAgreement with hand labels (all labelled / answered by the rules):")
+        for name, counts in report["agreement"]["fields"].items():
+            print(f"  {name:<20} {counts['agree']}/{counts['labelled']}  {counts['answered_agree']}/{counts['answered']}")
+        for miss in report["agreement"]["disagreements"]:
+            status = "answered" if miss["answered"] else "sent to LLM"
+            print(f"  {miss['chunk_id']} {miss['field']}: rules {miss['rules']}, label {miss['label']} ({status})")
+    for sample in report["samples"]:
+        print(f"\n  {sample['chunk_id']}: {sample['criteria']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how many chunks the criteria rules answer without the LLM.")
+    parser.add_argument("--chunks-dir", default=os.path.join(ROOT_DIR, "chunks"))
+    parser.add_argument("--threshold", type=float, default=criteria_rules.CONFIDENCE_THRESHOLD)
+    parser.add_argument("--labels", default=DEFAULT_LABELS_PATH, help="Hand-labelled criteria to measure agreement against")
+    parser.add_argument("--samples", type=int, default=0, help="Print this many rule-answered chunks with restrictions")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    records = read_chunk_records(args.chunks_dir)
+    if not records:
+        print(f"No chunks found in {args.chunks_dir}")
+        sys.exit(1)
+
+    report = measure(records, args.threshold, args.samples, args.seed)
+    if args.labels and os.path.exists(args.labels):
+        with open(args.labels, 'r', encoding='utf-8') as f:
+            report["agreement"] = measure_agreement(records, json.load(f), args.threshold)
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""Load test of the Find Right Scheme questionnaire against one Streamlit server.
+
+Starts ``streamlit run Home.py`` (or targets a running server with ``--url``)
+and drives simulated users through ``pages/2_Find_Right_Scheme.py`` over
+Streamlit's websocket protocol, as browsers do. Every user is its own session
+in the same server process, and up to ``--concurrency`` sessions are rerunning
+at once, so they contend for that process's threads, caches and locks. Each
+user picks a random state, answers every question from a seeded random
+profile and waits for the results.
+
+Reported per rerun kind (first_load, answer, completion, results_rerun):
+p50/p95/p99 latency from sending the rerun to the script finishing. Per traced
+stage: span count and mean time, scraped from the server's metrics sidecar.
+The server's resident memory is sampled after a warm-up session, at its peak,
+and with every measured session still connected, which gives the memory held
+per session. Needs the websockets and psutil packages.
+
+By default the server fakes its services (see ``Python_Files/service_clients.py``),
+so the numbers reflect the app's own work plus any ``--latency-ms`` injected:
+
+    python -m benchmarks.load_questionnaire --users 50 --concurrency 10
+    python -m benchmarks.load_questionnaire --users 50 --concurrency 25 --latency-ms openai=800,pinecone=40
+"""
+from typing import Any, Dict, List, Optional
+from collections import defaultdict
+from dataclasses import dataclass, field
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import psutil
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+from Python_Files import service_clients
+from Python_Files.tracing import summarize
+
+PAGE_NAME = "Find_Right_Scheme"
+STATE_SELECTOR = "state_selector_find_schemes"
+LANGUAGE_SELECTOR = "lang_select"
+
+# Upper bound on questions answered per session, in case the page stops advancing
+MAX_STEPS = 30
+
+# Ranges for numeric questions; anything else gets 0-10
+NUMBER_RANGES = {
+    "age": (18, 80),
+    "annual_income": (30000, 1500000),
+    "annual_turnover": (100000, 5000000),
+    "land_holding": (0, 10),
+}
+
+FINISHED_EARLY_FOR_RERUN = ForwardMsg.ScriptFinishedStatus.FINISHED_EARLY_FOR_RERUN
+STAGE_SAMPLE = re.compile(r'^rightscheme_stage_duration_seconds_(sum|count)\{stage="([^"]*)"\} (\S+)$')
+
+@dataclass
+class Widget:
+    key: str
+    kind: str
+    proto: Any
+
+@dataclass
+class SessionResult:
+    user: int
+    state: str
+    language: str
+    reruns: Dict[str, List[float]] = field(default_factory=dict)
+    completed: bool = False
+    error: Optional[str] = None
+
+def _widget_key(widget_id: str) -> str:
+    """User key of a widget; ids look like $$ID-<hash>-<key>."""
+    return widget_id.split("-", 2)[-1]
+
+class Session:
+    """One browser tab: a websocket session that reruns the page with the widget values a user set."""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.websocket = None
+        self.widgets: Dict[str, Widget] = {}
+        self.exceptions: List[str] = []
+        # Widget values the frontend would send back on every rerun, by widget id
+        self.values: Dict[str, Any] = {}
+
+    async def connect(self):
+        self.websocket = await websockets.connect(f"{self.url}/_stcore/stream", subprotocols=["streamlit"],
+                                                  max_size=None, open_timeout=self.timeout)
+
+    async def close(self):
+        if self.websocket is not None:
+            await self.websocket.close()
+
+    def set_value(self, key: str, field_name: str, value):
+        self.values[self.widgets[key].proto.id] = (field_name, value)
+
+    async def rerun(self, trigger: Optional[str] = None) -> float:
+        """Rerun the page, optionally clicking a button; returns milliseconds until the script finished."""
+        message = BackMsg()
+        message.rerun_script.page_name = PAGE_NAME
+        message.rerun_script.query_string = ""
+        for widget_id, (field_name, value) in self.values.items():
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = widget_id
+            if field_name == "string_array_value":
+                state.string_array_value.data.extend(value)
+            else:
+                setattr(state, field_name, value)
+        if trigger is not None:
+            state = message.rerun_script.widget_states.widgets.add()
+            state.id = self.widgets[trigger].proto.id
+            state.trigger_value = True
+
+        self.widgets = {}
+        self.exceptions = []
+        start = time.perf_counter()
+        await self.websocket.send(message.SerializeToString())
+        await asyncio.wait_for(self._read_until_finished(), self.timeout)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        # The frontend forgets values of widgets that are no longer on screen
+        live_ids = {widget.proto.id for widget in self.widgets.values()}
+        self.values = {widget_id: value for widget_id, value in self.values.items() if widget_id in live_ids}
+        return elapsed_ms
+
+    async def _read_until_finished(self):
+        while True:
+            message = ForwardMsg()
+            message.ParseFromString(await self.websocket.recv())
+            kind = message.WhichOneof("type")
+            if kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+                element = message.delta.new_element
+                element_kind = element.WhichOneof("type")
+                proto = getattr(element, element_kind)
+                if element_kind == "exception":
+                    self.exceptions.append(proto.message)
+                elif getattr(proto, "id", ""):
+                    key = _widget_key(proto.id)
+                    self.widgets[key] = Widget(key, element_kind, proto)
+            elif kind == "script_finished":
+                if message.script_finished != FINISHED_EARLY_FOR_RERUN:
+                    return
+                # The page called st.rerun(); only what the next run draws is on screen
+                self.widgets = {}
+                self.exceptions = []
+
+    def question(self) -> Optional[Widget]:
+        """Widget of the question on screen; question widgets are keyed input_<id>."""
+        return next((widget for key, widget in self.widgets.items() if key.startswith("input_")), None)
+
+def _answer(session: Session, widget: Widget, rng: random.Random):
+    options = list(getattr(widget.proto, "options", []))
+    if widget.kind == "selectbox":
+        session.set_value(widget.key, "string_value", rng.choice(options))
+    elif widget.kind == "multiselect":
+        session.set_value(widget.key, "string_array_value", rng.sample(options, k=rng.randint(1, min(2, len(options)))))
+    elif widget.kind == "number_input":
+        low, high = NUMBER_RANGES.get(widget.key[len("input_"):], (0, 10))
+        session.set_value(widget.key, "double_value", rng.randint(low, high))
+    else:
+        session.set_value(widget.key, "string_value", "Looking for schemes that fit my situation")
+
+async def run_user(url: str, user: int, states: List[str], languages: Dict[str, str], seed: int,
+                   timeout: float, sessions: List[Session]) -> SessionResult:
+    """Walk one session through the questionnaire; the session is left open in ``sessions``."""
+    rng = random.Random(seed + user)
+    result = SessionResult(user=user, state=rng.choice(states), language=rng.choice(list(languages)))
+    session = Session(url, timeout)
+    sessions.append(session)
+
+    async def rerun(kind: str, trigger: Optional[str] = None):
+        elapsed_ms = await session.rerun(trigger)
+        if kind == "answer" and session.question() is None:
+            kind = "completion"
+        result.reruns.setdefault(kind, []).append(elapsed_ms)
+        if session.exceptions:
+            raise RuntimeError(session.exceptions[0])
+
+    try:
+        await session.connect()
+        await rerun("first_load")
+        # Picking the state and language in the sidebar; the questionnaire starts once a state is set
+        session.set_value(STATE_SELECTOR, "string_value", result.state)
+        session.set_value(LANGUAGE_SELECTOR, "string_value", languages[result.language])
+        await rerun("first_load")
+        for _ in range(MAX_STEPS):
+            question = session.question()
+            if question is None:
+                break
+            _answer(session, question, rng)
+            await rerun("answer", trigger="next_button")
+        result.completed = session.question() is None and "answer" in result.reruns
+        if not result.completed:
+            raise RuntimeError("The questionnaire didn't finish")
+        await rerun("results_rerun")
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+async def run_users(url: str, users: List[int], concurrency: int, states: List[str], languages: Dict[str, str],
+                    seed: int, timeout: float, sessions: List[Session]) -> List[SessionResult]:
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run_limited(user: int) -> SessionResult:
+        async with limit:
+            return await run_user(url, user, states, languages, seed, timeout, sessions)
+
+    return await asyncio.gather(*(run_limited(user) for user in users))
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+def _get(url: str) -> str:
+    with urllib.request.urlopen(url, timeout=5) as response:
+        return response.read().decode("utf-8")
+
+def start_server(port: int, metrics_port: int, env: Dict[str, str], log_path: str, timeout: float) -> subprocess.Popen:
+    command = [sys.executable, "-m", "streamlit", "run", "Home.py", "--server.headless", "true",
+               "--server.port", str(port), "--browser.gatherUsageStats", "false"]
+    with open(log_path, "w", encoding="utf-8") as log:
+        server = subprocess.Popen(command, cwd=ROOT_DIR, env={**os.environ, **env, "METRICS_PORT": str(metrics_port)},
+                                  stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Streamlit exited with code {server.returncode}, see {log_path}")
+        try:
+            _get(f"http://localhost:{port}/_stcore/health")
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f"Streamlit didn't start within {timeout:.0f}s, see {log_path}")
+
+def stage_totals(metrics_url: Optional[str]) -> Dict[str, Dict[str, float]]:
+    """{stage: {"sum": seconds, "count": spans}} from the server's metrics; empty when unavailable."""
+    if not metrics_url:
+        return {}
+    try:
+        text = _get(metrics_url)
+    except OSError:
+        return {}
+    totals = defaultdict(dict)
+    for line in text.splitlines():
+        match = STAGE_SAMPLE.match(line)
+        if match:
+            kind, stage, value = match.groups()
+            totals[stage][kind] = float(value)
+    return totals
+
+def stage_deltas(before: Dict[str, Dict[str, float]], after: Dict[str, Dict[str, float]]) -> Dict[str, Dict[str, float]]:
+    stages = {}
+    for stage, totals in after.items():
+        count = totals.get("count", 0) - before.get(stage, {}).get("count", 0)
+        if count > 0:
+            seconds = totals.get("sum", 0) - before.get(stage, {}).get("sum", 0)
+            stages[stage] = {"count": int(count), "mean": round(seconds / count * 1000, 2)}
+    return stages
+
+async def sample_rss(process: psutil.Process, peak: List[int], interval: float = 0.1):
+    """Keep the highest resident memory of the server in peak[0] until cancelled."""
+    while True:
+        peak[0] = max(peak[0], process.memory_info().rss)
+        await asyncio.sleep(interval)
+
+async def run_load(url: str, server_pid: Optional[int], metrics_url: Optional[str], users: int, concurrency: int,
+                   states: List[str], languages: Dict[str, str], seed: int, timeout: float) -> Dict[str, Any]:
+    process = psutil.Process(server_pid) if server_pid else None
+    sessions: List[Session] = []
+    try:
+        # One session first, so imports and shared caches aren't counted against the measured ones
+        warmup = await run_user(url, -1, states, languages, seed, timeout, sessions)
+        if warmup.error:
+            print(f"Warm-up session failed: {warmup.error}")
+        await sessions.pop().close()
+        stages_before = stage_totals(metrics_url)
+
+        peak = [0]
+        baseline_rss = process.memory_info().rss if process else None
+        sampler = asyncio.create_task(sample_rss(process, peak)) if process else None
+        start = time.perf_counter()
+        results = await run_users(url, list(range(users)), concurrency, states, languages, seed, timeout, sessions)
+        elapsed = time.perf_counter() - start
+        # Every measured session is still connected, so the server still holds its state
+        held_rss = process.memory_info().rss if process else None
+        if sampler:
+            sampler.cancel()
+        stages = stage_deltas(stages_before, stage_totals(metrics_url))
+    finally:
+        await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+
+    reruns = defaultdict(list)
+    for result in results:
+        for kind, samples in result.reruns.items():
+            reruns[kind].extend(samples)
+    completed = sum(result.completed and not result.error for result in results)
+
+    report = {
+        "users": users,
+        "concurrency": min(concurrency, users),
+        "completed": completed,
+        "errors": [{"user": r.user, "error": r.error} for r in results if r.error],
+        "elapsed_s": round(elapsed, 3),
+        "completed_per_minute": round(completed / elapsed * 60, 2) if elapsed else 0,
+        "rerun_latency_ms": summarize(reruns),
+        "stage_latency_ms": stages,
+    }
+    if process:
+        report["server_rss_mb"] = {
+            "baseline": round(baseline_rss / 2**20, 1),
+            "peak": round(max(peak[0], held_rss) / 2**20, 1),
+            "held": round(held_rss / 2**20, 1),
+            "per_session": round((held_rss - baseline_rss) / 2**20 / users, 3) if users else 0,
+        }
+    return report
+
+def print_report(report: Dict[str, Any]):
+    print(f"{report['completed']}/{report['users']} sessions completed in {report['elapsed_s']:.1f}s "
+          f"at concurrency {report['concurrency']} ({report['completed_per_minute']:.1f} completions/min)")
+    print("\nRerun latency (ms):")
+    for name, stats in report["rerun_latency_ms"].items():
+        print(f"  {name:<16} n={stats['count']:<6} p50={stats['p50']:>9.1f} p95={stats['p95']:>9.1f} p99={stats['p99']:>9.1f}")
+    if report["stage_latency_ms"]:
+        print("\nStage latency in the server (ms):")
+        for name, stats in report["stage_latency_ms"].items():
+            print(f"  {name:<32} n={stats['count']:<6} mean={stats['mean']:>9.1f}")
+    if "server_rss_mb" in report:
+        memory = report["server_rss_mb"]
+        print(f"\nServer RSS: {memory['baseline']:.1f} MB after warm-up, {memory['peak']:.1f} MB peak, "
+              f"{memory['held']:.1f} MB with sessions open ({memory['per_session']:.2f} MB per session)")
+    if report["errors"]:
+        print(f"\n{len(report['errors'])} sessions failed:")
+        for failure in report["errors"][:10]:
+            print(f"  user {failure['user']}: {failure['error']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent users completing the scheme questionnaire "
+                                                 "against one Streamlit server.")
+    parser.add_argument("--users", type=int, default=20, help="Sessions to simulate")
+    parser.add_argument("--concurrency", type=int, default=5, help="Sessions running at once")
+    parser.add_argument("--url", help="Target a running server, e.g. http://localhost:8501, instead of starting one")
+    parser.add_argument("--server-pid", type=int, help="With --url, the server's process id, to measure its memory")
+    parser.add_argument("--metrics-url", help="With --url, the server's metrics endpoint, e.g. http://localhost:9464/metrics")
+    parser.add_argument("--mode", choices=service_clients.MODES, default="fake", help="Service backend (see service_clients)")
+    parser.add_argument("--fixtures", help="Fixture file for replay/record modes")
+    parser.add_argument("--latency-ms", help="Injected service latency, e.g. 200 or openai=800,pinecone=40")
+    parser.add_argument("--languages", default="en", help="Comma-separated languages to draw users from, e.g. en,hi")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds allowed per rerun")
+    parser.add_argument("--log-dir", help="Where the server writes its logs (default: a temporary directory)")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    from utils.common import INDIAN_STATES, LANGUAGES
+    states = [state for state in INDIAN_STATES if state != "Select your state"]
+    languages = {lang.strip(): LANGUAGES[lang.strip()] for lang in args.languages.split(",") if lang.strip()}
+
+    server = None
+    if args.url:
+        url, server_pid, metrics_url = args.url.rstrip("/"), args.server_pid, args.metrics_url
+    else:
+        log_dir = args.log_dir or tempfile.mkdtemp(prefix="rightscheme-load-")
+        os.makedirs(log_dir, exist_ok=True)
+        env = {"SERVICE_MODE": args.mode, "LOG_DIR": log_dir,
+               "LLM_CACHE_PATH": os.environ.get("LLM_CACHE_PATH") or os.path.join(log_dir, "llm_results.sqlite3")}
+        if args.fixtures:
+            env["SERVICE_FIXTURES_PATH"] = args.fixtures
+        if args.latency_ms:
+            env["SERVICE_LATENCY_MS"] = args.latency_ms
+        port, metrics_port = _free_port(), _free_port()
+        server = start_server(port, metrics_port, env, os.path.join(log_dir, "streamlit.log"), args.timeout)
+        url, server_pid = f"http://localhost:{port}", server.pid
+        metrics_url = f"http://localhost:{metrics_port}/metrics"
+
+    try:
+        report = asyncio.run(run_load(url.replace("http", "ws", 1), server_pid, metrics_url, args.users,
+                                      args.concurrency, states, languages, args.seed, args.timeout))
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Recall, memory and latency of the quantized local index against exact float32 search.
+
+The index is built from the fake embeddings of chunks/, or from an embeddings
+file written by generate_embeddings.py. It is saved and loaded back
+memory-mapped, as a worker would load it. For each precision, with and
+without full-precision reranking, the report gives recall@k against the exact
+float32 top-k, the bytes each worker holds in memory, and the query latency.
+
+    python -m benchmarks.quantized_index
+    python -m benchmarks.quantized_index --k 5 --rerank-factor 8 --output benchmarks/results/quantized_index.json
+    python -m benchmarks.quantized_index --embeddings embeddings_20240101_120000.npy --metadata metadata_20240101_120000.json
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from Python_Files.local_index import LocalIndex, PRECISIONS, DEFAULT_RERANK_FACTOR
+from Python_Files.service_clients import fake_embedding, read_chunk_records
+from Python_Files.tracing import summarize
+
+def load_corpus(args) -> Tuple[np.ndarray, List[Dict[str, Any]], np.ndarray]:
+    """(embeddings, records, query vectors) from an embeddings file or the fake embeddings of chunks/."""
+    rng = random.Random(args.seed)
+    if args.embeddings:
+        embeddings = np.load(args.embeddings)
+        with open(args.metadata, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        # Real query embeddings aren't stored; perturbed rows stand in for them
+        noise = np.random.default_rng(args.seed).standard_normal((args.queries, embeddings.shape[1]))
+        rows = [rng.randrange(len(embeddings)) for _ in range(args.queries)]
+        norms = np.linalg.norm(embeddings[rows], axis=1, keepdims=True)
+        queries = embeddings[rows] + args.noise * norms * noise / np.sqrt(embeddings.shape[1])
+        return embeddings, records, queries
+    records = read_chunk_records(args.chunks_dir)
+    embeddings = np.vstack([fake_embedding(record["text"]) for record in records])
+    # Queries are the opening words of random chunks, embedded like the user's question would be
+    samples = [rng.choice(records)["text"] for _ in range(args.queries)]
+    queries = np.vstack([fake_embedding(" ".join(text.split()[:args.query_words])) for text in samples])
+    return embeddings, records, queries
+
+def measure(embeddings: np.ndarray, records: List[Dict[str, Any]], queries: np.ndarray,
+            k: int, rerank_factor: int) -> Dict[str, Any]:
+    report = {"rows": len(records), "dim": int(embeddings.shape[1]), "queries": len(queries), "k": k,
+              "rerank_factor": rerank_factor, "variants": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        exact = LocalIndex.build(embeddings, records)
+        expected = [set(exact.search(query, k)[0].tolist()) for query in queries]
+
+        for precision in PRECISIONS:
+            LocalIndex(exact.vectors, records, precision).save(directory)
+            index = LocalIndex.load(directory, precision, rerank_factor)
+            for rerank in ((False,) if precision == "float32" else (False, True)):
+                name = precision + ("+rerank" if rerank else "")
+                timings, hits = [], 0
+                for query, truth in zip(queries, expected):
+                    start = time.perf_counter()
+                    top, _ = index.search(query, k, rerank=rerank)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    hits += len(truth & set(top.tolist()))
+                report["variants"][name] = {
+                    "recall_at_k": round(hits / (k * len(queries)), 4),
+                    "memory_mb": round(index.memory_bytes / 2**20, 2),
+                    "latency_ms": summarize({name: timings})[name],
+                }
+    return report
+
+def print_report(report: Dict[str, Any]):
+    print(f"{report['rows']} rows x {report['dim']} dims, {report['queries']} queries, "
+          f"recall@{report['k']} against exact float32 (rerank factor {report['rerank_factor']})")
+    print(f"{'variant':<16} {'recall':>7} {'memory MB':>10} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, variant in report["variants"].items():
+        latency = variant["latency_ms"]
+        print(f"{name:<16} {variant['recall_at_k']:>7.3f} {variant['memory_mb']:>10.2f} "
+              f"{latency['p50']:>8.2f} {latency['p95']:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k and memory of the quantized local index.")
+    parser.add_argument("--chunks-dir", default=os.path.join(ROOT_DIR, "chunks"))
+    parser.add_argument("--embeddings", help="Embeddings .npy from generate_embeddings.py (default: fake embeddings of chunks/)")
+    parser.add_argument("--metadata", help="Metadata .json matching --embeddings")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--query-words", type=int, default=12, help="Words of each sampled chunk used as a fake query")
+    parser.add_argument("--noise", type=float, default=0.5, help="Relative noise added to rows used as queries with --embeddings")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank-factor", type=int, default=DEFAULT_RERANK_FACTOR)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+    if args.embeddings and not args.metadata:
+        parser.error("--embeddings needs --metadata")
+
+    embeddings, records, queries = load_corpus(args)
+    if not len(records):
+        print("No chunks to index")
+        sys.exit(1)
+
+    report = measure(embeddings, records, queries, args.k, args.rerank_factor)
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""Offline benchmarks of the recommendation and search paths.
+
+Each scenario drives one entry point with OpenAI and Pinecone served by
+``Python_Files/service_clients.py`` (recorded fixtures, or deterministic fakes),
+and reports wall time, CPU time and peak allocations overall and per traced
+stage (embedding, vector_query, llm, ...).
+
+By default the services are the offline fakes, which need no fixtures:
+
+    python -m benchmarks.run_benchmarks --iterations 20 --output benchmarks/results/latest.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/results/latest.json
+
+To benchmark real responses, record fixtures once with live credentials, then
+replay them with no network:
+
+    python -m benchmarks.run_benchmarks --mode record
+    python -m benchmarks.run_benchmarks --mode replay
+
+``--latency-ms`` injects service latency (see ``SERVICE_LATENCY_MS``), which
+only affects wall time.
+
+With ``--baseline`` the run fails if any scenario's CPU time grew by more than
+``--tolerance``.
+"""
+from typing import Any, Callable, Dict, List
+from collections import defaultdict
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from Python_Files import service_clients
+from Python_Files import tracing
+
+DEFAULT_FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "recorded.json")
+
+PROFILES = [
+    {"age": 21, "gender": "Female", "category": "SC", "annual_income": 150000, "occupation": "Student",
+     "state": "Karnataka", "education_level": "Graduate", "specific_needs": ["Scholarship", "Education Loan"]},
+    {"age": 45, "gender": "Male", "category": "General", "annual_income": 100000, "occupation": "Farmer",
+     "state": "Assam", "education_level": "Below 10th", "specific_needs": ["Agriculture Support", "Crop Insurance"]},
+    {"age": 34, "gender": "Female", "category": "OBC", "annual_income": 400000, "occupation": "Self-employed",
+     "state": "Maharashtra", "education_level": "12th Pass", "specific_needs": ["Business Loan", "Women Entrepreneurs"]},
+]
+
+QUERIES = [
+    "education loan for students",
+    "schemes for women farmers",
+    "pension for senior citizens",
+    "housing scheme for low income families",
+]
+
+class StageProfiler:
+    """Per-stage wall time, CPU time and peak allocation, collected from tracing spans.
+
+    Stages are inclusive of nested spans. Peak allocation is the most memory
+    allocated above the stage's starting point while it ran (tracemalloc).
+    """
+
+    def __init__(self):
+        self.stages = defaultdict(lambda: {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0, "peak_alloc_kb": 0.0})
+        self._open = {}
+
+    def _on_start(self, span_obj):
+        current, peak = tracemalloc.get_traced_memory()
+        # Fold the peak reached so far into the enclosing spans before resetting it
+        for state in self._open.values():
+            state["peak"] = max(state["peak"], peak)
+        tracemalloc.reset_peak()
+        self._open[span_obj.span_id] = {"cpu": time.thread_time(), "alloc": current, "peak": current}
+
+    def _on_finish(self, span_obj):
+        state = self._open.pop(span_obj.span_id, None)
+        if state is None:
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        for other in self._open.values():
+            other["peak"] = max(other["peak"], peak)
+        stage = self.stages[span_obj.stage]
+        stage["calls"] += 1
+        stage["wall_ms"] += span_obj.duration_ms
+        stage["cpu_ms"] += (time.thread_time() - state["cpu"]) * 1000
+        stage["peak_alloc_kb"] = max(stage["peak_alloc_kb"], (max(state["peak"], peak) - state["alloc"]) / 1024)
+
+    def __enter__(self):
+        tracing.add_span_listener(on_start=self._on_start, on_finish=self._on_finish)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        tracing.remove_span_listener(on_start=self._on_start, on_finish=self._on_finish)
+        return False
+
+def build_scenarios() -> Dict[str, Callable[[], List[Callable[[], Any]]]]:
+    """Scenario name -> factory returning the calls of one iteration.
+
+    Imports happen here, after service_clients is configured, because some
+    modules create their clients at import time.
+    """
+    from Python_Files.scheme_matcher import SchemeMatcher, UserProfile
+    from Python_Files.scheme_semantic_matcher import SemanticSchemeMatcher, UserProfile as SemanticUserProfile
+    from Python_Files.scheme_agent import SchemeTools
+    from Python_Files.query_vectordb import VectorDBQuerier
+
+    def scheme_matcher():
+        matcher = SchemeMatcher()
+        return [lambda p=p: matcher.get_scheme_recommendations(UserProfile(**p)) for p in PROFILES]
+
+    def semantic_matcher():
+        matcher = SemanticSchemeMatcher()
+        profiles = [SemanticUserProfile(
+            age=p["age"], gender=p["gender"], category=p["category"], annual_income=p["annual_income"],
+            occupation=p["occupation"], occupation_details={}, state=p["state"], education_level=p["education_level"],
+            specific_needs=p["specific_needs"], interests=""
+        ) for p in PROFILES]
+        return [lambda p=p: matcher.get_scheme_recommendations(p) for p in profiles]
+
+    def search_scheme():
+        tools = SchemeTools()
+        tools.set_user_state("Karnataka")
+        return [lambda q=q: tools.search_scheme(q) for q in QUERIES]
+
+    def vectordb_search():
+        querier = VectorDBQuerier()
+        return [lambda q=q: querier.search(q, top_k=5) for q in QUERIES]
+
+    return {
+        "SchemeMatcher.get_scheme_recommendations": scheme_matcher,
+        "SemanticSchemeMatcher.get_scheme_recommendations": semantic_matcher,
+        "SchemeTools.search_scheme": search_scheme,
+        "VectorDBQuerier.search": vectordb_search,
+    }
+
+def run_scenario(calls: List[Callable[[], Any]], iterations: int) -> Dict[str, Any]:
+    """Run every call `iterations` times; returns totals per iteration and per stage."""
+    profiler = StageProfiler()
+    tracemalloc.start()
+    try:
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        tracemalloc.reset_peak()
+        alloc_start = tracemalloc.get_traced_memory()[0]
+        with profiler:
+            for _ in range(iterations):
+                for call in calls:
+                    call()
+        wall_ms = (time.perf_counter() - wall_start) * 1000
+        cpu_ms = (time.process_time() - cpu_start) * 1000
+        peak_kb = (tracemalloc.get_traced_memory()[1] - alloc_start) / 1024
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "iterations": iterations,
+        "calls_per_iteration": len(calls),
+        "wall_ms_per_iteration": round(wall_ms / iterations, 3),
+        "cpu_ms_per_iteration": round(cpu_ms / iterations, 3),
+        "peak_alloc_kb": round(peak_kb, 1),
+        "stages": {
+            stage: {
+                "calls": values["calls"],
+                "wall_ms_per_iteration": round(values["wall_ms"] / iterations, 3),
+                "cpu_ms_per_iteration": round(values["cpu_ms"] / iterations, 3),
+                "peak_alloc_kb": round(values["peak_alloc_kb"], 1),
+            }
+            for stage, values in sorted(profiler.stages.items())
+        }
+    }
+
+def print_results(results: Dict[str, Dict[str, Any]]):
+    for name, result in results.items():
+        print(f"\n{name}")
+        print(f"  per iteration: wall {result['wall_ms_per_iteration']:.2f} ms, "
+              f"cpu {result['cpu_ms_per_iteration']:.2f} ms, peak alloc {result['peak_alloc_kb']:.1f} KB")
+        for stage, values in result["stages"].items():
+            print(f"    {stage:<16} calls={values['calls']:<5} wall={values['wall_ms_per_iteration']:>9.2f} ms  "
+                  f"cpu={values['cpu_ms_per_iteration']:>9.2f} ms  peak={values['peak_alloc_kb']:>9.1f} KB")
+
+def compare_to_baseline(results: Dict[str, Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    """Scenarios whose CPU time per iteration regressed beyond the tolerance."""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["cpu_ms_per_iteration"]
+        after = result["cpu_ms_per_iteration"]
+        if before and after > before * (1 + tolerance):
+            regressions.append(f"{name}: cpu {before:.2f} ms -> {after:.2f} ms (+{(after / before - 1):.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation paths against fake or recorded services.")
+    parser.add_argument("--mode", choices=("fake", "replay", "record"), default="fake",
+                        help="use offline fakes, replay recorded fixtures, or record them from the live services")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURE_PATH, help="Fixture file to replay from or record into")
+    parser.add_argument("--latency-ms", help="Injected service latency, e.g. 200 or openai=800,pinecone=40")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--scenario", action="append", help="Only run scenarios whose name contains this (repeatable)")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Results JSON to compare CPU time against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed CPU regression against the baseline")
+    args = parser.parse_args()
+
+    service_clients.configure(mode=args.mode, fixtures=args.fixtures, latency_ms=args.latency_ms)
+    # Start from an empty LLM result cache, so entries from earlier runs don't turn calls into hits
+    os.environ.setdefault("LLM_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="rightscheme-bench-"), "llm_results.sqlite3"))
+    record = args.mode == "record"
+
+    scenarios = build_scenarios()
+    if args.scenario:
+        scenarios = {name: factory for name, factory in scenarios.items() if any(s in name for s in args.scenario)}
+
+    results = {}
+    for name, factory in scenarios.items():
+        # Recording needs each request only once
+        results[name] = run_scenario(factory(), 1 if record else args.iterations)
+
+    if record:
+        service_clients.save_fixtures()
+        print(f"Recorded fixtures to {args.fixtures}")
+        return
+
+    print_results(results)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, args.baseline, args.tolerance)
+        if regressions:
+            print("\nCPU regressions against baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo CPU regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""Micro-benchmark of SchemeAnalyzer's per-scheme scores over every chunk in chunks/.
+
+Each chunk is parsed once, then every profile below is scored against all of
+the parsed schemes two ways: the calculate_* methods as they were before the
+related terms and scheme texts were hoisted out of them (kept below as the
+reference), and the current calculate_* methods. Scores are compared with the
+reference, and any scheme whose scores differ is reported.
+
+    python -m benchmarks.scheme_analyzer_scoring
+    python -m benchmarks.scheme_analyzer_scoring --repeat 10 --output benchmarks/results/scheme_analyzer_scoring.json
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from Python_Files import scheme_analyzer
+from Python_Files.scheme_analyzer import SchemeAnalyzer, SchemeInfo
+from Python_Files.service_clients import read_chunk_records
+from Python_Files.tracing import summarize
+
+PROFILES = [
+    {"category": "SC", "annual_income": 150000, "specific_needs": ["education", "scholarship"]},
+    {"category": "General", "annual_income": 600000, "specific_needs": ["housing loan", "healthcare"]},
+    {"category": "OBC", "annual_income": 90000, "specific_needs": ["farming", "irrigation", "crop insurance"]},
+    {"category": "ST", "annual_income": 40000, "specific_needs": []},
+]
+
+def reference_related_terms(need: str) -> List[str]:
+    """_get_related_terms as it was before RELATED_TERMS: the dict is rebuilt on every call."""
+    related_terms_dict = {
+        'financial': ['money', 'loan', 'subsidy', 'grant', 'aid', 'assistance'],
+        'education': ['study', 'school', 'college', 'university', 'scholarship', 'learning'],
+        'healthcare': ['medical', 'health', 'hospital', 'treatment', 'medicine'],
+        'housing': ['home', 'house', 'accommodation', 'shelter', 'residence'],
+        'employment': ['job', 'work', 'career', 'business', 'self-employment', 'occupation'],
+        'agriculture': ['farming', 'crop', 'irrigation', 'farm', 'agricultural'],
+        'skill': ['training', 'development', 'workshop', 'vocational', 'apprenticeship']
+    }
+    for category, terms in related_terms_dict.items():
+        if need in terms or category in need:
+            return terms
+    return []
+
+def reference_needs_match(scheme_info: SchemeInfo, user_needs: List[str]) -> float:
+    if not user_needs:
+        return 0.5
+    matched_needs = 0
+    scheme_text = ' '.join([
+        scheme_info.description.lower(),
+        ' '.join(b.lower() for b in scheme_info.benefits),
+        ' '.join(str(v).lower() for v in scheme_info.eligibility_criteria.values())
+    ])
+    for need in user_needs:
+        need_lower = need.lower()
+        if need_lower in scheme_text:
+            matched_needs += 1
+        elif any(related in scheme_text for related in reference_related_terms(need_lower)):
+            matched_needs += 0.5
+    return matched_needs / len(user_needs)
+
+def reference_category_relevance(scheme_info: SchemeInfo, user_profile: Dict[str, Any]) -> float:
+    relevance_score = 0.5
+    user_category = user_profile.get('category', '').lower()
+    scheme_text = ' '.join([
+        scheme_info.description.lower(),
+        ' '.join(str(v).lower() for v in scheme_info.eligibility_criteria.values())
+    ])
+    if user_category in scheme_text:
+        relevance_score = 1.0
+    elif any(cat in scheme_text for cat in ['general', 'all categories', 'any category']):
+        relevance_score = 0.8
+    elif any(cat in scheme_text for cat in ['sc', 'st', 'obc', 'minority']) and user_category in ['sc', 'st', 'obc', 'minority']:
+        relevance_score = 0.9
+    return relevance_score
+
+def reference_accessibility(scheme_info: SchemeInfo, user_profile: Dict[str, Any]) -> float:
+    accessibility_score = 0.0
+    factors_checked = 0
+    income_mentioned = False
+    for criterion in scheme_info.eligibility_criteria:
+        if 'income' in criterion.lower():
+            income_mentioned = True
+            user_income = user_profile.get('annual_income', 0)
+            try:
+                max_income = float(scheme_analyzer._NUMBER.findall(scheme_info.eligibility_criteria[criterion])[0])
+                if user_income <= max_income:
+                    accessibility_score += 1
+            except Exception:
+                accessibility_score += 0.5
+            factors_checked += 1
+    if not income_mentioned:
+        accessibility_score += 0.8
+        factors_checked += 1
+    doc_score = 1.0
+    if scheme_info.required_documents:
+        doc_score = max(0.2, 1.0 - (len(scheme_info.required_documents) * 0.1))
+    accessibility_score += doc_score
+    factors_checked += 1
+    process_score = 1.0
+    process_text = scheme_info.application_process.lower()
+    for indicator in ['visit office', 'in person', 'multiple steps', 'verification']:
+        if indicator in process_text:
+            process_score -= 0.2
+    accessibility_score += max(0.2, process_score)
+    factors_checked += 1
+    return accessibility_score / factors_checked
+
+def reference_scores(infos: List[SchemeInfo], profile: Dict[str, Any]) -> List[tuple]:
+    needs = profile['specific_needs']
+    return [
+        (reference_needs_match(info, needs), reference_category_relevance(info, profile),
+         reference_accessibility(info, profile))
+        for info in infos
+    ]
+
+def per_scheme_scores(analyzer: SchemeAnalyzer, infos: List[SchemeInfo], profile: Dict[str, Any]) -> List[tuple]:
+    needs = profile['specific_needs']
+    return [
+        (analyzer.calculate_needs_match(info, needs), analyzer.calculate_category_relevance(info, profile),
+         analyzer.calculate_accessibility(info, profile))
+        for info in infos
+    ]
+
+def _time_ms(function: Callable[[], Any]) -> float:
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+def measure(infos: List[SchemeInfo], repeat: int) -> Dict[str, Any]:
+    analyzer = SchemeAnalyzer()
+    mismatches = set()
+    for profile in PROFILES:
+        expected = reference_scores(infos, profile)
+        scores = per_scheme_scores(analyzer, infos, profile)
+        mismatches.update(index for index, (got, want) in enumerate(zip(scores, expected)) if got != want)
+
+    # Milliseconds to score every scheme against one profile
+    timings = {"reference": [], "per_scheme": []}
+    for _ in range(repeat):
+        for profile in PROFILES:
+            timings["reference"].append(_time_ms(lambda: reference_scores(infos, profile)))
+            timings["per_scheme"].append(_time_ms(lambda: per_scheme_scores(analyzer, infos, profile)))
+
+    return {
+        "schemes": len(infos),
+        "profiles": len(PROFILES),
+        "repeat": repeat,
+        "mismatches": len(mismatches),
+        "mismatched_schemes": sorted(mismatches)[:20],
+        "per_profile_ms": summarize(timings),
+    }
+
+def print_report(report: Dict[str, Any]):
+    print(f"{report['schemes']} schemes x {report['profiles']} profiles, {report['repeat']} run(s); "
+          f"{report['mismatches']} schemes score differently from the reference implementation")
+    print(f"{'':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, timing in report["per_profile_ms"].items():
+        print(f"{name:<12} {timing['p50']:>8.1f} {timing['p95']:>8.1f} {timing['p99']:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time SchemeAnalyzer's per-scheme scores against the previous implementation.")
+    parser.add_argument("--chunks-dir", default=os.path.join(ROOT_DIR, "chunks"))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    analyzer = SchemeAnalyzer()
+    infos = [analyzer.extract_scheme_info(record["text"]) for record in read_chunk_records(args.chunks_dir)]
+    infos = [info for info in infos if info is not None]
+    if not infos:
+        print(f"No chunks found in {args.chunks_dir}")
+        sys.exit(1)
+
+    report = measure(infos, args.repeat)
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Micro-benchmark of SchemeAnalyzer.extract_scheme_info over every chunk in chunks/.
+
+Times three things per chunk: the previous line-by-line implementation (kept
+below as the reference), a cold single-pass parse, and a memoized call.
+Outputs are compared field by field, and any chunk whose result differs from
+the reference is reported.
+
+    python -m benchmarks.scheme_info_parsing
+    python -m benchmarks.scheme_info_parsing --repeat 5 --output benchmarks/results/scheme_info_parsing.json
+"""
+from typing import Any, Dict, List
+from dataclasses import asdict
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from Python_Files import scheme_analyzer
+from Python_Files.scheme_analyzer import SchemeAnalyzer, SchemeInfo
+from Python_Files.service_clients import read_chunk_records
+from Python_Files.tracing import summarize
+
+def reference_extract_scheme_info(scheme_text: str) -> SchemeInfo:
+    """extract_scheme_info as it was before the single-pass parser: one walk over the lines per section."""
+    lines = scheme_text.split('\n')
+    scheme_name = lines[0].strip()
+
+    description = ""
+    for line in lines[1:]:
+        if line.strip():
+            description = line.strip()
+            break
+
+    benefits = []
+    for line in lines:
+        line = line.strip()
+        if line.startswith('•') or line.startswith('-') or re.match(r'^\d+\.', line):
+            benefits.append(line.lstrip('•-123456789. '))
+
+    eligibility_criteria = {}
+    in_eligibility_section = False
+    current_criterion = ""
+    for line in lines:
+        line = line.strip().lower()
+        if 'eligibility' in line or 'criteria' in line:
+            in_eligibility_section = True
+            continue
+        if in_eligibility_section and line:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                eligibility_criteria[key.strip()] = value.strip()
+            else:
+                current_criterion += line + " "
+    if current_criterion:
+        eligibility_criteria['general'] = current_criterion.strip()
+
+    application_process = ""
+    in_application_section = False
+    for line in lines:
+        if 'how to apply' in line.lower() or 'application process' in line.lower():
+            in_application_section = True
+            continue
+        if in_application_section and line.strip():
+            application_process += line.strip() + " "
+
+    required_documents = []
+    in_documents_section = False
+    for line in lines:
+        if 'required document' in line.lower() or 'document required' in line.lower():
+            in_documents_section = True
+            continue
+        if in_documents_section and line.strip():
+            if line.startswith('•') or line.startswith('-'):
+                required_documents.append(line.lstrip('•- '))
+
+    success_factors = []
+    warnings = []
+    for line in lines:
+        line = line.strip()
+        if 'important' in line.lower() or 'warning' in line.lower() or 'note:' in line.lower():
+            warnings.append(line)
+        elif 'tip' in line.lower() or 'advice' in line.lower() or 'recommend' in line.lower():
+            success_factors.append(line)
+
+    return SchemeInfo(
+        scheme_name=scheme_name,
+        description=description,
+        benefits=benefits,
+        eligibility_criteria=eligibility_criteria,
+        application_process=application_process,
+        required_documents=required_documents,
+        success_factors=success_factors,
+        warnings=warnings
+    )
+
+def _time_us(function, texts: List[str]) -> List[float]:
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        function(text)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return timings
+
+def measure(texts: List[str], repeat: int) -> Dict[str, Any]:
+    analyzer = SchemeAnalyzer()
+    mismatches = [
+        index for index, text in enumerate(texts)
+        if asdict(analyzer.extract_scheme_info(text)) != asdict(reference_extract_scheme_info(text))
+    ]
+
+    timings = {"reference": [], "single_pass": [], "memoized": []}
+    for _ in range(repeat):
+        timings["reference"].extend(_time_us(reference_extract_scheme_info, texts))
+        scheme_analyzer._parse_scheme_info.cache_clear()
+        timings["single_pass"].extend(_time_us(analyzer.extract_scheme_info, texts))
+        # Every text is memoized now, as long as the chunks fit in the memo
+        timings["memoized"].extend(_time_us(analyzer.extract_scheme_info, texts))
+
+    totals = {name: sum(values) / repeat / 1000 for name, values in timings.items()}
+    return {
+        "chunks": len(texts),
+        "repeat": repeat,
+        "memo_size": scheme_analyzer.SCHEME_INFO_MEMO_SIZE,
+        "mismatches": len(mismatches),
+        "mismatched_chunks": mismatches[:20],
+        "per_chunk_us": summarize(timings),
+        "total_ms": {name: round(value, 2) for name, value in totals.items()},
+    }
+
+def print_report(report: Dict[str, Any]):
+    print(f"{report['chunks']} chunks, {report['repeat']} run(s); "
+          f"{report['mismatches']} differ from the reference implementation")
+    print(f"{'':<12} {'total ms':>10} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8}")
+    for name, timing in report["per_chunk_us"].items():
+        print(f"{name:<12} {report['total_ms'][name]:>10.1f} {timing['p50']:>8.1f} "
+              f"{timing['p95']:>8.1f} {timing['p99']:>8.1f}")
+    if report["chunks"] > report["memo_size"]:
+        print(f"Note: more chunks than SCHEME_INFO_MEMO_SIZE ({report['memo_size']}), so memoized calls miss")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time SchemeAnalyzer.extract_scheme_info over every chunk.")
+    parser.add_argument("--chunks-dir", default=os.path.join(ROOT_DIR, "chunks"))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    texts = [record["text"] for record in read_chunk_records(args.chunks_dir)]
+    if not texts:
+        print(f"No chunks found in {args.chunks_dir}")
+        sys.exit(1)
+
+    report = measure(texts, args.repeat)
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Micro-benchmark of the post-processing in SchemeTools.search_scheme over the fake index.
+
+Each search queries the fake index with several variations of a question (the
+opening words of a random chunk) in one query_many call. Only what follows the
+query is timed: score and state filtering, deduplication and picking the top
+five results. Two versions are compared: the previous one, which built a
+Pydantic SchemeInfo for every match before filtering (kept below as the
+reference), and the current ResultBatch pipeline. Returned results are compared
+field by field, and peak allocation is measured with tracemalloc.
+
+scheme_agent imports langchain and Streamlit when loaded, so its SchemeInfo
+model and state filter are mirrored here.
+
+    python -m benchmarks.search_postprocessing
+    python -m benchmarks.search_postprocessing --searches 500 --state kerala --output benchmarks/results/search_postprocessing.json
+"""
+from typing import Any, Dict, List
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+import tracemalloc
+import numpy as np
+from pydantic import BaseModel
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from Python_Files.retrieval_results import ResultBatch
+from Python_Files.service_clients import FakeIndex, fake_embedding
+from Python_Files.tracing import summarize
+
+MIN_RELEVANCE_SCORE = 0.7
+TOP_K = 15
+VARIATION_SUFFIXES = ("", " yojana", " scheme", " kisan")
+
+CENTRAL_SCHEME_TERMS = ("central scheme", "centrally sponsored", "nationwide", "all states", "pan india",
+                        "government of india")
+INDIAN_STATES = {"andhra pradesh", "arunachal pradesh", "assam", "bihar", "chhattisgarh", "goa", "gujarat",
+                 "haryana", "himachal pradesh", "jharkhand", "karnataka", "kerala", "madhya pradesh",
+                 "maharashtra", "manipur", "meghalaya", "mizoram", "nagaland", "odisha", "punjab", "rajasthan",
+                 "sikkim", "tamil nadu", "telangana", "tripura", "uttar pradesh", "uttarakhand", "west bengal"}
+
+class SchemeInfo(BaseModel):
+    scheme_name: str
+    details: str
+    source_file: str
+    relevance_score: float
+
+def is_text_applicable(details: str, user_state: str) -> bool:
+    """SchemeTools.is_text_applicable."""
+    if not user_state:
+        return True
+    scheme_details = details.lower()
+    state_name = user_state.lower()
+    if any(term in scheme_details for term in CENTRAL_SCHEME_TERMS):
+        return True
+    if state_name in scheme_details:
+        return True
+    for state in INDIAN_STATES:
+        if state != state_name and state in scheme_details:
+            return False
+    return True
+
+def reference_is_applicable(scheme_info: SchemeInfo, user_state: str) -> bool:
+    """is_scheme_applicable as it was: the term and state sets are rebuilt on every call."""
+    if not user_state:
+        return True
+    scheme_details = scheme_info.details.lower()
+    state_name = user_state.lower()
+    if any(term in scheme_details for term in ["central scheme", "centrally sponsored", "nationwide",
+                                               "all states", "pan india", "government of india"]):
+        return True
+    if state_name in scheme_details:
+        return True
+    indian_states = {"andhra pradesh", "arunachal pradesh", "assam", "bihar", "chhattisgarh", "goa", "gujarat",
+                     "haryana", "himachal pradesh", "jharkhand", "karnataka", "kerala", "madhya pradesh",
+                     "maharashtra", "manipur", "meghalaya", "mizoram", "nagaland", "odisha", "punjab",
+                     "rajasthan", "sikkim", "tamil nadu", "telangana", "tripura", "uttar pradesh",
+                     "uttarakhand", "west bengal"}
+    for state in indian_states:
+        if state != state_name and state in scheme_details:
+            return False
+    return True
+
+def reference_postprocess(responses, user_state: str) -> List[SchemeInfo]:
+    """search_scheme's post-processing before ResultBatch: one model per match kept by score."""
+    all_results = []
+    for results in responses:
+        for match in results.matches:
+            if match.score >= MIN_RELEVANCE_SCORE:
+                scheme_info = SchemeInfo(
+                    scheme_name=match.metadata.get("scheme_name", "Unknown Scheme"),
+                    details=match.metadata.get("text", ""),
+                    source_file=match.metadata.get("source_file", ""),
+                    relevance_score=float(match.score)
+                )
+                if reference_is_applicable(scheme_info, user_state):
+                    all_results.append(scheme_info)
+
+    unique_results = []
+    seen_content = set()
+    for result in all_results:
+        content_simple = re.sub(r'\s+', ' ', result.details.lower())[:100]
+        if content_simple not in seen_content:
+            seen_content.add(content_simple)
+            unique_results.append(result)
+    unique_results.sort(key=lambda x: x.relevance_score, reverse=True)
+    return unique_results[:5]
+
+def postprocess(responses, user_state: str) -> List[SchemeInfo]:
+    """search_scheme's post-processing: models are built only for the results returned."""
+    batches = [
+        ResultBatch.from_matches(results.matches)
+        .above(MIN_RELEVANCE_SCORE)
+        .filter(lambda text: is_text_applicable(text, user_state))
+        for results in responses
+    ]
+    unique_results = ResultBatch.concat(batches).deduplicate()
+    return [
+        SchemeInfo(
+            scheme_name=chunk.scheme_name,
+            details=chunk.text,
+            source_file=chunk.source_file,
+            relevance_score=chunk.score
+        )
+        for chunk in unique_results.top_k(5)
+    ]
+
+def build_responses(index: FakeIndex, searches: int, query_words: int, seed: int) -> List[list]:
+    """query_many responses of each search, one per question variation."""
+    rng = random.Random(seed)
+    responses = []
+    for _ in range(searches):
+        question = " ".join(rng.choice(index.records)["text"].split()[:query_words])
+        vectors = np.vstack([fake_embedding(question + suffix) for suffix in VARIATION_SUFFIXES])
+        responses.append(index.query_many(vectors, top_k=TOP_K, include_metadata=True))
+    return responses
+
+def _peak_kb(function, searches: List[list], user_state: str) -> float:
+    tracemalloc.start()
+    try:
+        for responses in searches:
+            function(responses, user_state)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def measure(searches: List[list], user_state: str, repeat: int, memory_searches: int) -> Dict[str, Any]:
+    functions = {"reference": reference_postprocess, "result_batch": postprocess}
+    mismatches = [
+        index for index, responses in enumerate(searches)
+        if [model.model_dump() for model in reference_postprocess(responses, user_state)]
+        != [model.model_dump() for model in postprocess(responses, user_state)]
+    ]
+    kept = [
+        sum(1 for results in responses for match in results.matches if match.score >= MIN_RELEVANCE_SCORE)
+        for responses in searches
+    ]
+
+    # Microseconds per search
+    timings = {name: [] for name in functions}
+    for _ in range(repeat):
+        for responses in searches:
+            for name, function in functions.items():
+                start = time.perf_counter()
+                function(responses, user_state)
+                timings[name].append((time.perf_counter() - start) * 1_000_000)
+
+    return {
+        "searches": len(searches),
+        "variations": len(VARIATION_SUFFIXES),
+        "user_state": user_state,
+        "repeat": repeat,
+        "mean_matches_above_threshold": round(sum(kept) / len(kept), 1),
+        "mismatches": len(mismatches),
+        "mismatched_searches": mismatches[:20],
+        "total_ms": {name: round(sum(values) / repeat / 1000, 2) for name, values in timings.items()},
+        "per_search_us": summarize(timings),
+        "memory_searches": memory_searches,
+        "peak_alloc_kb": {
+            name: round(_peak_kb(function, searches[:memory_searches], user_state), 1)
+            for name, function in functions.items()
+        },
+    }
+
+def print_report(report: Dict[str, Any]):
+    print(f"{report['searches']} searches of {report['variations']} variations, "
+          f"{report['mean_matches_above_threshold']} matches above the threshold on average, "
+          f"state {report['user_state'] or 'not set'}; "
+          f"{report['mismatches']} differ from the reference implementation")
+    print(f"{'':<14} {'total ms':>10} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8} {'peak KB':>9}")
+    for name, timing in report["per_search_us"].items():
+        print(f"{name:<14} {report['total_ms'][name]:>10.1f} {timing['p50']:>8.1f} {timing['p95']:>8.1f} "
+              f"{timing['p99']:>8.1f} {report['peak_alloc_kb'][name]:>9.1f}")
+    print(f"Peak allocation is over {report['memory_searches']} searches")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time search_scheme's result post-processing.")
+    parser.add_argument("--chunks-dir", default=os.path.join(ROOT_DIR, "chunks"))
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--query-words", type=int, default=8)
+    parser.add_argument("--state", default="kerala", help="User state for the state filter; empty for none")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--memory-searches", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    index = FakeIndex(args.chunks_dir)
+    if not index.records:
+        print(f"No chunks found in {args.chunks_dir}")
+        sys.exit(1)
+
+    searches = build_responses(index, args.searches, args.query_words, args.seed)
+    report = measure(searches, args.state, args.repeat, args.memory_searches)
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
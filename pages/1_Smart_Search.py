@@ -1,8 +1,9 @@
 import streamlit as st
 from utils.common import initialize_session_state, display_state_selector, check_state_selection, get_greeting_message
-from Python_Files.scheme_agent import process_query, create_scheme_agent
+from Python_Files.scheme_agent import stream_query, get_conversation_summary
 from Python_Files.translation_utils import translate_text
 from utils.logging_utils import logger
+from Python_Files.tracing import span
 
 st.set_page_config(
     page_title="Smart Search - RightScheme AI",
@@ -304,62 +305,67 @@ def main():
         if not st.session_state.semantic_search["chat_history"]:
             st.session_state.semantic_search["is_first_message"] = False
             
-        # Process the query and update chat history in one go
-        with st.chat_message("user"):
-            st.write(prompt)
+        with span("smart_search", stage="request"):
+            # Process the query and update chat history in one go
+            with st.chat_message("user"):
+                st.write(prompt)
             
-        # Show thinking animation
-        thinking_container = display_thinking_animation()
-        
-        # Get response
-        contextualized_query = f"For someone in {st.session_state.user_state}: {prompt}"
-        response_data = process_query(contextualized_query)
-        
-        # Log the conversation
-        logger.log_conversation(
-            conversation_type="semantic_search",
-            user_query=prompt,
-            response=response_data["response"],
-            metadata={
-                "state": st.session_state.user_state,
-                "language": st.session_state.language,
-                "contextualized_query": contextualized_query
-            }
-        )
-        
-        # Remove thinking animation
-        thinking_container.empty()
-        
-        # Display response
-        with st.chat_message("assistant"):
-            # Store original English response
-            original_response = response_data["response"]
+            # Show thinking animation until the first token arrives
+            thinking_container = display_thinking_animation()
+        
+            contextualized_query = f"For someone in {st.session_state.user_state}: {prompt}"
+        
+            def response_tokens():
+                for i, token in enumerate(stream_query(contextualized_query)):
+                    if i == 0:
+                        thinking_container.empty()
+                    yield token
+                thinking_container.empty()
+        
+            # Stream the response
+            with st.chat_message("assistant"):
+                # Store original English response
+                original_response = st.write_stream(response_tokens())
             
-            # Display original English first
-            st.write(original_response)
-            
-            # Only if language is not English, show translation
-            if st.session_state.language != "en":
-                st.markdown("---")
-                st.markdown("**" + translate_text("Translation") + ":**")
-                st.write(translate_text(original_response))
-        
-        # Update semantic search chat history
-        st.session_state.semantic_search["chat_history"].extend([
-            {"role": "user", "content": prompt},
-            {"role": "assistant", "content": original_response}
-        ])
-        
-        # Show conversation summary in sidebar
-        with st.sidebar:
-            with st.expander(translate_text("Conversation Summary"), expanded=False):
+                # Only if language is not English, show translation
                 if st.session_state.language != "en":
-                    st.write(response_data["conversation_summary"])  # Original English
-                    st.divider()
-                    st.caption(translate_text("Translation:"))
-                    st.write(translate_text(response_data["conversation_summary"]))  # Translated
-                else:
-                    st.write(response_data["conversation_summary"])
+                    st.markdown("---")
+                    st.markdown("**" + translate_text("Translation") + ":**")
+                    st.write(translate_text(original_response))
+        
+            response_data = {
+                "response": original_response,
+                "conversation_summary": get_conversation_summary(st.session_state.find_schemes["scheme_agent"])
+            }
+        
+            # Log the conversation
+            logger.log_conversation(
+                conversation_type="semantic_search",
+                user_query=prompt,
+                response=response_data["response"],
+                metadata={
+                    "state": st.session_state.user_state,
+                    "language": st.session_state.language,
+                    "contextualized_query": contextualized_query
+                }
+            )
+        
+            # Update semantic search chat history
+            st.session_state.semantic_search["chat_history"].extend([
+                {"role": "user", "content": prompt},
+                {"role": "assistant", "content": original_response}
+            ])
+        
+            # Show conversation summary in sidebar
+            with st.sidebar:
+                with st.expander(translate_text("Conversation Summary"), expanded=False):
+                    if st.session_state.language != "en":
+                        st.write(response_data["conversation_summary"])  # Original English
+                        st.divider()
+                        st.caption(translate_text("Translation:"))
+                        st.write(translate_text(response_data["conversation_summary"]))  # Translated
+                    else:
+                        st.write(response_data["conversation_summary"])
 
     # Update the chat message styling
     st.markdown("""
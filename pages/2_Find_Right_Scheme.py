@@ -4,8 +4,9 @@ from Python_Files.scheme_semantic_matcher import SemanticSchemeMatcher, UserProf
 from Python_Files.scheme_matcher import SchemeCategory, SchemeMatch
 from utils.common import initialize_session_state, display_state_selector, translate_text, check_state_selection, get_greeting_message
 from utils.logging_utils import logger
+from Python_Files.tracing import span, traced
 from Python_Files.scheme_agent import process_query, create_scheme_agent
-from Python_Files.translation_utils import translate_to_english
+from Python_Files.translation_utils import translate_to_english, prefetch_translations, translate_many
 
 st.set_page_config(
     page_title="Find Right Scheme - RightScheme AI",
@@ -571,6 +572,19 @@ def display_questionnaire():
     total_questions = len(questions)
     current_q_index = st.session_state.find_schemes["current_question"]
     
+    # Translate every string this render needs in one batch
+    page_strings = [f"Question {current_q_index + 1} of {total_questions}"]
+    if current_q_index < total_questions:
+        question = questions[current_q_index]
+        page_strings.extend([question["category"], question["text"], question.get("placeholder", "")])
+        page_strings.extend(question.get("options", []))
+        prev_response = st.session_state.find_schemes["user_responses"].get(question["id"])
+        if isinstance(prev_response, list):
+            page_strings.extend(prev_response)
+        elif isinstance(prev_response, str):
+            page_strings.append(prev_response)
+    prefetch_translations(page_strings)
+    
     # Display progress bar
     progress = (current_q_index) / total_questions
     st.progress(progress)
@@ -826,56 +840,93 @@ def display_bilingual_message(message: str, role: str):
             st.markdown(f"**{translate_text('Translation')}:**")
             st.write(translate_text(message))
 
+def localize_recommendation(scheme: SchemeRecommendation) -> Dict[str, Any]:
+    """Get the displayable fields of a recommendation in the session language.
+    
+    All strings go out in one batch; scheme names and catalog text are served from
+    the precomputed scheme translations when available.
+    """
+    fields = {
+        "scheme_name": scheme.scheme_name,
+        "why_recommended": scheme.why_recommended,
+        "benefits": list(scheme.benefits),
+        "criteria": [
+            (criterion, criterion.replace('_', ' ').title(), str(requirement))
+            for criterion, requirement in scheme.eligibility_requirements.items()
+        ],
+        "application_process": list(scheme.application_process)
+    }
+    if st.session_state.language == "en":
+        return fields
+    
+    texts = [
+        scheme.scheme_name, scheme.why_recommended, *scheme.benefits,
+        *[text for _, label, requirement in fields["criteria"] for text in (label, requirement)],
+        *scheme.application_process
+    ]
+    translations = dict(zip(texts, translate_many(texts)))
+    translate = lambda text: translations.get(text, text)
+    
+    fields["scheme_name"] = translate(scheme.scheme_name)
+    fields["why_recommended"] = translate(scheme.why_recommended)
+    fields["benefits"] = [translate(benefit) for benefit in scheme.benefits]
+    fields["criteria"] = [
+        (criterion, translate(label), translate(requirement))
+        for criterion, label, requirement in fields["criteria"]
+    ]
+    fields["application_process"] = [translate(step) for step in scheme.application_process]
+    return fields
+
 def display_recommendations(recommendations: List[SchemeRecommendation]):
     """Display scheme recommendations in an organized manner."""
-    st.markdown("### 🎯 Top Recommended Schemes")
+    st.markdown("### 🎯 " + translate_text("Top Recommended Schemes"))
     
     for i, scheme in enumerate(recommendations, 1):
-        with st.expander(f"{i}. {scheme.scheme_name}", expanded=i==1):
+        fields = localize_recommendation(scheme)
+        with st.expander(f"{i}. {fields['scheme_name']}", expanded=i==1):
             # Why recommended section
-            st.markdown("#### 💡 Why This Scheme")
-            st.write(scheme.why_recommended)
+            st.markdown("#### 💡 " + translate_text("Why This Scheme"))
+            st.write(fields["why_recommended"])
             
             # Benefits section
-            st.markdown("#### 📋 Key Benefits")
-            for benefit in scheme.benefits:
+            st.markdown("#### 📋 " + translate_text("Key Benefits"))
+            for benefit in fields["benefits"]:
                 st.markdown(f"• {benefit}")
             
             # Eligibility section with detailed criteria
-            st.markdown("#### ✅ Eligibility Status")
+            st.markdown("#### ✅ " + translate_text("Eligibility Status"))
             
             # Create two columns for better organization
             col1, col2 = st.columns(2)
             
             # Split eligibility criteria between columns
-            criteria_items = list(scheme.eligibility_requirements.items())
+            criteria_items = fields["criteria"]
             mid_point = len(criteria_items) // 2
             
             with col1:
-                for criterion, requirement in list(criteria_items[:mid_point]):
+                for criterion, criterion_text, requirement in list(criteria_items[:mid_point]):
                     matches = scheme.eligibility_status.get(criterion, False)
                     icon = "✅" if matches else "❌"
-                    criterion_text = criterion.replace('_', ' ').title()
                     st.markdown(f"{icon} **{criterion_text}**")
-                    st.markdown(f"   *Requirement: {requirement}*")
+                    st.markdown(f"   *{translate_text('Requirement')}: {requirement}*")
             
             with col2:
-                for criterion, requirement in list(criteria_items[mid_point:]):
+                for criterion, criterion_text, requirement in list(criteria_items[mid_point:]):
                     matches = scheme.eligibility_status.get(criterion, False)
                     icon = "✅" if matches else "❌"
-                    criterion_text = criterion.replace('_', ' ').title()
                     st.markdown(f"{icon} **{criterion_text}**")
-                    st.markdown(f"   *Requirement: {requirement}*")
+                    st.markdown(f"   *{translate_text('Requirement')}: {requirement}*")
             
             # Application process
-            st.markdown("#### 📝 How to Apply")
-            for step in scheme.application_process:
+            st.markdown("#### 📝 " + translate_text("How to Apply"))
+            for step in fields["application_process"]:
                 st.markdown(f"• {step}")
             
             # Show relevance score
             st.progress(scheme.relevance_score)
-            st.caption(f"Match Score: {scheme.relevance_score:.0%}")
+            st.caption(f"{translate_text('Match Score')}: {scheme.relevance_score:.0%}")
 
+@traced("request", name="find_schemes.questionnaire")
 def handle_questionnaire_completion(responses: Dict, state: str):
     """Handle the completion of the questionnaire."""
     try:
@@ -997,40 +1048,41 @@ def main():
         # Handle chat interface
         if query := st.chat_input(translate_text("Ask follow-up questions about schemes...")):
             try:
-                # Translate query to English if in another language
-                english_query = translate_to_english(query) if st.session_state.language != "en" else query
+                with span("find_schemes.follow_up", stage="request"):
+                    # Translate query to English if in another language
+                    english_query = translate_to_english(query) if st.session_state.language != "en" else query
                 
-                # Add to chat history
-                st.session_state.find_schemes["chat_history"].append({"role": "user", "content": query})
+                    # Add to chat history
+                    st.session_state.find_schemes["chat_history"].append({"role": "user", "content": query})
                 
-                # Show thinking animation
-                display_thinking_animation()
+                    # Show thinking animation
+                    display_thinking_animation()
                 
-                # Add state context to the query
-                contextualized_query = f"For someone in {st.session_state.user_state}: {english_query}"
+                    # Add state context to the query
+                    contextualized_query = f"For someone in {st.session_state.user_state}: {english_query}"
                 
-                # Get response
-                response_data = process_query(contextualized_query)
+                    # Get response
+                    response_data = process_query(contextualized_query)
                 
-                # Log follow-up conversation
-                logger.log_conversation(
-                    conversation_type="find_schemes",
-                    user_query=query,
-                    response=response_data["response"],
-                    metadata={
-                        "state": st.session_state.user_state,
-                        "language": st.session_state.language,
-                        "user_profile": st.session_state.find_schemes.get("user_responses", {}),
-                        "interaction_type": "follow_up",
-                        "english_query": english_query,
-                        "contextualized_query": contextualized_query
-                    }
-                )
+                    # Log follow-up conversation
+                    logger.log_conversation(
+                        conversation_type="find_schemes",
+                        user_query=query,
+                        response=response_data["response"],
+                        metadata={
+                            "state": st.session_state.user_state,
+                            "language": st.session_state.language,
+                            "user_profile": st.session_state.find_schemes.get("user_responses", {}),
+                            "interaction_type": "follow_up",
+                            "english_query": english_query,
+                            "contextualized_query": contextualized_query
+                        }
+                    )
                 
-                # Add to chat history
-                st.session_state.find_schemes["chat_history"].append(
-                    {"role": "assistant", "content": response_data["response"]}
-                )
+                    # Add to chat history
+                    st.session_state.find_schemes["chat_history"].append(
+                        {"role": "assistant", "content": response_data["response"]}
+                    )
             except Exception as e:
                 logger.log_error("find_schemes", f"Error processing chat: {str(e)}", {
                     "state": st.session_state.get("user_state"),
@@ -1,7 +1,12 @@
 import streamlit as st
-from Python_Files.translation_utils import translate_text
+from Python_Files.translation_utils import translate_text, prewarm_ui_strings
+from Python_Files.metrics import start_metrics_server
+import os
 import time
 
+# Port of the Prometheus metrics sidecar; set to 0 to disable it
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9464"))
+
 # List of Indian states and UTs
 INDIAN_STATES = [
     "Select your state",
@@ -37,8 +42,20 @@ class BaseAgent:
         finally:
             self.set_loading(False)
 
+@st.cache_resource(show_spinner=False)
+def start_metrics_sidecar():
+    """Serve this process's metrics on METRICS_PORT, once per process."""
+    if not METRICS_PORT:
+        return None
+    try:
+        return start_metrics_server(METRICS_PORT)
+    except OSError as e:
+        print(f"Error starting metrics server on port {METRICS_PORT}: {e}")
+        return None
+
 def initialize_session_state():
     """Initialize all session state variables with separate contexts."""
+    start_metrics_sidecar()
     
     # First, handle the core persistent states
     if "core_state" not in st.session_state:
@@ -87,6 +104,9 @@ def initialize_session_state():
 
 def display_state_selector():
     """Display state selector in sidebar and handle state management."""
+    # Static labels are translated in one batch the first time a language is used
+    prewarm_ui_strings(st.session_state.language)
+    
     with st.sidebar:
         st.header(translate_text("Your Location"))
         
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import re
+from collections import Counter
+from typing import Dict, Any, Iterator, Tuple
+from Python_Files.tracing import percentiles_from_entries
+
+LOG_TYPES = ("find_schemes", "semantic_search")
+
+# Offsets and running totals, so each run only reads what was appended since the last one
+DEFAULT_STATE_FILE = ".analytics_state.json"
+
+class LogAnalytics:
+    """Incremental aggregates over the conversation logs.
+
+    Each log file's read position is stored in a state file next to the running
+    counts: a byte offset for ``.jsonl`` files (only complete lines are consumed)
+    and an entry count for legacy ``.json`` array files. Rerunning ``scan``
+    therefore only parses entries logged since the previous run.
+    """
+
+    COUNTERS = ("by_type", "by_state", "by_language", "by_occupation", "queries", "recommendations_per_response")
+
+    def __init__(self, log_dir: str = "logs", state_path: str = None):
+        self.log_dir = log_dir
+        self.state_path = state_path or os.path.join(log_dir, DEFAULT_STATE_FILE)
+        self.positions: Dict[str, int] = {}
+        self.counts: Dict[str, Counter] = {name: Counter() for name in self.COUNTERS}
+        self.total_recommendations = 0
+        self.load_state()
+
+    def load_state(self):
+        """Restore offsets and counts saved by a previous run."""
+        if not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.positions = state.get("positions", {})
+        for name in self.COUNTERS:
+            self.counts[name] = Counter(state.get("counts", {}).get(name, {}))
+        self.total_recommendations = state.get("total_recommendations", 0)
+
+    def save_state(self):
+        """Persist offsets and counts atomically."""
+        state = {
+            "positions": self.positions,
+            "counts": {name: dict(counter) for name, counter in self.counts.items()},
+            "total_recommendations": self.total_recommendations
+        }
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def _read_new_entries(self, filepath: str, position: int) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """Yield (entry, position after entry) for everything past the saved position."""
+        if filepath.endswith(".jsonl"):
+            with open(filepath, 'rb') as f:
+                f.seek(position)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        return  # Line still being written; pick it up next run
+                    position += len(line)
+                    try:
+                        yield json.loads(line), position
+                    except json.JSONDecodeError:
+                        continue
+        else:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                try:
+                    entries = json.load(f)
+                except json.JSONDecodeError:
+                    return
+            for index in range(position, len(entries)):
+                yield entries[index], index + 1
+
+    def _log_files(self) -> Iterator[Tuple[str, str]]:
+        """(state key, path) of every log file, in date order per type."""
+        for log_type in LOG_TYPES:
+            directory = os.path.join(self.log_dir, log_type)
+            if not os.path.isdir(directory):
+                continue
+            for filename in sorted(os.listdir(directory)):
+                if filename.endswith((".jsonl", ".json")):
+                    yield f"{log_type}/{filename}", os.path.join(directory, filename)
+
+    def scan(self) -> int:
+        """Read every log file from its saved position; returns the number of new entries."""
+        new_entries = 0
+        for key, filepath in self._log_files():
+            for entry, position in self._read_new_entries(filepath, self.positions.get(key, 0)):
+                self.add_entry(entry)
+                self.positions[key] = position
+                new_entries += 1
+        return new_entries
+
+    def stage_latency(self) -> Dict[str, Dict[str, float]]:
+        """p50/p95/p99 per request stage over the traces stored in the logs.
+
+        Percentiles can't be updated incrementally, so this reads every file in full.
+        """
+        entries = (entry for _, filepath in self._log_files() for entry, _ in self._read_new_entries(filepath, 0))
+        return percentiles_from_entries(entries)
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Case- and whitespace-insensitive form of a query, used to count repeats."""
+        return re.sub(r"\s+", " ", query).strip().lower()
+
+    def add_entry(self, entry: Dict[str, Any]):
+        """Fold one log entry into the counts."""
+        metadata = entry.get("metadata") or {}
+        profile = metadata.get("user_profile") if isinstance(metadata.get("user_profile"), dict) else {}
+
+        self.counts["by_type"][entry.get("type", "unknown")] += 1
+        self.counts["by_state"][metadata.get("state") or "unknown"] += 1
+        self.counts["by_language"][metadata.get("language") or "unknown"] += 1
+        occupation = profile.get("occupation") or profile.get("occupation_category")
+        if occupation:
+            self.counts["by_occupation"][occupation] += 1
+
+        # Non-English queries are counted by their English form, which is what gets cached
+        query = metadata.get("english_query") or entry.get("user_query")
+        if query:
+            self.counts["queries"][self.normalize_query(query)] += 1
+
+        if "num_recommendations" in metadata:
+            num_recommendations = metadata["num_recommendations"]
+            self.counts["recommendations_per_response"][str(num_recommendations)] += 1
+            self.total_recommendations += num_recommendations
+
+    def report(self, top_n: int = 20) -> Dict[str, Any]:
+        """Summary of the aggregated logs."""
+        responses = sum(self.counts["recommendations_per_response"].values())
+        repeated = [(query, count) for query, count in self.counts["queries"].most_common(top_n) if count > 1]
+        return {
+            "total_entries": sum(self.counts["by_type"].values()),
+            "by_type": dict(self.counts["by_type"].most_common()),
+            "by_state": dict(self.counts["by_state"].most_common()),
+            "by_language": dict(self.counts["by_language"].most_common()),
+            "by_occupation": dict(self.counts["by_occupation"].most_common()),
+            "distinct_queries": len(self.counts["queries"]),
+            "top_repeated_queries": [{"query": query, "count": count} for query, count in repeated],
+            "recommendations": {
+                "responses": responses,
+                "total": self.total_recommendations,
+                "average": self.total_recommendations / responses if responses else 0,
+                "per_response": dict(sorted(self.counts["recommendations_per_response"].items(), key=lambda item: int(item[0])))
+            }
+        }
+
+def print_report(report: Dict[str, Any]):
+    """Print a report in a readable layout."""
+    print(f"Total entries: {report['total_entries']}")
+    for section in ("by_type", "by_state", "by_language", "by_occupation"):
+        print(f"\n{section.replace('_', ' ').title()}:")
+        for name, count in report[section].items():
+            print(f"  {name}: {count}")
+
+    print(f"\nTop repeated queries ({report['distinct_queries']} distinct):")
+    for item in report["top_repeated_queries"]:
+        query = item["query"] if len(item["query"]) <= 100 else item["query"][:97] + "..."
+        print(f"  {item['count']:>5}  {query}")
+
+    recommendations = report["recommendations"]
+    print(f"\nRecommendations: {recommendations['total']} over {recommendations['responses']} responses "
+          f"(average {recommendations['average']:.1f})")
+    for num, count in recommendations["per_response"].items():
+        print(f"  {num} recommendations: {count}")
+
+    if "stage_latency_ms" in report:
+        print("\nStage latency (ms):")
+        for stage, stats in report["stage_latency_ms"].items():
+            print(f"  {stage}: n={stats['count']} p50={stats['p50']:.1f} p95={stats['p95']:.1f} p99={stats['p99']:.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate conversation logs incrementally.")
+    parser.add_argument("--log-dir", default="logs", help="Root of the conversation logs")
+    parser.add_argument("--state", default=None, help="State file (default: <log-dir>/.analytics_state.json)")
+    parser.add_argument("--top", type=int, default=20, help="Number of repeated queries to show")
+    parser.add_argument("--reset", action="store_true", help="Discard saved state and rescan everything")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--latency", action="store_true", help="Include per-stage latency percentiles from logged traces")
+    args = parser.parse_args()
+
+    state_path = args.state or os.path.join(args.log_dir, DEFAULT_STATE_FILE)
+    if args.reset and os.path.exists(state_path):
+        os.remove(state_path)
+
+    analytics = LogAnalytics(args.log_dir, state_path)
+    new_entries = analytics.scan()
+    analytics.save_state()
+
+    report = analytics.report(top_n=args.top)
+    if args.latency:
+        report["stage_latency_ms"] = analytics.stage_latency()
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"Read {new_entries} new entries\n")
+        print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,216 @@
+import atexit
 import json
 import os
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional
 import uuid
+from Python_Files.tracing import span, current_trace
+from Python_Files.metrics import ERRORS
+
+# Root of the conversation and error logs
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+
+# Entries are fsynced at most this often, however many were written in between
+FSYNC_INTERVAL = float(os.getenv("LOG_FSYNC_INTERVAL", "1.0"))
+
+# Upper bound on entries written per drain of the queue
+MAX_BATCH_SIZE = 500
 
 class ConversationLogger:
+    """Append-only JSONL conversation log.
+
+    Each entry is one line in ``<log_dir>/<type>/<date>_conversations.jsonl``.
+    Callers serialize each entry and enqueue the line; a background thread
+    drains the queue, appends the lines in batches and fsyncs them, so logging
+    never blocks a response and costs the same however large the day's file has
+    grown. Lines are written in a single append each, so several processes can
+    share a log directory.
+    Older ``.json`` array files are still read by ``iter_entries``.
+    """
+
     def __init__(self, log_dir: str = "logs"):
         self.log_dir = log_dir
         self.ensure_log_directory()
-        
+
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._drain, name="conversation-log-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
     def ensure_log_directory(self):
         """Create logs directory if it doesn't exist."""
-        if not os.path.exists(self.log_dir):
-            os.makedirs(self.log_dir)
-            os.makedirs(os.path.join(self.log_dir, "semantic_search"))
-            os.makedirs(os.path.join(self.log_dir, "find_schemes"))
+        for subdir in ("semantic_search", "find_schemes", "questionnaire_response", "errors"):
+            os.makedirs(os.path.join(self.log_dir, subdir), exist_ok=True)
+
+    def _log_path(self, log_type: str, suffix: str, date_str: str) -> str:
+        return os.path.join(self.log_dir, log_type, f"{date_str}_{suffix}.jsonl")
 
-    def log_conversation(self, 
+    def log_conversation(self,
                         conversation_type: str,  # 'semantic_search' or 'find_schemes'
                         user_query: str,
                         response: str,
                         metadata: Dict[str, Any] = None):
-        """Log a conversation exchange to JSON file."""
+        """Queue a conversation exchange to be appended to the day's log.
+
+        If a request trace is active, its spans are stored under ``metadata["trace"]``.
+        """
+        # Read before the logger's own span opens, which would start a trace of its own
+        trace = current_trace()
         try:
-            timestamp = datetime.now().isoformat()
-            conversation_id = str(uuid.uuid4())
-            
-            log_entry = {
-                "conversation_id": conversation_id,
-                "timestamp": timestamp,
-                "type": conversation_type,
-                "user_query": user_query,
-                "response": response,
+            with span("log_conversation", stage="logging"):
+                now = datetime.now()
+                metadata = dict(metadata or {})
+                if trace:
+                    metadata["trace"] = trace.to_dict()
+
+                log_entry = {
+                    "conversation_id": str(uuid.uuid4()),
+                    "timestamp": now.isoformat(),
+                    "type": conversation_type,
+                    "user_query": user_query,
+                    "response": response,
+                    "metadata": metadata
+                }
+                filepath = self._log_path(conversation_type, "conversations", now.strftime("%Y-%m-%d"))
+                self._queue.put((filepath, self._serialize(log_entry)))
+
+        except Exception as e:
+            print(f"Error logging conversation: {str(e)}")
+
+    def log_error(self, component: str, error: str, metadata: Dict = None):
+        """Queue an error with context to be appended to the day's error log."""
+        ERRORS.inc(component=component)
+        try:
+            now = datetime.now()
+            error_log = {
+                "timestamp": now.isoformat(),
+                "component": component,
+                "error": str(error),
                 "metadata": metadata or {}
             }
-            
-            # Create filename with date
-            date_str = datetime.now().strftime("%Y-%m-%d")
-            filename = f"{date_str}_conversations.json"
-            filepath = os.path.join(self.log_dir, conversation_type, filename)
-            
-            # Read existing logs or create new list
-            if os.path.exists(filepath):
+            self._queue.put((self._log_path("errors", "errors", now.strftime("%Y-%m-%d")), self._serialize(error_log)))
+
+        except Exception as e:
+            print(f"Error logging error: {str(e)}")
+
+    @staticmethod
+    def _serialize(entry: Dict[str, Any]) -> str:
+        """One JSONL line, built on the caller's thread so later changes to the entry's objects don't race the writer."""
+        return json.dumps(entry, ensure_ascii=False) + "\n"
+
+    def _drain(self):
+        """Writer thread: append queued entries in batches, fsyncing at most every FSYNC_INTERVAL."""
+        unsynced = set()
+        waiters = []
+        last_sync = time.monotonic()
+        while True:
+            timeout = max(FSYNC_INTERVAL - (time.monotonic() - last_sync), 0) if unsynced else None
+            try:
+                batch = [self._queue.get(timeout=timeout)]
+            except queue.Empty:
+                batch = []
+            while batch and len(batch) < MAX_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # The queue carries (path, line) pairs, flush() events and a None stop marker
+            stop = any(item is None for item in batch)
+            waiters.extend(item for item in batch if isinstance(item, threading.Event))
+            unsynced.update(self._write_batch([item for item in batch if isinstance(item, tuple)]))
+
+            if stop or waiters or time.monotonic() - last_sync >= FSYNC_INTERVAL:
+                self._sync(unsynced)
+                unsynced = set()
+                last_sync = time.monotonic()
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+            if stop:
+                return
+
+    def _write_batch(self, batch) -> set:
+        """Append a batch of (path, line) pairs with one write per file; returns the paths written.
+
+        A file that can't be written is reported and skipped, so one bad path
+        never stops the writer thread.
+        """
+        lines_by_path: Dict[str, list] = {}
+        for filepath, line in batch:
+            lines_by_path.setdefault(filepath, []).append(line)
+
+        written = set()
+        for filepath, lines in lines_by_path.items():
+            try:
+                with open(filepath, 'a', encoding='utf-8') as f:
+                    f.write("".join(lines))
+                written.add(filepath)
+            except Exception as e:
+                print(f"Error writing log file {filepath}: {str(e)}")
+        return written
+
+    def _sync(self, paths: set):
+        """fsync the files written since the last sync."""
+        for filepath in paths:
+            try:
+                fd = os.open(filepath, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            except OSError as e:
+                print(f"Error syncing log file {filepath}: {str(e)}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is written and synced."""
+        if not self._writer.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """Write out pending entries and stop the writer thread."""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=10)
+
+    def iter_entries(self, log_type: str, start_date: str = None, end_date: str = None) -> Iterator[Dict[str, Any]]:
+        """Stream entries of one log type in date order, optionally within [start_date, end_date].
+
+        Dates are ``YYYY-MM-DD`` strings. JSONL files are read line by line; legacy
+        ``.json`` array files are loaded one at a time.
+        """
+        directory = os.path.join(self.log_dir, log_type)
+        if not os.path.isdir(directory):
+            return
+
+        for filename in sorted(os.listdir(directory)):
+            date_str = filename.split("_", 1)[0]
+            if (start_date and date_str < start_date) or (end_date and date_str > end_date):
+                continue
+            filepath = os.path.join(directory, filename)
+
+            if filename.endswith(".jsonl"):
+                with open(filepath, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # Partial line from an interrupted write
+            elif filename.endswith(".json"):
                 with open(filepath, 'r', encoding='utf-8') as f:
                     try:
-                        logs = json.load(f)
+                        entries = json.load(f)
                     except json.JSONDecodeError:
-                        logs = []
-            else:
-                logs = []
-            
-            # Append new log entry
-            logs.append(log_entry)
-            
-            # Write back to file
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(logs, f, ensure_ascii=False, indent=2)
-                
-        except Exception as e:
-            print(f"Error logging conversation: {str(e)}")
-
-    def log_error(self, component: str, error: str, metadata: Dict = None):
-        """Log errors with context."""
-        error_log = {
-            "timestamp": datetime.now().isoformat(),
-            "component": component,
-            "error": str(error),
-            "metadata": metadata or {}
-        }
-        # Add logging implementation
+                        continue
+                yield from entries
 
 # Global logger instance
-logger = ConversationLogger() 
\ No newline at end of file
+logger = ConversationLogger(LOG_DIR)